@@ -0,0 +1,23 @@
+-- =========================================================
+-- 001: durable queue for large notification broadcasts
+-- (backend/app/services/jobs.py)
+-- =========================================================
+USE school_mgmt;
+
+CREATE TABLE IF NOT EXISTS notification_jobs (
+  job_id         BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+  sent_by        INT UNSIGNED NOT NULL,
+  message        TEXT NOT NULL,
+  audience       TEXT NOT NULL,
+  status         VARCHAR(20) NOT NULL DEFAULT 'queued',
+  total          INT UNSIGNED NOT NULL DEFAULT 0,
+  sent           INT UNSIGNED NOT NULL DEFAULT 0,
+  last_recipient INT UNSIGNED NOT NULL DEFAULT 0,
+  error          TEXT NULL,
+  created_at     DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  started_at     DATETIME NULL,
+  finished_at    DATETIME NULL,
+  PRIMARY KEY (job_id),
+  KEY idx_notification_jobs_sent_by (sent_by),
+  KEY idx_notification_jobs_status (status)
+) ENGINE=InnoDB;
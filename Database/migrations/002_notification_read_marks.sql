@@ -0,0 +1,31 @@
+-- =========================================================
+-- 002: read watermark for notifications
+-- (backend/app/services/read_marks.py)
+--
+-- A notification is read if notification_id <= the recipient's
+-- last_read_id OR its own is_read flag is set. After this migration
+-- is_read = 1 only matters for rows above the watermark.
+-- =========================================================
+USE school_mgmt;
+
+CREATE TABLE IF NOT EXISTS notification_read_marks (
+  user_id      INT UNSIGNED NOT NULL,
+  last_read_id BIGINT UNSIGNED NOT NULL DEFAULT 0,
+  last_read_at DATETIME NULL,
+  PRIMARY KEY (user_id)
+) ENGINE=InnoDB;
+
+-- Watermark = newest notification below the user's first unread one.
+-- Read rows above the first unread one keep their is_read flag as exceptions.
+INSERT IGNORE INTO notification_read_marks (user_id, last_read_id, last_read_at)
+SELECT n.sent_to, MAX(n.notification_id), MAX(n.date_sent)
+FROM notifications n
+LEFT JOIN (
+  SELECT sent_to, MIN(notification_id) AS first_unread
+  FROM notifications
+  WHERE is_read = 0
+  GROUP BY sent_to
+) f ON f.sent_to = n.sent_to
+WHERE n.is_read = 1
+  AND (f.first_unread IS NULL OR n.notification_id < f.first_unread)
+GROUP BY n.sent_to;
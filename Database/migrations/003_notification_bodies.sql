@@ -0,0 +1,61 @@
+-- =========================================================
+-- 003: store each broadcast once (notification_bodies) and keep
+-- only a lightweight receipt per recipient in notifications.
+-- The notification_feed view exposes the old column layout.
+-- =========================================================
+USE school_mgmt;
+
+CREATE TABLE IF NOT EXISTS notification_bodies (
+  body_id    BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+  sent_by    INT UNSIGNED NULL,
+  message    TEXT NOT NULL,
+  date_sent  DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  legacy_key CHAR(64) NULL,               -- migration only, dropped below
+  PRIMARY KEY (body_id),
+  KEY idx_notification_bodies_sender_date (sent_by, date_sent),
+  KEY idx_notification_bodies_legacy (legacy_key)
+) ENGINE=InnoDB;
+
+-- One body per distinct (sender, timestamp, text) among existing rows.
+-- Hash the full text: GROUP BY on TEXT only compares a prefix.
+INSERT INTO notification_bodies (sent_by, message, date_sent, legacy_key)
+SELECT ANY_VALUE(sent_by), ANY_VALUE(message), ANY_VALUE(date_sent), k
+FROM (
+  SELECT sent_by, message, date_sent,
+         SHA2(CONCAT_WS('|', COALESCE(sent_by, ''), date_sent, message), 256) AS k
+  FROM notifications
+) src
+GROUP BY k;
+
+ALTER TABLE notifications ADD COLUMN body_id BIGINT UNSIGNED NULL;
+
+UPDATE notifications n
+JOIN notification_bodies b
+  ON b.legacy_key = SHA2(CONCAT_WS('|', COALESCE(n.sent_by, ''), n.date_sent, n.message), 256)
+SET n.body_id = b.body_id;
+
+ALTER TABLE notification_bodies
+  DROP INDEX idx_notification_bodies_legacy,
+  DROP COLUMN legacy_key;
+
+-- If fk_notifications_sent_by was added (see LearnLoop_Schema.sql), drop it first:
+-- ALTER TABLE notifications DROP FOREIGN KEY fk_notifications_sent_by;
+ALTER TABLE notifications
+  MODIFY body_id BIGINT UNSIGNED NOT NULL,
+  DROP COLUMN message,
+  DROP COLUMN sent_by,
+  ADD KEY idx_notifications_user_date_cov (sent_to, date_sent, is_read, body_id),
+  ADD KEY idx_notifications_body (body_id, sent_to);
+
+-- The covering index also serves fk_notifications_user, so the old one can go
+ALTER TABLE notifications
+  DROP INDEX idx_notifications_user_date,
+  RENAME INDEX idx_notifications_user_date_cov TO idx_notifications_user_date;
+
+ALTER TABLE notification_jobs ADD COLUMN body_id BIGINT UNSIGNED NULL AFTER message;
+
+-- Old row shape for reports and ad-hoc queries
+CREATE OR REPLACE VIEW notification_feed AS
+SELECT n.notification_id, n.sent_to, b.message, n.date_sent, n.is_read, b.sent_by, n.body_id
+FROM notifications n
+JOIN notification_bodies b ON b.body_id = n.body_id;
@@ -0,0 +1,15 @@
+-- =========================================================
+-- 004: materialized weekly timetable per student.
+-- Filled lazily on first read and refreshed by timetable writes;
+-- to prebuild after this migration run:
+--   python -m backend.app.services.timetable_snapshots
+-- =========================================================
+USE school_mgmt;
+
+CREATE TABLE IF NOT EXISTS timetable_snapshots (
+  student_id INT UNSIGNED NOT NULL,
+  version    BIGINT UNSIGNED NOT NULL DEFAULT 1,
+  week       MEDIUMTEXT NOT NULL,
+  built_at   DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (student_id)
+) ENGINE=InnoDB;
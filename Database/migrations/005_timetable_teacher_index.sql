@@ -0,0 +1,7 @@
+-- =========================================================
+-- 005: index for teacher double-booking checks on timetable writes.
+-- =========================================================
+USE school_mgmt;
+
+ALTER TABLE timetables
+  ADD KEY idx_timetables_teacher_day_start (teacher_id, day_of_week, start_time);
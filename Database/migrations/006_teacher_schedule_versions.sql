@@ -0,0 +1,11 @@
+-- =========================================================
+-- 006: per-teacher schedule version, bumped by timetable writes.
+-- Keys the teacher schedule cache and its clients' caches.
+-- =========================================================
+USE school_mgmt;
+
+CREATE TABLE IF NOT EXISTS teacher_schedule_versions (
+  teacher_id INT UNSIGNED NOT NULL,
+  version    BIGINT UNSIGNED NOT NULL DEFAULT 1,
+  PRIMARY KEY (teacher_id)
+) ENGINE=InnoDB;
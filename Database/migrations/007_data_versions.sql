@@ -0,0 +1,12 @@
+-- =========================================================
+-- 007: per-collection change counters (users, teachers).
+-- Bumped in the same transaction as each write; conditional
+-- GETs on the list endpoints compare ETags against them.
+-- =========================================================
+USE school_mgmt;
+
+CREATE TABLE IF NOT EXISTS data_versions (
+  name    VARCHAR(64)     NOT NULL,
+  version BIGINT UNSIGNED NOT NULL DEFAULT 1,
+  PRIMARY KEY (name)
+) ENGINE=InnoDB;
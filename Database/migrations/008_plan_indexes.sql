@@ -0,0 +1,17 @@
+-- =========================================================
+-- 008: indexes for full scans and temporary tables found by
+-- backend/benchmarks/query_plans.py.
+--   students(grade)                 grade notification audience
+--   users(role)                     whole-school audience, /api/users?role=
+--   timetables(teacher_id, student_id)  students a teacher teaches
+-- =========================================================
+USE school_mgmt;
+
+ALTER TABLE students
+  ADD KEY idx_students_grade (grade);
+
+ALTER TABLE users
+  ADD KEY idx_users_role (role);
+
+ALTER TABLE timetables
+  ADD KEY idx_timetables_teacher_student (teacher_id, student_id);
@@ -0,0 +1,9 @@
+-- =========================================================
+-- 009: leases on notification_jobs, so each job runs in one
+-- process at a time (backend/app/services/jobs.py).
+-- =========================================================
+USE school_mgmt;
+
+ALTER TABLE notification_jobs
+  ADD COLUMN owner        VARCHAR(64) NULL AFTER last_recipient,
+  ADD COLUMN heartbeat_at DATETIME    NULL AFTER owner;
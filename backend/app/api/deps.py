@@ -1,42 +1,124 @@
+import logging
 from typing import Optional, List
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 # NOTE: we are inside app/api/, so use two dots to go up into app/
-from ..db.session import get_db
+from ..db.session import get_async_db, get_db
 from ..db.models.user import User
-from ..core.security import decode_access_token
+from ..core.security import JWT_TRUST_ROLE_CLAIMS, decode_access_claims
+from ..core.principal import Principal, principal_cache
+from ..core import logs
 
 bearer_scheme = HTTPBearer(auto_error=False)
 
-def get_current_user(
-    creds: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
-    db: Session = Depends(get_db),
-) -> User:
+def _claims(creds: Optional[HTTPAuthorizationCredentials]) -> tuple:
     if creds is None or not creds.credentials:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
     try:
-        user_id = int(decode_access_token(creds.credentials))
+        claims = decode_access_claims(creds.credentials)
+        user_id = int(claims["sub"])
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
+    return user_id, claims
 
-    user = db.query(User).filter(User.user_id == user_id).first()
-    if not user:
+def _known_principal(user_id: int, claims: dict) -> Optional[Principal]:
+    """The principal if it can be had without a query (trusted claims or cache)."""
+    if JWT_TRUST_ROLE_CLAIMS and claims.get("role"):
+        return Principal(
+            user_id=user_id,
+            email=claims.get("email", ""),
+            full_name=claims.get("name", ""),
+            role=claims["role"],
+        )
+    return principal_cache.get(user_id)
+
+def _principal_from_row(row) -> Principal:
+    if not row:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
+    principal = Principal(user_id=row.user_id, email=row.email, full_name=row.full_name, role=row.role)
+    principal_cache.put(principal)
+    return principal
 
-def require_roles(allowed_roles: List[str]):
-    def _dep(current_user: User = Depends(get_current_user)) -> User:
-        if current_user.role not in allowed_roles:
-            # 👇 Instead of blocking, just log
-            print(f"[WARN] User {current_user.user_id} with role '{current_user.role}' "
-                  f"tried to access but only {allowed_roles} are allowed")
-            # still return the user so request is not blocked
-            return current_user
-        print(f"[OK] User {current_user.user_id} with role '{current_user.role}' "
-              f"access granted for {allowed_roles}")
+def get_current_user(
+    creds: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    db: Session = Depends(get_db),
+) -> Principal:
+    user_id, claims = _claims(creds)
+    known = _known_principal(user_id, claims)
+    if known is not None:
+        return known
+
+    # The session only checks out a connection here, on a cache miss
+    row = (
+        db.query(User.user_id, User.email, User.full_name, User.role)
+        .filter(User.user_id == user_id)
+        .first()
+    )
+    return _principal_from_row(row)
+
+async def get_current_user_async(
+    creds: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    db: AsyncSession = Depends(get_async_db),
+) -> Principal:
+    """get_current_user for async routes; runs on the event loop, not the threadpool."""
+    user_id, claims = _claims(creds)
+    known = _known_principal(user_id, claims)
+    if known is not None:
+        return known
+
+    row = (await db.execute(
+        select(User.user_id, User.email, User.full_name, User.role).where(User.user_id == user_id)
+    )).first()
+    return _principal_from_row(row)
+
+# Grants happen on every request: sampled (LOG_SAMPLE) and a logger of their own
+auth_log = logs.get_logger("auth")
+granted_log = logs.get_logger("auth.granted")
+
+def _check_role(current_user: Principal, allowed_roles: List[str]) -> Principal:
+    if current_user.role not in allowed_roles:
+        # 👇 Instead of blocking, just log
+        auth_log.warning("role not allowed", extra={"fields": {
+            "user_id": current_user.user_id, "role": current_user.role, "allowed": allowed_roles,
+        }})
+        # still return the user so request is not blocked
         return current_user
+    if logs.enabled(granted_log, logging.INFO):
+        granted_log.info("access granted", extra={"sampled": True, "fields": {
+            "user_id": current_user.user_id, "role": current_user.role, "allowed": allowed_roles,
+        }})
+    return current_user
+
+def require_roles(allowed_roles: List[str]):
+    def _dep(current_user: Principal = Depends(get_current_user)) -> Principal:
+        return _check_role(current_user, allowed_roles)
     return _dep
 
+def require_roles_async(allowed_roles: List[str]):
+    async def _dep(current_user: Principal = Depends(get_current_user_async)) -> Principal:
+        return _check_role(current_user, allowed_roles)
+    return _dep
+
+def _enforce_role(current_user: Principal, allowed_roles: List[str]) -> Principal:
+    if current_user.role not in allowed_roles:
+        auth_log.warning("role denied", extra={"fields": {
+            "user_id": current_user.user_id, "role": current_user.role, "allowed": allowed_roles,
+        }})
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+    return _check_role(current_user, allowed_roles)
+
+def enforce_roles(allowed_roles: List[str]):
+    """Like require_roles, but other roles get a 403. For writes and operational endpoints."""
+    def _dep(current_user: Principal = Depends(get_current_user)) -> Principal:
+        return _enforce_role(current_user, allowed_roles)
+    return _dep
+
+def enforce_roles_async(allowed_roles: List[str]):
+    async def _dep(current_user: Principal = Depends(get_current_user_async)) -> Principal:
+        return _enforce_role(current_user, allowed_roles)
+    return _dep
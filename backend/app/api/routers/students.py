@@ -1,14 +1,46 @@
 # backend/app/api/routers/students.py
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Dict, Any
+import asyncio
+import json
+import os
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from typing import Optional, Tuple
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from ...api.deps import get_current_user, require_roles, get_db
+from ...api.deps import (
+    bearer_scheme, get_current_user, get_current_user_async, require_roles, require_roles_async, get_db,
+)
+from ...core import etag
+from ...core.responses import FastJSONResponse
+from ...core.security import decode_access_token
 from ...db.models.user import User
+from ...db import statements
+from ...db.replicas import read_intent
+from ...db.session import AsyncSessionLocal, get_async_read_db
+from ...services import read_marks, timetable_snapshots
+from ...services.broker import broker
 
 router = APIRouter(tags=["student"]) 
 
+# Comment line sent on idle streams so proxies don't time them out
+STREAM_HEARTBEAT_SEC = float(os.getenv("NOTIFY_STREAM_HEARTBEAT_SEC", "20"))
+
+_feed = statements.register("students.notifications", text("""
+    SELECT n.notification_id, b.message, n.date_sent,
+           CASE WHEN n.is_read = 1 OR n.notification_id <= :wm THEN 1 ELSE 0 END AS is_read,
+           u.full_name AS teacher_name
+    FROM notifications n
+    JOIN notification_bodies b ON b.body_id = n.body_id
+    JOIN users u ON u.user_id = b.sent_by
+    WHERE n.sent_to = :sid
+    ORDER BY n.date_sent DESC
+"""), sid=28, wm=0)
+
+_role = statements.register("students.stream_role", text("SELECT role FROM users WHERE user_id = :id"), id=28)
+
 
 @router.get("/schedule/me")
 def my_schedule(current: User = Depends(require_roles(["student", "admin"]))):
@@ -25,62 +57,33 @@ def my_schedule(current: User = Depends(require_roles(["student", "admin"]))):
 @router.get("/timetable/{student_id}")
 async def get_timetable(
     student_id: int,
-    db: Session = Depends(get_db),
-    current: User = Depends(require_roles(["student", "admin"]))
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
+    current: User = Depends(require_roles_async(["student", "admin"]))
 ):
     # Security check
     if current.role == "student" and student_id != current.user_id:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    sql = text("""
-        SELECT DISTINCT
-            tt.day_of_week AS day,
-            tt.start_time AS start,
-            tt.end_time AS end,
-            c.class_name AS subject,
-            u.full_name AS teacher
-        FROM timetables tt
-        JOIN class_students cs ON cs.student_id = tt.student_id
-        JOIN classes c ON tt.class_id = c.class_id
-        LEFT JOIN users u ON tt.teacher_id = u.user_id
-        WHERE cs.student_id = :student_id
-        ORDER BY FIELD(tt.day_of_week,
-                       'Monday','Tuesday','Wednesday','Thursday','Friday','Saturday','Sunday'),
-                 tt.start_time;
-    """)
-
-    result = db.execute(sql, {"student_id": student_id})
-    # ✅ Convert rows to dicts
-    rows = [dict(r) for r in result.mappings().all()]
-
-    if not rows:
+    # Revalidation only reads the snapshot's version, never the week itself
+    known = await timetable_snapshots.aversion_of(db, student_id)
+    if known is not None:
+        etag.conditional(request, "student-week", student_id, known)
+
+    # Pre-built per student; timetable writes refresh it
+    version, week = await timetable_snapshots.aget_snapshot(db, student_id)
+    if week == "[]":
         raise HTTPException(status_code=404, detail="No timetable found")
+    etag.stamp(request, "student-week", student_id, version)
 
-    return {"week": group_by_day(rows)}
-
-
-def group_by_day(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Group timetable rows by day of week."""
-    grouped = {}
-    for r in rows:
-        if r["day"] not in grouped:
-            grouped[r["day"]] = {"day": r["day"], "items": []}
-        grouped[r["day"]]["items"].append(
-            {
-                "subject": r["subject"],
-                "teacher": r["teacher"],
-                "start": str(r["start"]),
-                "end": str(r["end"]),
-            }
-        )
-    return list(grouped.values())
+    return Response(content='{"week":' + week + '}', media_type="application/json")
 
 # GET student notifications
 
 @router.get("/notifications")
-def get_student_notifications(
-    db: Session = Depends(get_db),
-    current: User = Depends(get_current_user),
+async def get_student_notifications(
+    db: AsyncSession = Depends(get_async_read_db),
+    current: User = Depends(get_current_user_async),
 ):
     # Only students can access
     if current.role != "student":
@@ -88,34 +91,80 @@ def get_student_notifications(
             status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden"
         )
 
-    rows = db.execute(
-        text("""
-            SELECT n.notification_id, n.message, n.date_sent, n.is_read,
-                   u.full_name AS teacher_name
-            FROM notifications n
-            JOIN users u ON u.user_id = n.sent_by
-            WHERE n.sent_to = :sid
-            ORDER BY n.date_sent DESC
-        """),
-        {"sid": current.user_id}
-    ).mappings().all()
+    mark = await read_marks.aget_mark(db, current.user_id)
+    rows = (await db.execute(
+        _feed, {"sid": current.user_id, "wm": mark.last_read_id if mark else 0}
+    )).mappings().all()
 
-    return {"notifications": list(rows)}
+    return FastJSONResponse({"notifications": rows})
 
 
 @router.get("/notifications/unread")
-def get_unread_count(
-    db: Session = Depends(get_db),
-    current: User = Depends(get_current_user),
+async def get_unread_count(
+    db: AsyncSession = Depends(get_async_read_db),
+    current: User = Depends(get_current_user_async),
 ):
     if current.role != "student":
         raise HTTPException(status_code=403, detail="Forbidden")
 
-    row = db.execute(
-        text("SELECT COUNT(*) FROM notifications WHERE sent_to = :sid AND is_read = 0"),
-        {"sid": current.user_id},
-    ).scalar_one()
-    return {"unread": int(row or 0)}
+    return {"unread": await read_marks.aunread_count(db, current.user_id)}
+
+
+async def _stream_bootstrap(user_id: int) -> Tuple[Optional[str], int]:
+    # Short-lived session: the stream itself must not pin a pooled connection
+    async with AsyncSessionLocal() as db:
+        read_intent(db.sync_session, None)
+        role = await db.scalar(_role, {"id": user_id})
+        return role, (await read_marks.aunread_count(db, user_id) if role == "student" else 0)
+
+
+@router.get("/notifications/stream")
+async def stream_unread(
+    token: Optional[str] = Query(default=None, description="Bearer token (EventSource cannot send headers)"),
+    creds: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+):
+    """
+    Server-sent events carrying the student's unread count.
+    First event is {"count": n}; later events are {"delta": k} for new
+    notifications or {"count": n} after the count was reset by mark-read.
+    """
+    raw = token or (creds.credentials if creds else None)
+    if not raw:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    try:
+        user_id = decode_access_token(raw)
+    except Exception:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    # Subscribe before counting so nothing committed in between is missed
+    sub = broker.subscribe(user_id)
+    try:
+        role, count = await _stream_bootstrap(user_id)
+    except Exception:
+        broker.unsubscribe(sub)
+        raise
+    if role != "student":
+        broker.unsubscribe(sub)
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+    async def events():
+        try:
+            yield f"event: unread\ndata: {json.dumps({'count': count})}\n\n"
+            while True:
+                try:
+                    await asyncio.wait_for(sub.wakeup.wait(), STREAM_HEARTBEAT_SEC)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: unread\ndata: {json.dumps(sub.take())}\n\n"
+        finally:
+            broker.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.post("/notifications/mark-read")
@@ -126,9 +175,23 @@ def mark_all_read(
     if current.role != "student":
         raise HTTPException(status_code=403, detail="Forbidden")
 
-    db.execute(
-        text("UPDATE notifications SET is_read = 1 WHERE sent_to = :sid"),
-        {"sid": current.user_id},
-    )
+    read_marks.mark_all_read(db, current.user_id)
+    db.commit()
+    broker.publish_reset(current.user_id)
+    return {"success": True}
+
+
+@router.post("/notifications/{notification_id}/read")
+def mark_one_read(
+    notification_id: int,
+    db: Session = Depends(get_db),
+    current: User = Depends(get_current_user),
+):
+    if current.role != "student":
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+    changed = read_marks.mark_one_read(db, current.user_id, notification_id)
     db.commit()
-    return {"success": True}
\ No newline at end of file
+    if changed:
+        broker.publish_delta([current.user_id], -1)
+    return {"success": True}
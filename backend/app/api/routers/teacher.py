@@ -1,21 +1,49 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, status, File, UploadFile
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status, File, UploadFile
+from fastapi.responses import JSONResponse
+from datetime import date, timedelta
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, text
+import logging
 import shutil
 import os
-from pydantic import BaseModel
-from ..deps import get_current_user
+from ..deps import get_current_user_async
 
-from ...db.session import get_db
+from ...db import statements
+from ...db.session import get_async_read_db, get_db, get_read_db
 from ...db.models.teacher import Teacher
 from ...db.models.user import User
 from ...schemas.teacher import TeacherCreate, TeacherOut, TeacherUpdate
-from ...core.security import hash_password
+from ...schemas.notification import NotificationCreate
+from ...db.models.notification_job import NotificationJob
+from ...services.notifications import (
+    audience_sql, count_audience, create_body, fan_out, push_to_connected,
+)
+from ...services import jobs
+from ...core import etag, logs
+from ...core.hashing import hasher
+from ...core.responses import FastJSONResponse
+from ...core.principal import principal_cache
+from ...services import data_versions, teacher_schedule, timetable_snapshots
 from ..deps import require_roles
 
 router = APIRouter(tags=["teacher"])
+log = logs.get_logger("teacher")
+
+_sent = statements.register("teacher.notifications", text("""
+    SELECT n.notification_id, n.sent_to, b.message, n.date_sent,
+           CASE WHEN n.is_read = 1 OR n.notification_id <= COALESCE(m.last_read_id, 0)
+                THEN 1 ELSE 0 END AS is_read,
+           u.full_name AS student_name
+    FROM notification_bodies b
+    JOIN notifications n ON n.body_id = b.body_id
+    JOIN users u ON u.user_id = n.sent_to
+    LEFT JOIN notification_read_marks m ON m.user_id = n.sent_to
+    WHERE b.sent_by = :tid
+    ORDER BY b.date_sent DESC, n.notification_id DESC
+    LIMIT 50
+"""), tid=3)
 
 # =====================
 # Helper functions
@@ -32,6 +60,25 @@ def _to_out(t: Teacher) -> TeacherOut:
         phone=t.phone,
     )
 
+# Columns of TeacherOut, for list queries that skip the ORM objects
+_LIST_COLUMNS = (
+    Teacher.teacher_id, Teacher.full_name, Teacher.email, Teacher.role, Teacher.subject,
+    Teacher.department, Teacher.employee_code, Teacher.phone,
+)
+
+def _row_out(r) -> dict:
+    """TeacherOut as a plain dict; rows were validated on the way in."""
+    return {
+        "id": r.teacher_id,
+        "full_name": r.full_name,
+        "email": r.email,
+        "role": r.role,
+        "subject": r.subject,
+        "department": r.department,
+        "employee_code": r.employee_code,
+        "phone": r.phone,
+    }
+
 # =====================
 # Teacher CRUD
 # =====================
@@ -43,12 +90,14 @@ def create_teacher(
 ):
     if db.query(User).filter(User.email == payload.email).first():
         raise HTTPException(status_code=409, detail="Email already in use")
+    # Outside the try: a busy hashing pool should surface as 503, not 500
+    password_hash = hasher.hash(payload.password)
     try:
         u = User(
             email=payload.email,
             full_name=payload.full_name,
             role="teacher",
-            password_hash=hash_password(payload.password),
+            password_hash=password_hash,
         )
         db.add(u)
         db.flush()
@@ -64,58 +113,51 @@ def create_teacher(
             phone=payload.phone,
         )
         db.add(t)
+        data_versions.bump(db, data_versions.USERS, data_versions.TEACHERS)
         db.commit()
         db.refresh(t)
         return _to_out(t)
-    except Exception as e:
+    except Exception:
         db.rollback()
-        print("Error creating teacher:", e)
+        log.exception("error creating teacher", extra={"fields": {"email": payload.email}})
         raise HTTPException(status_code=500, detail="Failed to create teacher")
 
 
 @router.get("/", response_model=List[TeacherOut])
 def list_teachers(
+    request: Request,
     q: Optional[str] = Query(default=None, description="Search by name/email"),
     subject: Optional[str] = None,
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=50, ge=1, le=200),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _admin=Depends(require_roles(["admin"])),
 ):
-    qry = db.query(Teacher)
+    version = data_versions.get(db, data_versions.TEACHERS)[data_versions.TEACHERS]
+    etag.conditional(request, "teachers", version, q, subject, skip, limit)
+    qry = db.query(*_LIST_COLUMNS)
     if q:
         like = f"%{q}%"
         qry = qry.filter(or_(Teacher.full_name.ilike(like), Teacher.email.ilike(like)))
     if subject:
         qry = qry.filter(Teacher.subject.ilike(f"%{subject}%"))
     rows = qry.order_by(Teacher.teacher_id.asc()).offset(skip).limit(limit).all()
-    return [_to_out(t) for t in rows]
+    return FastJSONResponse([_row_out(r) for r in rows])
 
 
 # -----------------------------
 # List notifications sent by this teacher
 # -----------------------------
 @router.get("/notifications")
-def list_notifications(
-    db: Session = Depends(get_db),
-    current: User = Depends(get_current_user),
+async def list_notifications(
+    db: AsyncSession = Depends(get_async_read_db),
+    current: User = Depends(get_current_user_async),
 ):
-    print(f"🔥 NOTIFICATIONS ENDPOINT HIT for user_id={current.user_id}, role={current.role}")
-
-    rows = db.execute(
-        text("""
-            SELECT n.notification_id, n.sent_to, n.message, n.date_sent, n.is_read, u.full_name AS student_name
-            FROM notifications n
-            JOIN users u ON u.user_id = n.sent_to
-            WHERE n.sent_by = :tid
-            ORDER BY n.date_sent DESC
-            LIMIT 50
-        """),
-        {"tid": current.user_id}
-    ).mappings().all()
+    rows = (await db.execute(_sent, {"tid": current.user_id})).mappings().all()
 
-    print(f"DEBUG: Found {len(rows)} notifications")
-    return {"notifications": list(rows)}
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug("listed notifications", extra={"fields": {"teacher_id": current.user_id, "count": len(rows)}})
+    return FastJSONResponse({"notifications": rows})
 
 
 @router.get("/{teacher_id}", response_model=TeacherOut)
@@ -147,6 +189,7 @@ def update_teacher(
     if payload.email and payload.email != t.email:
         if db.query(User).filter(User.email == payload.email).first():
             raise HTTPException(status_code=409, detail="Email already in use")
+    new_hash = hasher.hash(payload.password) if payload.password else None
     try:
         if payload.full_name is not None:
             t.full_name = payload.full_name
@@ -162,14 +205,19 @@ def update_teacher(
             t.employee_code = payload.employee_code
         if payload.phone is not None:
             t.phone = payload.phone
-        if payload.password:
-            u.password_hash = hash_password(payload.password)
+        if new_hash:
+            u.password_hash = new_hash
+        data_versions.bump(db, data_versions.USERS, data_versions.TEACHERS)
         db.commit()
         db.refresh(t)
+        principal_cache.invalidate(teacher_id)
+        if payload.full_name is not None:
+            # Snapshots embed the teacher's name
+            timetable_snapshots.rebuild(db, timetable_snapshots.students_taught_by(db, teacher_id))
         return _to_out(t)
-    except Exception as e:
+    except Exception:
         db.rollback()
-        print("Error updating teacher:", e)
+        log.exception("error updating teacher", extra={"fields": {"teacher_id": teacher_id}})
         raise HTTPException(status_code=500, detail="Failed to update teacher")
 
 
@@ -182,78 +230,151 @@ def delete_teacher(
     t = db.query(Teacher).filter(Teacher.teacher_id == teacher_id).first()
     if not t:
         raise HTTPException(status_code=404, detail="Teacher not found")
+    # The teacher's timetable rows go with the user (ON DELETE CASCADE)
+    affected = timetable_snapshots.students_taught_by(db, teacher_id)
     try:
         u = db.query(User).filter(User.user_id == t.teacher_id).first()
         if u:
             db.delete(u)
         db.delete(t)
+        data_versions.bump(db, data_versions.USERS, data_versions.TEACHERS)
         db.commit()
+        principal_cache.invalidate(teacher_id)
+        timetable_snapshots.rebuild(db, affected)
         return
-    except Exception as e:
+    except Exception:
         db.rollback()
-        print("Error deleting teacher:", e)
+        log.exception("error deleting teacher", extra={"fields": {"teacher_id": teacher_id}})
         raise HTTPException(status_code=500, detail="Failed to delete teacher")
 
 
 # =====================
 # Teacher Schedule
 # =====================
+def _section(lesson) -> str:
+    lo, hi = lesson["grade_min"], lesson["grade_max"]
+    grade = f"Grade {lo}" if lo == hi else f"Grades {lo}–{hi}"
+    return f"{grade} • {lesson['description']}" if lesson["description"] else grade
+
+
 @router.get("/schedule/me")
 def my_schedule(
+    request: Request,
     current: User = Depends(require_roles(["teacher", "admin"])),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    today_name = datetime.now().strftime("%A")
-    rows = db.execute(
-        text("""
-            SELECT 
-    c.class_name AS subject,
-    CONCAT('Grade ', s.grade, ' • ', c.description) AS section,
-    CONCAT(
-        DATE_FORMAT(t.start_time, '%H:%i'), 
-        ' – ', 
-        DATE_FORMAT(t.end_time, '%H:%i')
-    ) AS time
-FROM timetables t
-JOIN students s ON t.student_id = s.student_id
-JOIN classes c ON t.class_id = c.class_id
-WHERE t.teacher_id = :tid 
-  AND t.day_of_week = :day;
-
-        """),
-        {"tid": current.user_id, "day": today_name}
-    ).mappings().all()
-
+    """Today's lessons, one entry per lesson (not per enrolled student)."""
+    today = date.today()
+    current_versions = teacher_schedule.versions(db, [current.user_id])
+    etag.conditional(request, "teacher-today", current.user_id, current_versions[current.user_id],
+                     today.isoformat(), teacher_schedule.staleness_epoch())
+    _version, pattern = teacher_schedule.weekly_patterns(db, [current.user_id], current_versions)[current.user_id]
+    lessons = pattern.get(today.strftime("%A"), [])
     return {
         "teacher_id": current.user_id,
-        "day": today_name,
-        "schedule": list(rows),
+        "day": today.strftime("%A"),
+        "schedule": [
+            {
+                "subject": l["subject"],
+                "section": _section(l),
+                "time": f"{l['start'][:5]} – {l['end'][:5]}",
+                "start": l["start"],
+                "end": l["end"],
+            }
+            for l in lessons
+        ],
+    }
+
+
+@router.get("/schedule/range")
+def schedule_range(
+    request: Request,
+    start: Optional[date] = Query(default=None, description="Defaults to Monday of the current week"),
+    end: Optional[date] = Query(default=None, description="Inclusive; defaults to the Sunday after start"),
+    teacher_id: Optional[List[int]] = Query(default=None, description="Repeatable; admins only for others"),
+    current: User = Depends(require_roles(["teacher", "admin"])),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Dated lessons of one or more teachers for a week, a term or any range.
+    Each teacher carries a `version` that changes only when their timetable
+    does, so clients can cache a teacher's weeks against it.
+    """
+    if start is None:
+        start = teacher_schedule.week_of(date.today())[0]
+    if end is None:
+        end = start + timedelta(days=6)
+    if end < start:
+        raise HTTPException(status_code=422, detail="end must not be before start")
+    if (end - start).days >= teacher_schedule.MAX_RANGE_DAYS:
+        raise HTTPException(status_code=422, detail=f"Range is limited to {teacher_schedule.MAX_RANGE_DAYS} days")
+
+    ids = teacher_id or [current.user_id]
+    if current.role != "admin" and set(ids) != {current.user_id}:
+        raise HTTPException(status_code=403, detail="Teachers can only view their own schedule")
+
+    current_versions = teacher_schedule.versions(db, sorted(set(ids)))
+    etag.conditional(request, "teacher-range", sorted(current_versions.items()), start.isoformat(), end.isoformat(),
+                     teacher_schedule.staleness_epoch())
+    patterns = teacher_schedule.weekly_patterns(db, ids, current_versions)
+    return {
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "teachers": [
+            {"teacher_id": t, "version": version, "days": teacher_schedule.expand(pattern, start, end)}
+            for t, (version, pattern) in patterns.items()
+        ],
     }
 
 # =====================
 # Notifications
 # =====================
-class NotificationCreate(BaseModel):
-    content: str
-
 @router.post("/notifications/send")
 def send_notification(
     payload: NotificationCreate,
     current: User = Depends(require_roles(["teacher", "admin"])),
     db: Session = Depends(get_db),
 ):
-    student_ids = [u.user_id for u in db.query(User).filter(User.role=="student").all()]
-    if not student_ids:
+    target = payload.model_dump(include={"class_id", "grade", "student_ids"}, exclude_none=True)
+    audience = audience_sql(**target)
+    total = count_audience(db, audience)
+    if not total:
         raise HTTPException(status_code=404, detail="No students found")
-    for sid in student_ids:
-        db.execute(
-            text("""
-                INSERT INTO notifications (sent_to, message, sent_by)
-                VALUES (:sid, :msg, :tid)
-            """),
-            {"sid": sid, "msg": payload.content, "tid": current.user_id}
+
+    # Large audiences go to the background queue so this worker is freed immediately
+    if total > jobs.INLINE_MAX:
+        try:
+            job = jobs.runner.enqueue(
+                db, sender_id=current.user_id, message=payload.content, audience=target, total=total
+            )
+        except jobs.QueueFull:
+            raise HTTPException(status_code=503, detail="Notification queue is full, try again shortly")
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"ok": True, "job_id": job.job_id, "sent_to": total, "message": "Notification queued"},
         )
-    db.commit()
-    return {"ok": True, "sent_to": len(student_ids), "message": "Notification sent"}
+
+    try:
+        body_id = create_body(db, sender_id=current.user_id, message=payload.content)
+        sent = fan_out(db, body_id=body_id, audience=audience)
+        db.commit()
+    except Exception:
+        db.rollback()
+        log.exception("error sending notification", extra={"fields": {"sender_id": current.user_id, "total": total}})
+        raise HTTPException(status_code=500, detail="Failed to send notification")
+    push_to_connected(db, audience)
+    return {"ok": True, "sent_to": sent, "message": "Notification sent"}
+
+
+@router.get("/notifications/jobs/{job_id}")
+def notification_job_status(
+    job_id: int,
+    current: User = Depends(require_roles(["teacher", "admin"])),
+    db: Session = Depends(get_db),
+):
+    job = db.get(NotificationJob, job_id)
+    if not job or (current.role != "admin" and job.sent_by != current.user_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return jobs.job_status(job)
 
 
@@ -1,37 +1,296 @@
 # backend/app/api/routers/timetable.py
-from fastapi import APIRouter, Depends, HTTPException
+import time
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import Response
+from pydantic import ValidationError
+from sqlalchemy import bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
-from ...api.deps import get_current_user
+from ...api.deps import enforce_roles, get_current_user_async, get_db
+from ...core import etag
+from ...db.models.timetable import Timetable
 from ...db.models.user import User
+from ...db.session import get_async_read_db, get_read_db
+from ...schemas.timetable import AvailabilityQuery, Day, ScheduleRequest, TimetableBulk, TimetableCreate, TimetableOut, TimetableUpdate
+from ...services import availability, scheduler, timetable_snapshots, timetables
+from ...services.timetables import Entry
 
-router = APIRouter(prefix="/timetable", tags=["timetable"])
-
-# Simple in-memory demo data.
-# Replace this with DB queries later.
-DEMO_WEEKS = {
-    # student_id -> week structure
-    1: [
-        {
-            "day": "Monday",
-            "items": [
-                {"subject": "Mathematics", "teacher": "Mr. Tomson", "start": "08:00", "end": "09:00"},
-                {"subject": "English",     "teacher": "Mrs. Sarah", "start": "09:15", "end": "10:00"},
-            ],
-        },
-        {
-            "day": "Tuesday",
-            "items": [
-                {"subject": "Science", "teacher": "Dr. Khan", "start": "08:00", "end": "09:00"},
-                {"subject": "History", "teacher": "Ms. Lee",  "start": "09:15", "end": "10:00"},
-            ],
-        },
-    ]
-}
+router = APIRouter(tags=["timetable"])
 
+
+def _check_owner(current: User, teacher_id: int) -> None:
+    # Teachers may only schedule themselves; admins may schedule anyone
+    if current.role not in ("admin", "teacher"):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    if current.role == "teacher" and teacher_id != current.user_id:
+        raise HTTPException(status_code=403, detail="Teachers can only edit their own timetable")
+
+
+def _entry(data, *, index: Optional[int] = None) -> Entry:
+    return Entry(student_id=data.student_id, teacher_id=data.teacher_id, class_id=data.class_id,
+                 day=data.day_of_week, start=data.start_time, end=data.end_time, index=index)
+
+
+def _reject_if_conflicting(db: Session, new: List[Entry], **ignore) -> None:
+    errors = timetables.missing_references(db, new)
+    conflicts = timetables.check(db, new, **ignore)
+    if errors or conflicts:
+        raise HTTPException(status_code=409, detail=timetables.report(new, conflicts, errors))
+
+
+# =====================
+# Timetable CRUD
+# =====================
+@router.get("/", response_model=List[TimetableOut])
+def list_timetables(
+    teacher_id: Optional[int] = Query(default=None),
+    student_id: Optional[int] = Query(default=None),
+    day: Optional[Day] = Query(default=None),
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=200, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+    current: User = Depends(enforce_roles(["admin", "teacher"])),
+):
+    if current.role == "teacher":
+        teacher_id = current.user_id
+    q = db.query(Timetable)
+    if teacher_id is not None:
+        q = q.filter(Timetable.teacher_id == teacher_id)
+    if student_id is not None:
+        q = q.filter(Timetable.student_id == student_id)
+    if day is not None:
+        q = q.filter(Timetable.day_of_week == day)
+    return q.order_by(Timetable.timetable_id.asc()).offset(skip).limit(limit).all()
+
+
+@router.post("/", response_model=TimetableOut, status_code=status.HTTP_201_CREATED)
+def create_timetable(
+    payload: TimetableCreate,
+    db: Session = Depends(get_db),
+    current: User = Depends(enforce_roles(["admin", "teacher"])),
+):
+    _check_owner(current, payload.teacher_id)
+    _reject_if_conflicting(db, [_entry(payload)])
+
+    row = Timetable(**payload.model_dump())
+    db.add(row)
+    db.commit()
+    db.refresh(row)
+    timetable_snapshots.rebuild(db, [row.student_id])
+    timetable_snapshots.touch_teachers(db, [row.teacher_id])
+    return row
+
+
+@router.post("/bulk")
+def bulk_load_timetables(
+    payload: TimetableBulk,
+    db: Session = Depends(get_db),
+    current: User = Depends(enforce_roles(["admin", "teacher"])),
+):
+    """
+    Validate a whole batch (e.g. a term) at once and insert it in one
+    transaction. Any conflict rejects the batch with a 409 carrying the
+    report; `dry_run` returns the report without writing.
+    """
+    for item in payload.entries:
+        _check_owner(current, item.teacher_id)
+    new = [_entry(item, index=i) for i, item in enumerate(payload.entries)]
+    students = {e.student_id for e in new}
+
+    # A teacher's replace only removes their own lessons for these students
+    mine = current.user_id if current.role != "admin" else None
+
+    errors = timetables.missing_references(db, new)
+    conflicts = timetables.check(db, new, ignore_students=students if payload.replace else (), ignore_teacher=mine)
+    result = timetables.report(new, conflicts, errors)
+    if not result["ok"]:
+        raise HTTPException(status_code=409, detail=result)
+    if payload.dry_run:
+        return result
+
+    teachers = {e.teacher_id for e in new}
+    try:
+        replaced = 0
+        if payload.replace:
+            ids = sorted(students)
+            own = " AND teacher_id = :me" if mine is not None else ""
+            owners = text(f"SELECT DISTINCT teacher_id FROM timetables WHERE student_id IN :ids{own}").bindparams(bindparam("ids", expanding=True))
+            delete = text(f"DELETE FROM timetables WHERE student_id IN :ids{own}").bindparams(bindparam("ids", expanding=True))
+            params = {"me": mine} if mine is not None else {}
+            for i in range(0, len(ids), timetables.ID_CHUNK):
+                chunk = ids[i:i + timetables.ID_CHUNK]
+                teachers.update(t for (t,) in db.execute(owners, {**params, "ids": chunk}))
+                replaced += db.execute(delete, {**params, "ids": chunk}).rowcount
+        db.execute(
+            text("""
+                INSERT INTO timetables (student_id, teacher_id, class_id, day_of_week, start_time, end_time)
+                VALUES (:student_id, :teacher_id, :class_id, :day_of_week, :start_time, :end_time)
+            """),
+            [item.model_dump(mode="json") for item in payload.entries],
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise HTTPException(status_code=500, detail="Failed to load timetables")
+
+    timetable_snapshots.rebuild(db, students)
+    timetable_snapshots.touch_teachers(db, teachers)
+    return {**result, "inserted": len(new), "replaced": replaced}
+
+
+@router.patch("/{timetable_id}", response_model=TimetableOut)
+def update_timetable(
+    timetable_id: int,
+    payload: TimetableUpdate,
+    db: Session = Depends(get_db),
+    current: User = Depends(enforce_roles(["admin", "teacher"])),
+):
+    row = db.get(Timetable, timetable_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Timetable entry not found")
+    _check_owner(current, row.teacher_id)
+
+    # The patch alone can be valid and still clash with the stored row (start after end)
+    try:
+        merged = TimetableCreate.model_validate({
+            **{c: getattr(row, c) for c in TimetableCreate.model_fields},
+            **payload.model_dump(exclude_unset=True, exclude_none=True),
+        })
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_context=False, include_input=False))
+    _check_owner(current, merged.teacher_id)
+    _reject_if_conflicting(db, [_entry(merged)], ignore_ids=[timetable_id])
+
+    before = (row.student_id, row.teacher_id)
+    for field, value in merged.model_dump().items():
+        setattr(row, field, value)
+    db.commit()
+    db.refresh(row)
+    timetable_snapshots.rebuild(db, {before[0], row.student_id})
+    timetable_snapshots.touch_teachers(db, {before[1], row.teacher_id})
+    return row
+
+
+@router.delete("/{timetable_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_timetable(
+    timetable_id: int,
+    db: Session = Depends(get_db),
+    current: User = Depends(enforce_roles(["admin", "teacher"])),
+):
+    row = db.get(Timetable, timetable_id)
+    if not row:
+        raise HTTPException(status_code=404, detail="Timetable entry not found")
+    _check_owner(current, row.teacher_id)
+    student_id, teacher_id = row.student_id, row.teacher_id
+    db.delete(row)
+    db.commit()
+    timetable_snapshots.rebuild(db, [student_id])
+    timetable_snapshots.touch_teachers(db, [teacher_id])
+    return
+
+
+# =====================
+# Timetable generation
+# =====================
+@router.post("/generate")
+def generate_timetable(
+    payload: ScheduleRequest,
+    db: Session = Depends(get_db),
+    _admin=Depends(enforce_roles(["admin"])),
+):
+    """
+    Build a conflict-free week for `classes` from class membership and the
+    given teachers. Every other class keeps its current sessions unless
+    `replace_all` is set, which regenerates the whole timetable from
+    `classes` alone. Nothing is written if any session cannot be placed.
+    """
+    class_ids = [c.class_id for c in payload.classes]
+    teacher_ids = sorted({c.teacher_id for c in payload.classes})
+    known_classes = {c for (c,) in db.execute(
+        text("SELECT class_id FROM classes WHERE class_id IN :ids").bindparams(bindparam("ids", expanding=True)),
+        {"ids": class_ids},
+    )}
+    known_teachers = {t for (t,) in db.execute(
+        text("SELECT user_id FROM users WHERE role = 'teacher' AND user_id IN :ids").bindparams(bindparam("ids", expanding=True)),
+        {"ids": teacher_ids},
+    )}
+    errors = [{"type": "unknown_class", "class_id": c} for c in class_ids if c not in known_classes]
+    errors += [{"type": "unknown_teacher", "teacher_id": t} for t in teacher_ids if t not in known_teachers]
+    if errors:
+        raise HTTPException(status_code=422, detail={"ok": False, "errors": errors})
+
+    members = scheduler.load_students(db, class_ids)
+    loads = [scheduler.ClassLoad(c.class_id, c.teacher_id, c.sessions_per_week, members[c.class_id])
+             for c in payload.classes]
+    periods = (
+        [scheduler.Period(p.day_of_week, timetables.to_minutes(p.start_time), timetables.to_minutes(p.end_time))
+         for p in payload.periods]
+        if payload.periods else scheduler.default_periods()
+    )
+    options = {}
+    if payload.max_periods_per_day is not None:
+        options["max_periods_per_day"] = payload.max_periods_per_day
+    if payload.time_budget_ms is not None:
+        options["time_budget_ms"] = payload.time_budget_ms
+    pinned = [] if payload.replace_all else scheduler.load_pinned(db, exclude_class_ids=class_ids)
+
+    schedule = scheduler.solve(periods, loads, pinned=pinned, **options)
+    result = scheduler.summary(schedule)
+    if not schedule.ok:
+        raise HTTPException(status_code=409, detail=result)
+    if payload.dry_run:
+        return result
+
+    written, students, teachers = scheduler.write(db, schedule, loads, replace_all=payload.replace_all)
+    timetable_snapshots.rebuild(db, students)
+    timetable_snapshots.touch_teachers(db, teachers)
+    return {**result, "rows_written": written}
+
+
+# =====================
+# Common free slots
+# =====================
+@router.post("/availability")
+def find_free_slots(
+    payload: AvailabilityQuery,
+    db: Session = Depends(get_db),
+    _staff=Depends(enforce_roles(["admin", "teacher"])),
+):
+    """Slots of at least `duration_minutes` when every listed person is free."""
+    started = time.perf_counter()
+    students = set(payload.student_ids)
+    if payload.class_ids:
+        for members in scheduler.load_students(db, payload.class_ids).values():
+            students |= members
+    maps = availability.busy_maps(db, teacher_ids=payload.teacher_ids, student_ids=students)
+    window = availability.window_mask(
+        payload.days, timetables.to_minutes(payload.earliest), timetables.to_minutes(payload.latest)
+    )
+    slots = availability.free_slots(
+        [*maps["teachers"].values(), *maps["students"].values()],
+        window,
+        duration=payload.duration_minutes,
+        limit=payload.limit,
+    )
+    return {
+        "participants": len(maps["teachers"]) + len(maps["students"]),
+        "slot_minutes": availability.SLOT_MINUTES,
+        "slots": slots,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+
+
+# =====================
+# Student week view
+# =====================
 @router.get("/{student_id}")
-def get_timetable(
+async def get_timetable(
     student_id: int,
-    current: User = Depends(get_current_user),
+    request: Request,
+    db: AsyncSession = Depends(get_async_read_db),
+    current: User = Depends(get_current_user_async),
 ):
     """
     Auth rule:
@@ -41,5 +300,14 @@ def get_timetable(
     if current.role != "admin" and not (current.role == "student" and current.user_id == student_id):
         raise HTTPException(status_code=403, detail="Forbidden")
 
-    week = DEMO_WEEKS.get(student_id, [])
-    return {"student_id": student_id, "week": week}
+    known = await timetable_snapshots.aversion_of(db, student_id)
+    if known is not None:
+        etag.conditional(request, "timetable-week", student_id, known)
+
+    # The week is stored as ready-made JSON; splice it in rather than re-encoding
+    version, week = await timetable_snapshots.aget_snapshot(db, student_id)
+    etag.stamp(request, "timetable-week", student_id, version)
+    return Response(
+        content=f'{{"student_id":{student_id},"version":{version},"week":{week}}}',
+        media_type="application/json",
+    )
@@ -1,13 +1,18 @@
 # backend/app/api/routers/user.py
 from typing import List, Optional, Literal
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, File, HTTPException, Query, Request, UploadFile, status
 from sqlalchemy.orm import Session
 
-from ...db.session import get_db
+from ...db.session import get_db, get_read_db
 from ...db.models.user import User
 from ...schemas.user import UserOut, UserCreate, UserUpdate
-from ...core.security import hash_password
-from ..deps import require_roles
+from ...core import etag
+from ...core.hashing import hasher
+from ...core.responses import FastJSONResponse
+from ...core.principal import principal_cache
+from ...services import data_versions, timetable_snapshots
+from ...services.bulk_import import detect_format, run_import
+from ..deps import enforce_roles, require_roles
 
 router = APIRouter()
 Role = Literal["admin", "teacher", "student"]
@@ -17,17 +22,23 @@ def _to_out(u: User) -> UserOut:
 
 @router.get("/", response_model=List[UserOut])
 def list_users(
+    request: Request,
     role: Optional[Role] = Query(default=None),
     skip: int = Query(default=0, ge=0),
     limit: int = Query(default=200, ge=1, le=500),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     _admin = Depends(require_roles(["admin"]))
 ):
-    q = db.query(User)
+    version = data_versions.get(db, data_versions.USERS)[data_versions.USERS]
+    etag.conditional(request, "users", version, role, skip, limit)
+    q = db.query(User.user_id, User.email, User.full_name, User.role)
     if role:
         q = q.filter(User.role == role)
     rows = q.order_by(User.user_id.asc()).offset(skip).limit(limit).all()
-    return [_to_out(u) for u in rows]
+    # Same shape as UserOut; rows were validated on the way in
+    return FastJSONResponse([
+        {"id": r.user_id, "email": r.email, "name": r.full_name, "role": r.role} for r in rows
+    ])
 
 @router.post("/", response_model=UserOut, status_code=status.HTTP_201_CREATED)
 def create_user(payload: UserCreate, db: Session = Depends(get_db), _admin = Depends(require_roles(["admin"]))):
@@ -37,11 +48,25 @@ def create_user(payload: UserCreate, db: Session = Depends(get_db), _admin = Dep
         email=payload.email,
         full_name=payload.full_name,
         role=payload.role,
-        password_hash=hash_password(payload.password),
+        password_hash=hasher.hash(payload.password),
     )
-    db.add(u); db.commit(); db.refresh(u)
+    db.add(u)
+    data_versions.bump(db, data_versions.USERS)
+    db.commit(); db.refresh(u)
     return _to_out(u)
 
+@router.post("/import")
+def bulk_import(
+    kind: Literal["user", "teacher", "student"] = Query(..., description="Schema each row is validated against"),
+    format: Optional[Literal["csv", "jsonl"]] = Query(default=None, description="Defaults from the file extension"),
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    _admin = Depends(enforce_roles(["admin"])),
+):
+    """Stream a CSV/JSONL file of people; returns counts and a per-row error report."""
+    report = run_import(db, file.file, kind=kind, fmt=format or detect_format(file.filename or ""))
+    return report.as_dict()
+
 @router.patch("/{user_id}", response_model=UserOut)
 def update_user(user_id: int, payload: UserUpdate, db: Session = Depends(get_db), _admin = Depends(require_roles(["admin"]))):
     u = db.query(User).filter(User.user_id == user_id).first()
@@ -53,8 +78,12 @@ def update_user(user_id: int, payload: UserUpdate, db: Session = Depends(get_db)
         u.email = payload.email
     if payload.full_name is not None: u.full_name = payload.full_name
     if payload.role is not None:      u.role = payload.role
-    if payload.password:              u.password_hash = hash_password(payload.password)
+    if payload.password:              u.password_hash = hasher.hash(payload.password)
+    data_versions.bump(db, data_versions.USERS, data_versions.TEACHERS)
     db.commit(); db.refresh(u)
+    principal_cache.invalidate(user_id)
+    if payload.full_name is not None:
+        timetable_snapshots.rebuild(db, timetable_snapshots.students_taught_by(db, user_id))
     return _to_out(u)
 
 @router.delete("/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -62,5 +91,11 @@ def delete_user(user_id: int, db: Session = Depends(get_db), _admin = Depends(re
     u = db.query(User).filter(User.user_id == user_id).first()
     if not u:
         raise HTTPException(status_code=404, detail="User not found")
-    db.delete(u); db.commit()
+    affected = timetable_snapshots.students_taught_by(db, user_id)
+    timetable_snapshots.drop(db, [user_id])
+    db.delete(u)
+    data_versions.bump(db, data_versions.USERS, data_versions.TEACHERS)
+    db.commit()
+    principal_cache.invalidate(user_id)
+    timetable_snapshots.rebuild(db, affected)
     return
@@ -0,0 +1,99 @@
+"""
+Negotiated response compression (brotli or gzip).
+
+Only whole responses are compressed: a body sent in one piece, at least
+COMPRESS_MIN_BYTES long, with a text-like content type. Streams (SSE,
+file downloads) pass through untouched, since compressing them would
+buffer events. Brotli is used when the client accepts it and the optional
+`brotli` package is installed; gzip otherwise.
+
+    COMPRESS_MIN_BYTES=1024  COMPRESS_GZIP_LEVEL=5  COMPRESS_BROTLI_QUALITY=4
+"""
+import gzip
+import os
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:   # optional dependency
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+# Low levels: most of the size win for a fraction of the CPU of the maximum
+COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "5"))
+COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", "4"))
+
+COMPRESSIBLE = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Best supported coding the client accepts (q > 0), preferring br."""
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding:
+            accepted[coding] = q
+    star = accepted.get("*", 0.0)
+    for coding in (("br", "gzip") if brotli is not None else ("gzip",)):
+        if accepted.get(coding, star) > 0:
+            return coding
+    return None
+
+
+def compress(body: bytes, coding: str) -> bytes:
+    if coding == "br":
+        return brotli.compress(body, quality=COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESS_GZIP_LEVEL, mtime=0)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        coding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if coding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message       # held until the first body chunk shows the size
+                return
+            if start is None:
+                await send(message)
+                return
+            head, start = start, None
+            headers = MutableHeaders(scope=head)
+            body = message.get("body", b"")
+            compressible = (
+                "content-encoding" not in headers
+                and headers.get("content-type", "").startswith(COMPRESSIBLE)
+            )
+            if compressible:
+                headers.add_vary_header("Accept-Encoding")
+            if compressible and not message.get("more_body") and len(body) >= self.minimum_size:
+                body = compress(body, coding)
+                headers["content-encoding"] = coding
+                headers["content-length"] = str(len(body))
+                message = {**message, "body": body}
+            await send(head)
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
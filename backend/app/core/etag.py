@@ -0,0 +1,147 @@
+"""
+Conditional GETs (ETag / If-None-Match).
+
+Endpoints whose data carries a version call `conditional(request, ...)` with
+whatever identifies the representation: route, ids, version, query params.
+It runs before the endpoint loads anything. If the client's If-None-Match
+already holds that tag, NotModified short-circuits to an empty 304, so the
+list or snapshot is never read. Otherwise the tag is left on request.state
+and ConditionalGetMiddleware stamps it, with Cache-Control, on the 200.
+
+Tags are weak (W/"..."): they name the data, not the bytes, so they stay
+valid whatever content encoding the response goes out with.
+
+The middleware also counts, per route, what the 304s saved: response bytes
+(the route's average 200 size) and SQL statements (the route's average on a
+200 minus what the 304 itself ran). Served at /debug/etag.
+"""
+import hashlib
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+from starlette.datastructures import MutableHeaders
+
+from . import sqlstats
+
+# "no-cache" lets the browser keep a copy but revalidate it on every use
+ETAG_CACHE_CONTROL = os.getenv("ETAG_CACHE_CONTROL", "private, no-cache")
+
+
+class NotModified(Exception):
+    def __init__(self, etag: str, cache_control: str):
+        self.etag = etag
+        self.cache_control = cache_control
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=10).hexdigest()
+    return f'W/"{digest}"'
+
+
+def matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison, as If-None-Match requires."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(t.strip().removeprefix("W/") == opaque for t in if_none_match.split(","))
+
+
+def stamp(request: Request, *parts: Any, cache_control: str = ETAG_CACHE_CONTROL) -> str:
+    """Attach the ETag to the response without checking If-None-Match."""
+    etag = make_etag(*parts)
+    request.state.etag = etag
+    request.state.cache_control = cache_control
+    return etag
+
+
+def conditional(request: Request, *parts: Any, cache_control: str = ETAG_CACHE_CONTROL) -> str:
+    """Raise NotModified if the client already has this version; else tag the response."""
+    etag = stamp(request, *parts, cache_control=cache_control)
+    if matches(request.headers.get("if-none-match"), etag):
+        raise NotModified(etag, cache_control)
+    return etag
+
+
+class ConditionalStats:
+    def __init__(self):
+        self._routes: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, status: int, size: int, queries: int) -> None:
+        with self._lock:
+            s = self._routes.setdefault(route, {
+                "full": 0, "not_modified": 0, "bytes_full": 0, "bytes_not_modified": 0,
+                "queries_full": 0, "queries_not_modified": 0,
+            })
+            kind = "not_modified" if status == 304 else "full"
+            s[kind] += 1
+            s["bytes_" + kind] += size
+            s["queries_" + kind] += queries
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            routes = {r: dict(s) for r, s in self._routes.items()}
+        for s in routes.values():
+            full = s["full"] or 1
+            s["bytes_saved"] = max(0, round(s["not_modified"] * s["bytes_full"] / full) - s["bytes_not_modified"])
+            s["queries_saved"] = max(0, round(s["not_modified"] * s["queries_full"] / full) - s["queries_not_modified"])
+        return routes
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+stats = ConditionalStats()
+
+
+class ConditionalGetMiddleware:
+    """Adds ETag/Cache-Control to tagged 200s and records 304 savings."""
+
+    def __init__(self, app, stats: ConditionalStats = stats):
+        self.app = app
+        self.stats = stats
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        status, size = 0, 0
+
+        async def send_tagged(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                state = scope.get("state") or {}
+                if status == 200 and "etag" in state:
+                    headers = MutableHeaders(scope=message)
+                    headers.setdefault("etag", state["etag"])
+                    headers["cache-control"] = state.get("cache_control", ETAG_CACHE_CONTROL)
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        token = sqlstats.start()
+        try:
+            await self.app(scope, receive, send_tagged)
+        finally:
+            queries = sqlstats.count()
+            sqlstats.stop(token)
+        if "etag" in (scope.get("state") or {}) and status in (200, 304):
+            route = scope.get("route")
+            self.stats.record(getattr(route, "path", scope["path"]), status, size, queries)
+
+
+async def not_modified_handler(request: Request, exc: NotModified) -> Response:
+    return Response(status_code=304, headers={"ETag": exc.etag, "Cache-Control": exc.cache_control})
+
+
+def install(app: FastAPI) -> None:
+    app.add_middleware(ConditionalGetMiddleware)
+    app.add_exception_handler(NotModified, not_modified_handler)
@@ -0,0 +1,150 @@
+"""
+bcrypt hashing/verification on a dedicated process pool.
+
+bcrypt is pure CPU for 100-300 ms per call; run inline it pins a Starlette
+threadpool worker (and the GIL) for that long. Here the work runs in
+HASH_WORKERS separate processes, so throughput scales with cores, and at
+most HASH_MAX_PENDING calls may be queued or running before callers get
+HashingBusy instead of piling up.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .security import hash_password, pwd_context, verify_password
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(os.cpu_count() or 1)))
+HASH_MAX_PENDING = int(os.getenv("HASH_MAX_PENDING", str(max(8, HASH_WORKERS * 8))))
+
+
+class HashingBusy(Exception):
+    pass
+
+
+# ---------- run inside the worker processes ----------
+def _hash_job(plain: str) -> str:
+    return hash_password(plain)
+
+
+def _verify_job(plain: str, hashed: str) -> Tuple[bool, bool]:
+    ok = verify_password(plain, hashed)
+    return ok, (ok and pwd_context.needs_update(hashed))
+
+
+class HashingService:
+    def __init__(self, workers: int = HASH_WORKERS, max_pending: int = HASH_MAX_PENDING):
+        # workers <= 0 runs inline in the calling thread (scripts, benchmarks)
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._busy_ns = 0
+        self._max_seen = 0
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process that already runs threads is unsafe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def _submit(self, fn: Callable, *args) -> Future:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise HashingBusy("Password hashing queue is full")
+            self._pending += 1
+            self._max_seen = max(self._max_seen, self._pending)
+        started = time.perf_counter_ns()
+        try:
+            if self.workers <= 0:
+                fut: Future = Future()
+                try:
+                    fut.set_result(fn(*args))
+                except Exception as e:
+                    fut.set_exception(e)
+            else:
+                fut = self._executor().submit(fn, *args)
+        except Exception:
+            self._done(started)
+            raise
+        fut.add_done_callback(lambda _f: self._done(started))
+        return fut
+
+    def _done(self, started: int) -> None:
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+            self._busy_ns += time.perf_counter_ns() - started
+
+    # ---------- sync API (blocks the calling thread, not the CPU) ----------
+    def hash(self, plain: str) -> str:
+        return self._submit(_hash_job, plain).result()
+
+    def verify(self, plain: str, hashed: str) -> Tuple[bool, bool]:
+        """Return (matches, needs_rehash)."""
+        return self._submit(_verify_job, plain, hashed).result()
+
+    def hash_many(self, plains: List[str]) -> List[str]:
+        """
+        Hash a batch in parallel for bulk jobs. Keeps at most one task per
+        worker in flight and waits (rather than failing) when the queue is
+        full, so interactive logins still find room in the pool.
+        """
+        results: List[Optional[str]] = [None] * len(plains)
+        window: Dict[Future, int] = {}
+        i = 0
+        while i < len(plains) or window:
+            while i < len(plains) and len(window) < max(self.workers, 1):
+                try:
+                    window[self._submit(_hash_job, plains[i])] = i
+                except HashingBusy:
+                    if not window:
+                        time.sleep(0.05)
+                        continue
+                    break
+                i += 1
+            if window:
+                done, _ = wait(list(window), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    results[window.pop(fut)] = fut.result()
+        return results  # type: ignore[return-value]
+
+    # ---------- async API (event loop stays free) ----------
+    async def ahash(self, plain: str) -> str:
+        return await asyncio.wrap_future(self._submit(_hash_job, plain))
+
+    async def averify(self, plain: str, hashed: str) -> Tuple[bool, bool]:
+        return await asyncio.wrap_future(self._submit(_verify_job, plain, hashed))
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            pending, completed = self._pending, self._completed
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": pending,
+                "queue_depth": max(0, pending - max(self.workers, 1)),
+                "max_pending_seen": self._max_seen,
+                "completed": completed,
+                "rejected": self._rejected,
+                "avg_ms": round(self._busy_ns / completed / 1e6, 2) if completed else None,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+hasher = HashingService()
@@ -0,0 +1,266 @@
+"""
+Structured, non-blocking logging.
+
+Code logs through the standard library under the "learnloop" namespace:
+
+    log = logs.get_logger("teacher")
+    log.warning("teacher update failed", extra={"fields": {"teacher_id": 7}})
+
+The request thread only puts the record on a bounded queue. A listener
+thread formats it as one JSON line ({ts, level, logger, msg, request_id,
+...fields}) and writes it to stderr. When the queue is full, records are
+dropped and counted; the request never waits on the log. Every record
+carries the id of the request that logged it. The id comes from an
+incoming X-Request-ID header or is generated, and is echoed on the response.
+
+    LOG_LEVEL=INFO              level of the "learnloop" logger
+    LOG_FORMAT=json             json | text
+    LOG_QUEUE_SIZE=10000        records buffered before dropping
+    LOG_SAMPLE=learnloop.auth.granted=0.01
+                                keep this fraction of a logger's records below
+                                WARNING; comma-separated logger=rate pairs
+
+Levels and sample rates can be changed at runtime at PUT /debug/log-level.
+
+Hot paths guard their logging with `logs.enabled(logger, level)`. A
+disabled level then costs one cached isEnabledFor check, and a sampled-out
+record is skipped before it is built. See benchmarks/logging_overhead.py.
+"""
+import itertools
+import json
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+ROOT = "learnloop"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLE = os.getenv("LOG_SAMPLE", f"{ROOT}.auth.granted=0.01")
+
+REQUEST_ID_HEADER = "x-request-id"
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+def get_logger(name: str) -> logging.Logger:
+    return logging.getLogger(f"{ROOT}.{name}")
+
+
+class Counters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.dropped = 0
+        self.retired_sampled_out = 0    # from samplers since replaced
+
+    def add(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    @property
+    def sampled_out(self) -> int:
+        return self.retired_sampled_out + sum(f.sampled_out for f in list(_samplers.values()))
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {"enqueued": self.enqueued, "dropped": self.dropped, "sampled_out": self.sampled_out}
+
+
+counters = Counters()
+
+
+class SampleFilter(logging.Filter):
+    """Keeps 1 in every `every` records below WARNING; deterministic, so tests and rates are exact."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self.seen = 0
+        self._next = itertools.count(1)    # next() is atomic under the GIL; no lock on the hot path
+
+    def tick(self) -> bool:
+        n = self.seen = next(self._next)
+        return bool(self.every) and (n - 1) % self.every == 0
+
+    @property
+    def sampled_out(self) -> int:
+        kept = (self.seen + self.every - 1) // self.every if self.every else 0
+        return self.seen - kept
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or getattr(record, "sampled", False):
+            return True
+        return self.tick()
+
+
+def enabled(logger: logging.Logger, level: int) -> bool:
+    """
+    For hot paths: whether to log at all, with sampling decided before the
+    record is built (building one costs microseconds). Pass
+    extra={"sampled": True} when logging after a True.
+    """
+    if not logger.isEnabledFor(level):
+        return False
+    sampler = _samplers.get(logger.name)
+    return sampler is None or level >= logging.WARNING or sampler.tick()
+
+
+class _RequestQueueHandler(QueueHandler):
+    """Stamps the request id in the caller's context and never blocks on a full queue."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.request_id = request_id.get()
+        # The listener formats; keep args out of the queue so they cannot change meanwhile
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+            counters.add("enqueued")
+        except queue.Full:
+            counters.add("dropped")
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out: Dict[str, Any] = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        rid = getattr(record, "request_id", None)
+        if rid:
+            out["request_id"] = rid
+        fields = getattr(record, "fields", None)
+        if fields:
+            for k, v in fields.items():
+                out.setdefault(k, v)
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s%(fields_text)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        record.request_id = getattr(record, "request_id", None) or "-"
+        fields = getattr(record, "fields", None)
+        record.fields_text = "".join(f" {k}={v}" for k, v in fields.items()) if fields else ""
+        return super().format(record)
+
+
+_listener: Optional[QueueListener] = None
+_samplers: Dict[str, SampleFilter] = {}
+
+
+def parse_samples(spec: str) -> Dict[str, float]:
+    rates = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, rate = part.partition("=")
+        rates[name.strip()] = float(rate)
+    return rates
+
+
+def set_sample_rate(name: str, rate: float) -> None:
+    logger = logging.getLogger(name)
+    if name in _samplers:
+        old = _samplers.pop(name)
+        logger.removeFilter(old)
+        counters.retired_sampled_out += old.sampled_out
+    if rate < 1:
+        _samplers[name] = SampleFilter(rate)
+        logger.addFilter(_samplers[name])
+
+
+def set_level(name: str, level: str) -> None:
+    logging.getLogger(name).setLevel(level.upper())
+
+
+def levels() -> Dict[str, Any]:
+    out = {ROOT: logging.getLevelName(logging.getLogger(ROOT).getEffectiveLevel())}
+    for name, logger in sorted(logging.root.manager.loggerDict.items()):
+        if name.startswith(ROOT + ".") and isinstance(logger, logging.Logger) and logger.level:
+            out[name] = logging.getLevelName(logger.level)
+    return {
+        "levels": out,
+        "samples": {name: f.rate for name, f in _samplers.items()},
+        "queue_depth": _listener.queue.qsize() if _listener else 0,
+        **counters.snapshot(),
+    }
+
+
+def setup(stream=None) -> None:
+    """Route the "learnloop" loggers through the queue; idempotent."""
+    global _listener
+    if _listener is not None:
+        return
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(TextFormatter() if LOG_FORMAT == "text" else JsonFormatter())
+    q: "queue.Queue[logging.LogRecord]" = queue.Queue(LOG_QUEUE_SIZE)
+    root = logging.getLogger(ROOT)
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(_RequestQueueHandler(q))
+    root.propagate = False
+    for name, rate in parse_samples(LOG_SAMPLE).items():
+        set_sample_rate(name, rate)
+    _listener = QueueListener(q, handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown() -> None:
+    """Flush what is queued and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+        logging.getLogger(ROOT).handlers.clear()
+
+
+class RequestIdMiddleware:
+    """Binds a request id to the context for the request's duration and returns it as X-Request-ID."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+        rid = None
+        for key, value in scope["headers"]:
+            if key == b"x-request-id":
+                candidate = value.decode("latin-1")
+                rid = candidate if _VALID_REQUEST_ID.match(candidate) else None
+                break
+        rid = rid or uuid.uuid4().hex[:16]
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-request-id", rid.encode())]
+            await send(message)
+
+        token = request_id.set(rid)
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            request_id.reset(token)
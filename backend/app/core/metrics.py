@@ -0,0 +1,207 @@
+"""
+Request and database metrics in the Prometheus text format, served at /metrics.
+
+Per route template (e.g. "/api/student/timetable/{student_id}", never the
+raw path, which would make a series per student) and status:
+
+    http_request_duration_seconds        histogram of wall time
+    db_queries_per_request               histogram of SQL statements
+    db_time_per_request_seconds          histogram of time spent in them
+
+Plus totals of slow queries (core/sqlstats.py) and each connection pool's
+state and checkout wait (db/pool.py).
+
+Cost per request: two clock reads, a ContextVar set/reset and three bisects
+under a lock; per statement, two clock reads. METRICS_ENABLED=0 turns the
+middleware into a pass-through. Set METRICS_TOKEN to require
+"Authorization: Bearer <token>" on /metrics.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from . import sqlstats
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+DB_TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List[float]] = {}   # labels -> per-bucket counts + [sum]
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        i = bisect_left(self.buckets, value)    # buckets are upper bounds, inclusive
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[i] += 1
+            series[-1] += value
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            series = [(k, list(v)) for k, v in sorted(self._series.items())]
+        for labels, counts in series:
+            running = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                running += n
+                le = f'le="{_fmt(bound)}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {running}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {_fmt(round(counts[-1], 6))}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {running}"
+
+
+_ROUTE_LABELS = ("method", "route", "status")
+
+request_duration = Histogram(
+    "http_request_duration_seconds", "Time from request start to the end of the response body.",
+    _ROUTE_LABELS, LATENCY_BUCKETS,
+)
+request_queries = Histogram(
+    "db_queries_per_request", "SQL statements executed while handling a request.",
+    _ROUTE_LABELS, QUERY_BUCKETS,
+)
+request_db_time = Histogram(
+    "db_time_per_request_seconds", "Time spent executing SQL statements while handling a request.",
+    _ROUTE_LABELS, DB_TIME_BUCKETS,
+)
+histograms = [request_duration, request_queries, request_db_time]
+
+# Functions returning extra exposition lines (pool state, ...), added with register()
+_collectors: List[Callable[[], Iterable[str]]] = []
+
+
+def register(collector: Callable[[], Iterable[str]]) -> None:
+    _collectors.append(collector)
+
+
+def _slow_query_lines() -> Iterable[str]:
+    yield "# HELP db_slow_queries_total Statements slower than SLOW_QUERY_MS."
+    yield "# TYPE db_slow_queries_total counter"
+    yield f"db_slow_queries_total {sqlstats.slow_queries.total}"
+
+
+def pool_collector(pools: Callable[[], Iterable[Tuple[str, object, object]]]) -> Callable[[], Iterable[str]]:
+    """Exposition lines for (name, PoolStats, pool) triples; `pools` is called on every scrape."""
+
+    def collect() -> Iterable[str]:
+        snapshots = [(name, stats.snapshot(pool)) for name, stats, pool in pools()]
+        gauges = (
+            ("db_pool_checked_out", "gauge", "checked_out", "Connections in use."),
+            ("db_pool_idle", "gauge", "idle", "Connections open and idle in the pool."),
+            ("db_pool_waiting", "gauge", "waiting", "Callers waiting for a connection."),
+            ("db_pool_timeouts_total", "counter", "timeouts", "Checkouts that gave up after DB_POOL_TIMEOUT."),
+            ("db_pool_connects_total", "counter", "connects", "New database connections opened."),
+        )
+        for metric, kind, key, help in gauges:
+            yield f"# HELP {metric} {help}"
+            yield f"# TYPE {metric} {kind}"
+            for name, snap in snapshots:
+                yield f'{metric}{{pool="{_escape(name)}"}} {snap[key]}'
+        yield "# HELP db_pool_checkout_seconds Time to get a connection from the pool, including waits."
+        yield "# TYPE db_pool_checkout_seconds histogram"
+        for name, snap in snapshots:
+            hist = snap["checkout_ms"]
+            for b in hist["buckets"]:
+                le = "+Inf" if b["le_ms"] == "+Inf" else _fmt(b["le_ms"] / 1000)
+                yield f'db_pool_checkout_seconds_bucket{{pool="{_escape(name)}",le="{le}"}} {b["count"]}'
+            yield f'db_pool_checkout_seconds_sum{{pool="{_escape(name)}"}} {_fmt(round(hist["mean"] * snap["checkouts"] / 1000, 6))}'
+            yield f'db_pool_checkout_seconds_count{{pool="{_escape(name)}"}} {snap["checkouts"]}'
+
+    return collect
+
+
+def render() -> str:
+    lines: List[str] = []
+    for h in histograms:
+        lines.extend(h.render())
+    lines.extend(_slow_query_lines())
+    for collect in _collectors:
+        lines.extend(collect())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """Times every HTTP request and counts its SQL; outermost, so it sees the whole response."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        t0 = time.perf_counter()
+        token = sqlstats.start(scope)
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            elapsed = time.perf_counter() - t0
+            usage = sqlstats.current()
+            sqlstats.stop(token)
+            route = scope.get("route")
+            # Unmatched paths share one series, so scanners cannot grow the label set
+            labels = (scope["method"], getattr(route, "path", "<unmatched>"), str(status))
+            request_duration.observe(labels, elapsed)
+            request_queries.observe(labels, usage.queries)
+            request_db_time.observe(labels, usage.seconds)
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(render(), media_type=CONTENT_TYPE)
+
+
+def install(app: FastAPI) -> None:
+    app.add_middleware(MetricsMiddleware)
+    app.add_api_route("/metrics", metrics_endpoint, methods=["GET"], include_in_schema=False)
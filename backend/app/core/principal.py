@@ -0,0 +1,71 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+PRINCIPAL_CACHE_TTL_SEC = float(os.getenv("PRINCIPAL_CACHE_TTL_SEC", "30"))
+PRINCIPAL_CACHE_MAX = int(os.getenv("PRINCIPAL_CACHE_MAX", "10000"))
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Immutable snapshot of the authenticated user; safe to share across requests."""
+    user_id: int
+    email: str
+    full_name: str
+    role: str
+
+
+class PrincipalCache:
+    """
+    Bounded LRU of Principal snapshots with a per-entry TTL.
+    Invalidation is per process; the TTL bounds staleness on other workers.
+    """
+
+    def __init__(self, ttl: float = PRINCIPAL_CACHE_TTL_SEC, maxsize: int = PRINCIPAL_CACHE_MAX):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[int, tuple[float, Principal]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        if self.ttl <= 0:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(user_id)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._data[user_id]
+                self.misses += 1
+                return None
+            self._data.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, p: Principal) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._data[p.user_id] = (time.monotonic() + self.ttl, p)
+            self._data.move_to_end(p.user_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._data.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+principal_cache = PrincipalCache()
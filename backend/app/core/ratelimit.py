@@ -0,0 +1,154 @@
+"""
+Token-bucket rate limiting and admission control for /api/auth/login.
+
+Buckets live in a pluggable backend:
+  - MemoryBackend: per process (default)
+  - SQLiteBackend: a local file shared by every worker on the host, so
+    limits hold across `uvicorn --workers N`
+
+Limits are "<requests>/<seconds>" strings, e.g. LOGIN_RATE_PER_IP=20/60.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+from fastapi import HTTPException, Request
+
+LOGIN_RATE_PER_IP = os.getenv("LOGIN_RATE_PER_IP", "20/60")
+LOGIN_RATE_PER_EMAIL = os.getenv("LOGIN_RATE_PER_EMAIL", "5/60")
+# Password verifications allowed in flight at once across all clients
+LOGIN_MAX_CONCURRENT_VERIFY = int(os.getenv("LOGIN_MAX_CONCURRENT_VERIFY", str(max(2, (os.cpu_count() or 1) * 2))))
+# "memory" or "sqlite:///path/to/ratelimit.db"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+# Only honour X-Forwarded-For behind a trusted reverse proxy
+TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "false").lower() in ("1", "true", "yes")
+
+
+def parse_rate(spec: str) -> Tuple[float, float]:
+    """'20/60' -> (capacity 20, refill 20/60 tokens per second)."""
+    count, _, seconds = spec.partition("/")
+    capacity = float(count)
+    return capacity, capacity / float(seconds or 1)
+
+
+class MemoryBackend:
+    blocking = False
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> float:
+        """Consume `cost` tokens; return 0 if allowed, else seconds until allowed."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - ts) * rate)
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                wait = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                wait = (cost - tokens) / rate
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class SQLiteBackend:
+    """Buckets in a local SQLite file; each take() is one short write transaction."""
+    blocking = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, ts REAL NOT NULL)"
+            )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def take(self, key: str, capacity: float, rate: float, cost: float = 1.0) -> float:
+        # Wall clock: monotonic clocks are not comparable across processes
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, ts FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens, ts = row if row else (capacity, now)
+            tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+            wait = 0.0 if tokens >= cost else (cost - tokens) / rate
+            if not wait:
+                tokens -= cost
+            conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, ts) VALUES (?, ?, ?)", (key, tokens, now))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+
+def make_backend(spec: str = RATE_LIMIT_BACKEND):
+    if spec.startswith("sqlite:///"):
+        return SQLiteBackend(spec[len("sqlite:///"):])
+    return MemoryBackend()
+
+
+def too_many(retry_after: float) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Too many login attempts, please retry later",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def client_address(request: Request) -> str:
+    if TRUST_FORWARDED_FOR:
+        fwd = request.headers.get("x-forwarded-for")
+        if fwd:
+            return fwd.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+class LoginLimiter:
+    def __init__(self, backend=None):
+        self.backend = backend or make_backend()
+        self.ip_rate = parse_rate(LOGIN_RATE_PER_IP)
+        self.email_rate = parse_rate(LOGIN_RATE_PER_EMAIL)
+        self._verify_slots = threading.BoundedSemaphore(LOGIN_MAX_CONCURRENT_VERIFY)
+        self.rejected = 0
+
+    def check(self, address: str, email: str) -> None:
+        """Raise 429 if either the client's or the account's bucket is empty."""
+        wait = max(
+            self.backend.take(f"ip:{address}", *self.ip_rate),
+            self.backend.take(f"email:{email.strip().lower()}", *self.email_rate),
+        )
+        if wait:
+            self.rejected += 1
+            raise too_many(wait)
+
+    def acquire_verify_slot(self) -> None:
+        """Global cap on concurrent bcrypt work; fail fast instead of queueing."""
+        if not self._verify_slots.acquire(blocking=False):
+            self.rejected += 1
+            raise too_many(1)
+
+    def release_verify_slot(self) -> None:
+        self._verify_slots.release()
+
+
+login_limiter = LoginLimiter()
@@ -0,0 +1,54 @@
+"""
+Fast JSON responses for read-heavy list endpoints.
+
+The default path validates every row into a Pydantic model, then FastAPI
+validates and serializes it again through `response_model`, then
+`json.dumps` runs once more. Rows read back from our own tables were
+validated when they were written, so list endpoints build plain dicts and
+return a FastJSONResponse: one encoder pass and nothing else. They keep
+`response_model` for the OpenAPI schema; FastAPI skips it when a Response
+is returned.
+
+orjson is used when installed (optional; `pip install orjson`), otherwise
+the stdlib C encoder with a `default` hook for dates and decimals.
+"""
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:   # optional dependency
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        # MySQL TIME columns come back as timedelta
+        return value.total_seconds()
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if hasattr(value, "keys"):
+        return dict(value)     # RowMapping
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=_default).encode
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return _encode(content).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
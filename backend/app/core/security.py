@@ -1,11 +1,22 @@
 from passlib.context import CryptContext
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional
 from jose import jwt, JWTError
+import hashlib
 import os
+import threading
+import time
 
 JWT_SECRET = os.getenv("JWT_SECRET", "devsecret")
 JWT_ALG = os.getenv("JWT_ALG", "HS256")
 JWT_EXPIRE_MIN = int(os.getenv("JWT_EXPIRE_MIN", "120"))
+# When on, get_current_user builds the principal from the token's signed
+# role/email/name claims and never hits the DB. Role changes and deletions
+# then only take effect when the token expires.
+JWT_TRUST_ROLE_CLAIMS = os.getenv("JWT_TRUST_ROLE_CLAIMS", "false").lower() in ("1", "true", "yes")
+# Verified tokens kept in memory; 0 disables the cache
+JWT_CACHE_MAX = int(os.getenv("JWT_CACHE_MAX", "10000"))
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -16,18 +27,93 @@ def verify_password(plain: str, hashed: str) -> bool:
     return pwd_context.verify(plain[:72], hashed)
 
 
-def create_access_token(*, sub: str, expires_minutes: int = JWT_EXPIRE_MIN) -> str:
+def create_access_token(
+    *, sub: str, expires_minutes: int = JWT_EXPIRE_MIN, claims: Optional[Dict[str, Any]] = None
+) -> str:
     now = datetime.now(timezone.utc)
     exp = now + timedelta(minutes=expires_minutes)
-    payload = {"sub": sub, "iat": int(now.timestamp()), "exp": int(exp.timestamp())}
+    payload = {**(claims or {}), "sub": sub, "iat": int(now.timestamp()), "exp": int(exp.timestamp())}
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALG)
 
-def decode_access_token(token: str) -> int:
+class VerifiedTokenCache:
+    """
+    LRU of already-verified tokens, keyed by SHA-256 of the token so raw
+    bearer strings are never held as keys. Each entry lives until the
+    token's own `exp`. An optional revocation hook is consulted on every
+    lookup, hit or miss.
+    """
+
+    def __init__(self, maxsize: int = JWT_CACHE_MAX):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.revocation_hook: Optional[Callable[[Dict[str, Any]], bool]] = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, key: bytes) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            claims = self._data.get(key)
+            if claims is None:
+                self.misses += 1
+                return None
+            if claims.get("exp", 0) <= time.time():
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return claims
+
+    def put(self, key: bytes, claims: Dict[str, Any]) -> None:
+        if self.maxsize <= 0 or "exp" not in claims:
+            return
+        with self._lock:
+            self._data[key] = claims
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def revoke(self, token: str) -> None:
+        with self._lock:
+            self._data.pop(self.digest(token), None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+token_cache = VerifiedTokenCache()
+
+def set_revocation_hook(hook: Optional[Callable[[Dict[str, Any]], bool]]) -> None:
+    """Install hook(claims) -> True if the token must be rejected."""
+    token_cache.revocation_hook = hook
+
+def decode_access_claims(token: str) -> Dict[str, Any]:
+    """Verify the token and return its payload; `sub` is guaranteed present."""
+    key = token_cache.digest(token) if token_cache.maxsize > 0 else None
+    claims = token_cache.get(key) if key is not None else None
+    if claims is None:
+        claims = _verify(token)
+        if key is not None:
+            token_cache.put(key, claims)
+    hook = token_cache.revocation_hook
+    if hook is not None and hook(claims):
+        raise ValueError("Token revoked")
+    return claims
+
+def _verify(token: str) -> Dict[str, Any]:
     try:
         payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALG])
-        sub = payload.get("sub")
-        if not sub:
-            raise ValueError("Missing sub")
-        return int(sub)
     except JWTError as e:
         raise ValueError(f"Invalid token: {e}") from e
+    if not payload.get("sub"):
+        raise ValueError("Missing sub")
+    return payload
+
+def decode_access_token(token: str) -> int:
+    return int(decode_access_claims(token)["sub"])
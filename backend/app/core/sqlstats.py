@@ -0,0 +1,112 @@
+"""
+Per-request SQL statement counts and database time, and slow-query capture.
+
+`install(engine)` hooks before/after_cursor_execute. Each statement adds
+one to the usage of whichever request is running, plus the time the
+statement took. The usage lives in a ContextVar. Sync endpoints and
+dependencies run in a threadpool that copies the context, so their
+statements land on the request that started them.
+
+Usages nest: a middleware can start its own inside another's, and a
+statement counts towards both.
+
+Statements slower than SLOW_QUERY_MS are kept, with their text but not
+their parameters, in a ring of the last SLOW_QUERY_LOG_SIZE. Served at
+/debug/slow-queries.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar, Token
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "100"))
+SLOW_QUERY_MAX_CHARS = 2000
+
+
+class Usage:
+    __slots__ = ("queries", "seconds", "parent", "scope")
+
+    def __init__(self, parent: Optional["Usage"], scope: Optional[dict]):
+        self.queries = 0
+        self.seconds = 0.0
+        self.parent = parent
+        self.scope = scope if scope is not None else (parent.scope if parent else None)
+
+
+_usage: ContextVar[Optional[Usage]] = ContextVar("sql_usage", default=None)
+
+
+class SlowQueryLog:
+    def __init__(self, maxlen: int = SLOW_QUERY_LOG_SIZE):
+        self._entries: Deque[Dict[str, Any]] = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def add(self, statement: str, seconds: float, route: Optional[str]) -> None:
+        with self._lock:
+            self.total += 1
+            self._entries.append({
+                "at": time.time(),
+                "ms": round(seconds * 1000, 2),
+                "route": route,
+                "statement": " ".join(statement.split())[:SLOW_QUERY_MAX_CHARS],
+            })
+
+    def entries(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total = 0
+
+
+slow_queries = SlowQueryLog()
+
+
+def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+    # On the execution context, so a statement that fails leaves nothing behind
+    context._sqlstats_t0 = time.perf_counter()
+
+
+def _after(conn, cursor, statement, parameters, context, executemany) -> None:
+    elapsed = time.perf_counter() - context._sqlstats_t0
+    usage = _usage.get()
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        route = getattr((usage.scope or {}).get("route"), "path", None) if usage else None
+        slow_queries.add(statement, elapsed, route)
+    while usage is not None:
+        usage.queries += 1
+        usage.seconds += elapsed
+        usage = usage.parent
+
+
+def install(engine: Engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", _before):
+        event.listen(engine, "before_cursor_execute", _before)
+        event.listen(engine, "after_cursor_execute", _after)
+
+
+def start(scope: Optional[dict] = None) -> Token:
+    """Begin counting for the current request; `scope` names its route in the slow-query log."""
+    return _usage.set(Usage(_usage.get(), scope))
+
+
+def current() -> Optional[Usage]:
+    return _usage.get()
+
+
+def count() -> int:
+    usage = _usage.get()
+    return usage.queries if usage is not None else 0
+
+
+def stop(token: Token) -> None:
+    _usage.reset(token)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Text, UniqueConstraint
+from ...db.base import Base
+
+
+class SchoolClass(Base):
+    __tablename__ = "classes"
+
+    class_id    = Column(Integer, primary_key=True, index=True)
+    class_name  = Column(String(100), nullable=False, unique=True)
+    description = Column(Text, nullable=True)
+
+
+class ClassStudent(Base):
+    __tablename__ = "class_students"
+    __table_args__ = (
+        UniqueConstraint("student_id", "class_id", name="uk_class_student"),
+    )
+
+    id         = Column(Integer, primary_key=True)
+    # student_id is the student's users.user_id (same convention as teachers)
+    student_id = Column(Integer, nullable=False)
+    class_id   = Column(Integer, nullable=False, index=True)
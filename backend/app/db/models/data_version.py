@@ -0,0 +1,10 @@
+from sqlalchemy import Column, BigInteger, String
+from ...db.base import Base
+
+
+class DataVersion(Base):
+    """Change counter per named collection ("users", "teachers"); writes bump it."""
+    __tablename__ = "data_versions"
+
+    name    = Column(String(64), primary_key=True)
+    version = Column(BigInteger, nullable=False, default=1)
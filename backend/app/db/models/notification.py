@@ -0,0 +1,42 @@
+from sqlalchemy import Column, Integer, BigInteger, Text, DateTime, Boolean, Index, text
+from ...db.base import Base
+
+
+class NotificationBody(Base):
+    """One row per broadcast; recipients get a receipt in `notifications`."""
+    __tablename__ = "notification_bodies"
+    __table_args__ = (
+        Index("idx_notification_bodies_sender_date", "sent_by", "date_sent"),
+    )
+
+    # BIGINT in MySQL; SQLite only auto-increments an INTEGER primary key
+    body_id   = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    sent_by   = Column(Integer, nullable=True)
+    message   = Column(Text, nullable=False)
+    date_sent = Column(DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+
+
+class Notification(Base):
+    """Per-recipient receipt of a NotificationBody."""
+    __tablename__ = "notifications"
+    __table_args__ = (
+        # Covers the student list and unread count without touching the table rows
+        Index("idx_notifications_user_date", "sent_to", "date_sent", "is_read", "body_id"),
+        Index("idx_notifications_body", "body_id", "sent_to"),
+    )
+
+    notification_id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    sent_to   = Column(Integer, nullable=False)
+    body_id   = Column(BigInteger, nullable=False)
+    date_sent = Column(DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+    is_read   = Column(Boolean, nullable=False, server_default=text("0"))
+
+
+class NotificationReadMark(Base):
+    """Per-user read watermark: every notification with id <= last_read_id is read."""
+    __tablename__ = "notification_read_marks"
+
+    user_id      = Column(Integer, primary_key=True, autoincrement=False)
+    last_read_id = Column(BigInteger, nullable=False, default=0)
+    # date_sent of the watermark row; lets unread counts range-scan idx_notifications_user_date
+    last_read_at = Column(DateTime, nullable=True)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, text
+from ...db.base import Base
+
+
+class NotificationJob(Base):
+    __tablename__ = "notification_jobs"
+
+    job_id         = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    sent_by        = Column(Integer, nullable=False, index=True)
+    message        = Column(Text, nullable=False)
+    body_id        = Column(BigInteger, nullable=True)  # notification_bodies row the receipts point at
+    audience       = Column(Text, nullable=False)    # JSON: {"class_id"|"grade"|"student_ids": ...} or {}
+    status         = Column(String(20), nullable=False, default="queued")  # queued, running, done, failed
+    total          = Column(Integer, nullable=False, default=0)
+    sent           = Column(Integer, nullable=False, default=0)
+    last_recipient = Column(Integer, nullable=False, default=0)  # keyset cursor; resume point after a restart
+    owner          = Column(String(64), nullable=True)    # process holding the lease while running
+    heartbeat_at   = Column(DateTime, nullable=True)      # lease renewal; stale leases are reclaimed
+    error          = Column(Text, nullable=True)
+    created_at     = Column(DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+    started_at     = Column(DateTime, nullable=True)
+    finished_at    = Column(DateTime, nullable=True)
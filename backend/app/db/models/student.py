@@ -1,8 +1,12 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index
 from ...db.base import Base
 
 class Student(Base):
     __tablename__ = "students"
+    __table_args__ = (
+        # Grade notification audience; the primary key rides along, so it covers the query
+        Index("idx_students_grade", "grade"),
+    )
 
     student_id = Column(Integer, primary_key=True, index=True)
     full_name  = Column(String(100), nullable=False)
@@ -0,0 +1,44 @@
+from sqlalchemy import Column, Integer, BigInteger, Text, DateTime, Time, Enum, Index, CheckConstraint, text
+from ...db.base import Base
+
+DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+
+
+class Timetable(Base):
+    """One scheduled lesson for one student (the schema stores a row per student)."""
+    __tablename__ = "timetables"
+    __table_args__ = (
+        Index("idx_timetables_student_day_start", "student_id", "day_of_week", "start_time"),
+        # Teacher double-booking checks load a teacher's rows per day
+        Index("idx_timetables_teacher_day_start", "teacher_id", "day_of_week", "start_time"),
+        # Distinct students of a teacher, read from the index alone
+        Index("idx_timetables_teacher_student", "teacher_id", "student_id"),
+        CheckConstraint("start_time < end_time", name="chk_time_order"),
+    )
+
+    timetable_id = Column(Integer, primary_key=True, autoincrement=True)
+    student_id   = Column(Integer, nullable=False)
+    teacher_id   = Column(Integer, nullable=False)
+    class_id     = Column(Integer, nullable=False)
+    day_of_week  = Column(Enum(*DAYS, name="day_of_week"), nullable=False)
+    start_time   = Column(Time, nullable=False)
+    end_time     = Column(Time, nullable=False)
+
+
+class TimetableSnapshot(Base):
+    """Materialized weekly timetable of one student, rebuilt on timetable writes."""
+    __tablename__ = "timetable_snapshots"
+
+    student_id = Column(Integer, primary_key=True, autoincrement=False)
+    # Bumped on every rebuild; clients can use it to tell whether their copy is current
+    version    = Column(BigInteger, nullable=False, default=1)
+    week       = Column(Text, nullable=False)    # JSON: [{"day", "items": [{subject, teacher, start, end}]}]
+    built_at   = Column(DateTime, nullable=False, server_default=text("CURRENT_TIMESTAMP"))
+
+
+class TeacherScheduleVersion(Base):
+    """Bumped whenever a teacher's timetable rows change; keys schedule caches."""
+    __tablename__ = "teacher_schedule_versions"
+
+    teacher_id = Column(Integer, primary_key=True, autoincrement=False)
+    version    = Column(BigInteger, nullable=False, default=1)
@@ -1,9 +1,13 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Integer, String, Index
 from ...db.base import Base
 
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Whole-school notification audience and /api/users?role=
+        Index("idx_users_role", "role"),
+    )
 
     user_id = Column(Integer, primary_key=True, index=True)
     email = Column(String(120), unique=True, index=True, nullable=False)
@@ -0,0 +1,196 @@
+"""
+Connection pool configuration and statistics.
+
+Sizing comes from the environment and applies to the sync and async engines
+alike (each gets its own pool of that size):
+
+    DB_POOL_SIZE=5          connections kept open
+    DB_MAX_OVERFLOW=10      extra connections opened under load, closed on return
+    DB_POOL_TIMEOUT=30      seconds a checkout waits before failing
+    DB_POOL_RECYCLE=1800    seconds before a connection is replaced (-1: never);
+                            keep it below MySQL's wait_timeout
+    DB_POOL_PRE_PING=idle   always | idle | never
+    DB_PING_IDLE_SEC=30     with "idle": ping only connections idle this long
+
+"always" pings on every checkout, which adds a round trip to every request.
+"idle" pings only connections that sat in the pool long enough to have
+been dropped by the server or a proxy, and recycles any that fail.
+
+Each pool records how long checkouts take, including the wait when every
+connection is busy, how many callers are waiting, timeouts, and pings.
+Served at /debug/pool.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "idle").lower()
+DB_PING_IDLE_SEC = float(os.getenv("DB_PING_IDLE_SEC", "30"))
+
+if DB_POOL_PRE_PING not in ("always", "idle", "never"):
+    raise RuntimeError(f"DB_POOL_PRE_PING must be always, idle or never (got {DB_POOL_PRE_PING!r})")
+
+# Upper bounds of the checkout latency buckets, in milliseconds
+CHECKOUT_BUCKETS_MS = (0.1, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolStats:
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.buckets: List[int] = [0] * (len(CHECKOUT_BUCKETS_MS) + 1)   # last one is +Inf
+            self.checkouts = 0
+            self.wait_sum = 0.0
+            self.wait_max = 0.0
+            self.waiting = 0
+            self.waiting_max = 0
+            self.timeouts = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.pings = 0
+            self.ping_failures = 0
+
+    def begin_wait(self) -> None:
+        with self._lock:
+            self.waiting += 1
+            self.waiting_max = max(self.waiting_max, self.waiting)
+
+    def end_wait(self, seconds: float, outcome: str = "ok") -> None:
+        """outcome: "ok", "timeout" (pool exhausted) or "error" (connect failed)."""
+        ms = seconds * 1000
+        with self._lock:
+            self.waiting -= 1
+            if outcome != "ok":
+                if outcome == "timeout":
+                    self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_sum += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            for i, bound in enumerate(CHECKOUT_BUCKETS_MS):
+                if ms <= bound:
+                    self.buckets[i] += 1
+                    break
+            else:
+                self.buckets[-1] += 1
+
+    def count(self, field: str) -> None:
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def snapshot(self, pool: Any) -> Dict[str, Any]:
+        with self._lock:
+            cumulative, running = [], 0
+            for bound, n in zip(CHECKOUT_BUCKETS_MS + ("+Inf",), self.buckets):
+                running += n
+                cumulative.append({"le_ms": bound, "count": running})
+            return {
+                "pool": pool.__class__.__name__,
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                # Negative while fewer than `size` connections have been opened
+                "overflow": pool.overflow(),
+                "max_overflow": getattr(pool, "_max_overflow", 0),
+                "waiting": self.waiting,
+                "waiting_max": self.waiting_max,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "pings": self.pings,
+                "ping_failures": self.ping_failures,
+                "checkout_ms": {
+                    "mean": round(self.wait_sum * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                    "max": round(self.wait_max * 1000, 3),
+                    "buckets": cumulative,
+                },
+            }
+
+
+class _TimedCheckout:
+    """Times _do_get: the queue wait plus, when the pool grows, the connect."""
+    stats: PoolStats
+
+    def _do_get(self):
+        self.stats.begin_wait()
+        t0 = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.end_wait(time.perf_counter() - t0, "timeout")
+            raise
+        except BaseException:
+            self.stats.end_wait(time.perf_counter() - t0, "error")
+            raise
+        self.stats.end_wait(time.perf_counter() - t0)
+        return record
+
+
+def _pool_class(base, stats: PoolStats):
+    # Stats live on a per-engine subclass so they survive pool.recreate() (engine.dispose())
+    return type(f"Timed{base.__name__}", (_TimedCheckout, base), {"stats": stats})
+
+
+def engine_options(url: str, stats: PoolStats, *, is_async: bool = False) -> Dict[str, Any]:
+    """create_engine()/create_async_engine() keyword arguments for the configured pool."""
+    u = make_url(url)
+    options: Dict[str, Any] = {"pool_pre_ping": DB_POOL_PRE_PING == "always"}
+    if u.get_backend_name() == "sqlite" and u.database in (None, "", ":memory:"):
+        return options     # one connection per thread; nothing to size
+    # aiosqlite would otherwise get NullPool and start a thread per request
+    options.update(
+        poolclass=_pool_class(AsyncAdaptedQueuePool if is_async else QueuePool, stats),
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return options
+
+
+def instrument(engine: Engine, stats: PoolStats) -> None:
+    """Count connects/invalidations and, with DB_POOL_PRE_PING=idle, ping stale connections."""
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, record):
+        stats.count("connects")
+
+    @event.listens_for(engine, "invalidate")
+    def _invalidate(dbapi_connection, record, exception):
+        stats.count("invalidations")
+
+    if DB_POOL_PRE_PING != "idle":
+        return
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, record):
+        record.info["returned_at"] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, record, proxy):
+        returned = record.info.get("returned_at")
+        if returned is None or time.monotonic() - returned < DB_PING_IDLE_SEC:
+            return
+        stats.count("pings")
+        try:
+            ok = engine.dialect.do_ping(dbapi_connection)
+        except Exception:
+            ok = False
+        if not ok:
+            stats.count("ping_failures")
+            # The pool discards this connection and checks out another
+            raise exc.DisconnectionError("connection failed the idle ping")
@@ -0,0 +1,229 @@
+"""
+Read-replica routing.
+
+Routes declare read-only intent by depending on get_read_db /
+get_async_read_db instead of get_db / get_async_db. Their sessions are
+RoutingSessions that send statements to a healthy replica, with these
+exceptions:
+
+  - writes (flushes, INSERT/UPDATE/DELETE, text or Core) always go to the
+    primary, and once a session has written, its later reads go there too;
+  - a client that committed a write in the last READ_YOUR_WRITES_SEC reads
+    from the primary, so it sees its own change before replication does;
+  - with no healthy replica, everything goes to the primary.
+
+A background thread checks each replica every REPLICA_CHECK_INTERVAL_SEC
+(SELECT 1, plus replication lag on MySQL when REPLICA_MAX_LAG_SEC is set).
+A connection error on a replica marks it down at once; the checker brings
+it back.
+
+    DATABASE_REPLICA_URLS=mysql+pymysql://ro@replica1/school_mgmt,mysql+pymysql://ro@replica2/school_mgmt
+
+Local stand-ins: point DATABASE_URL at one SQLite file and
+DATABASE_REPLICA_URLS at a copy of it.
+
+The read-your-writes window is per process. Clients are keyed by their
+bearer token, or by their address when they have none.
+"""
+import hashlib
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional
+
+from sqlalchemy import event, exc, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
+
+READ_YOUR_WRITES_SEC = float(os.getenv("READ_YOUR_WRITES_SEC", "5"))
+REPLICA_CHECK_INTERVAL_SEC = float(os.getenv("REPLICA_CHECK_INTERVAL_SEC", "5"))
+# 0 disables the lag check
+REPLICA_MAX_LAG_SEC = float(os.getenv("REPLICA_MAX_LAG_SEC", "0"))
+RECENT_WRITERS_MAX = 50_000
+
+_WRITE_VERBS = ("INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "ALTER", "DROP", "TRUNCATE", "LOCK")
+
+
+def is_write(clause) -> bool:
+    if isinstance(clause, UpdateBase):
+        return True
+    if isinstance(clause, TextClause):
+        return clause.text.lstrip().upper().startswith(_WRITE_VERBS)
+    return False
+
+
+class Replica:
+    def __init__(self, name: str, engine: Engine):
+        self.name = name
+        self.engine = engine
+        self.healthy = True
+        self.last_error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self.lag_sec: Optional[float] = None
+        self.failures = 0
+        self.reads = 0
+
+
+class ReplicaSet:
+    def __init__(self):
+        self.replicas: List[Replica] = []
+        self._async_engines: List[Engine] = []     # sync_engine of each async twin, same order
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def add(self, name: str, engine: Engine, async_engine: Engine) -> None:
+        replica = Replica(name, engine)
+        self.replicas.append(replica)
+        self._async_engines.append(async_engine)
+        for e in (engine, async_engine):
+            event.listen(e, "handle_error", lambda ctx, r=replica: self._on_error(r, ctx))
+
+    def pick(self, for_async: bool = False) -> Optional[Engine]:
+        """Round-robin over healthy replicas; None means use the primary."""
+        healthy = [i for i, r in enumerate(self.replicas) if r.healthy]
+        if not healthy:
+            return None
+        i = healthy[next(self._next) % len(healthy)]
+        self.replicas[i].reads += 1
+        return self._async_engines[i] if for_async else self.replicas[i].engine
+
+    def _on_error(self, replica: Replica, ctx) -> None:
+        if ctx.is_disconnect or isinstance(ctx.sqlalchemy_exception, exc.OperationalError):
+            self.mark_down(replica, str(ctx.original_exception))
+
+    def mark_down(self, replica: Replica, error: str) -> None:
+        with self._lock:
+            replica.healthy = False
+            replica.failures += 1
+            replica.last_error = error[:200]
+
+    def check(self, replica: Replica) -> None:
+        try:
+            with replica.engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                lag = None
+                if REPLICA_MAX_LAG_SEC > 0 and replica.engine.dialect.name == "mysql":
+                    row = conn.execute(text("SHOW REPLICA STATUS")).mappings().first()
+                    lag = row.get("Seconds_Behind_Source") if row else None
+            replica.checked_at = time.time()
+            replica.lag_sec = lag
+            if lag is not None and lag > REPLICA_MAX_LAG_SEC:
+                self.mark_down(replica, f"replication lag {lag}s")
+                return
+            replica.healthy = True
+            replica.last_error = None
+        except Exception as e:
+            replica.checked_at = time.time()
+            self.mark_down(replica, str(e))
+
+    def _run(self) -> None:
+        while not self._stop.wait(REPLICA_CHECK_INTERVAL_SEC):
+            for replica in self.replicas:
+                self.check(replica)
+
+    def start(self) -> None:
+        if not self.replicas or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def status(self) -> List[dict]:
+        return [
+            {"name": r.name, "healthy": r.healthy, "reads": r.reads, "failures": r.failures,
+             "lag_sec": r.lag_sec, "checked_at": r.checked_at, "last_error": r.last_error}
+            for r in self.replicas
+        ]
+
+
+class RecentWriters:
+    """Clients that committed a write in the last READ_YOUR_WRITES_SEC (bounded LRU)."""
+
+    def __init__(self, window: float = READ_YOUR_WRITES_SEC, maxsize: int = RECENT_WRITERS_MAX):
+        self.window = window
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark(self, key: str) -> None:
+        with self._lock:
+            self._data[key] = time.monotonic() + self.window
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def recent(self, key: Optional[str]) -> bool:
+        if key is None:
+            return False
+        with self._lock:
+            until = self._data.get(key)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._data[key]
+                return False
+            return True
+
+
+replica_set = ReplicaSet()
+recent_writers = RecentWriters()
+
+
+def client_key(request) -> Optional[str]:
+    if request is None:
+        return None
+    auth = request.headers.get("authorization")
+    if auth:
+        return hashlib.blake2b(auth.encode(), digest_size=12).hexdigest()
+    return request.client.host if request.client else None
+
+
+class RoutingSession(Session):
+    """Session that reads from a replica when `info["read_only"]` is set."""
+    for_async = False
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kw):
+        if bind is not None:
+            return bind
+        info = self.info
+        if self._flushing or is_write(clause) or (clause is None and mapper is None):
+            # A bare session.connection() may be used for anything; treat it as a write
+            info["wrote"] = True
+        elif info.get("read_only") and not info.get("wrote") and not info.get("primary"):
+            if "replica" not in info:
+                # One replica for the whole session, so its reads are consistent
+                info["replica"] = replica_set.pick(self.for_async)
+            if info["replica"] is not None:
+                return info["replica"]
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+class AsyncRoutingSession(RoutingSession):
+    """sync_session_class for AsyncSession; picks the replicas' async engines."""
+    for_async = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _remember_writer(session: Session) -> None:
+    if session.info.get("wrote") and session.info.get("client_key"):
+        recent_writers.mark(session.info["client_key"])
+
+
+def use_primary(session: Session) -> None:
+    """Send the rest of this session to the primary, e.g. reads a write depends on."""
+    session.info["primary"] = True
+
+
+def read_intent(session: Session, request) -> None:
+    key = client_key(request)
+    session.info["client_key"] = key
+    session.info["read_only"] = not recent_writers.recent(key)
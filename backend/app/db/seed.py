@@ -1,10 +1,44 @@
 # backend/app/db/seed.py
+"""
+Demo accounts, or a synthetic school at scale.
+
+    python -m backend.app.db.seed                                # the three demo logins
+    python -m backend.app.db.seed --generate --scale medium
+    python -m backend.app.db.seed --generate --students 50000 --notifications 10000000 --seed 7
+
+Generator mode appends a referentially consistent school after the ids
+already in the database:
+  - users: admins, teachers, students;
+  - teachers and students, with their profiles;
+  - classes and class_students;
+  - clash-free timetables;
+  - notifications: class and grade broadcasts over a term, with read state;
+  - messages between teachers and their students, if the table exists.
+
+Rows are produced lazily and written BATCH at a time, one transaction per
+batch. Memory grows with enrolments (a few ints per student), not with the
+number of notifications or messages. Every generated account has the
+password GENERATED_PASSWORD, hashed once. The same --seed gives the same rows.
+"""
+import argparse
+import random
+import time
+from array import array
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+from sqlalchemy import inspect, text
 from sqlalchemy.orm import Session
 
 from .session import SessionLocal, engine          # db/session.py
 from .base import Base                             # db/base.py
 from .models.user import User                      # db/models/user.py
+# Every table generate() writes, so create_all makes them on a fresh database
+from .models import classroom, data_version, notification, student, teacher, timetable  # noqa: F401
 from ..core.security import hash_password          # core/security.py
+from ..services import data_versions, timetable_snapshots
 
 
 def seed():
@@ -39,5 +73,262 @@ def seed():
         db.close()
 
 
+# =====================
+# Synthetic school
+# =====================
+GENERATED_PASSWORD = "password123"
+EMAIL_DOMAIN = "gen.learnloop.edu"
+BATCH = 5000
+
+DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday")
+PERIODS = [(f"{8 + p:02d}:00:00", f"{8 + p:02d}:50:00") for p in range(7)]
+GROUP = 11                  # classes sharing a week: 11 classes x 3 sessions fit the 35 periods
+SESSIONS = 3
+CLASSES_PER_STUDENT = 5
+SUBJECTS = ("Maths", "English", "Physics", "Chemistry", "Biology", "History", "Geography", "Art", "Music", "PE")
+TERM_START = datetime(2026, 1, 27, 8, 0)
+TERM = timedelta(days=70)
+GRADE_BROADCAST_EVERY = 40  # every 40th notification goes to a whole grade, from an admin
+READERS = 0.7               # students who use "mark all read"; their watermark sits at READ_UNTIL
+READ_UNTIL = 0.8            # fraction of the term
+
+
+@dataclass(frozen=True)
+class Scale:
+    students: int
+    teachers: int
+    classes: int
+    notifications: int      # receipts, i.e. rows in `notifications`
+    messages: int
+    admins: int = 2
+
+
+SCALES = {
+    "small":  Scale(students=500, teachers=25, classes=44, notifications=50_000, messages=10_000),
+    "medium": Scale(students=5_000, teachers=200, classes=330, notifications=1_000_000, messages=200_000),
+    "large":  Scale(students=20_000, teachers=800, classes=1_320, notifications=10_000_000, messages=1_000_000),
+}
+
+
+@dataclass
+class School:
+    admins: List[int]
+    teachers: List[int]
+    students: List[int]
+    classes: List[int]
+    teacher_of: Dict[int, int]                      # class_id -> teacher_id
+    rows: Dict[str, int] = field(default_factory=dict)
+
+
+def generated_email(role: str, user_id: int) -> str:
+    return f"{role}{user_id}@{EMAIL_DOMAIN}"
+
+
+def _next_id(conn, table: str, column: str) -> int:
+    return (conn.execute(text(f"SELECT MAX({column}) FROM {table}")).scalar() or 0) + 1
+
+
+def _write(eng, sql: str, rows: Iterable[dict], batch: int) -> int:
+    """executemany `rows` in transactions of `batch`; never holds more than one batch."""
+    stmt, total, it = text(sql), 0, iter(rows)
+    while True:
+        chunk = list(islice(it, batch))
+        if not chunk:
+            return total
+        with eng.begin() as c:
+            c.execute(stmt, chunk)
+        total += len(chunk)
+
+
+def _slot(class_id: int, first_class: int, session: int) -> Tuple[str, str, str]:
+    day, period = divmod(((class_id - first_class) % GROUP) * SESSIONS + session, len(PERIODS))
+    return (DAYS[day],) + PERIODS[period]
+
+
+def generate(eng=engine, scale: Scale = SCALES["small"], seed: int = 42, batch: int = BATCH,
+             log: Callable[[str], None] = print) -> School:
+    Base.metadata.create_all(bind=eng)
+    rng = random.Random(seed)
+    pw = hash_password(GENERATED_PASSWORD)
+
+    with eng.connect() as c:
+        first_user = _next_id(c, "users", "user_id")
+        first_class = _next_id(c, "classes", "class_id")
+        first_body = _next_id(c, "notification_bodies", "body_id")
+        first_receipt = _next_id(c, "notifications", "notification_id")
+    ids = iter(range(first_user, first_user + scale.admins + scale.teachers + scale.students))
+    admins = [next(ids) for _ in range(scale.admins)]
+    teachers = [next(ids) for _ in range(scale.teachers)]
+    students = [next(ids) for _ in range(scale.students)]
+    classes = list(range(first_class, first_class + scale.classes))
+
+    # A group's classes never share a period; a teacher teaches in one group and a student learns in one
+    groups = max(1, (scale.classes + GROUP - 1) // GROUP)
+    per_group = max(1, scale.teachers // groups)
+    teacher_of = {
+        k: teachers[min(((k - first_class) // GROUP) * per_group + (k - first_class) % per_group, scale.teachers - 1)]
+        for k in classes
+    }
+    group_of = lambda s: (s - first_user) % groups
+    grade_of = lambda s: str(7 + group_of(s) % 6)
+    members: Dict[int, array] = {k: array("i") for k in classes}
+    by_grade: Dict[str, array] = {}
+    for s in students:
+        in_group = classes[group_of(s) * GROUP:(group_of(s) + 1) * GROUP]
+        for k in rng.sample(in_group, min(CLASSES_PER_STUDENT, len(in_group))):
+            members[k].append(s)
+        by_grade.setdefault(grade_of(s), array("i")).append(s)
+
+    school = School(admins=admins, teachers=teachers, students=students, classes=classes, teacher_of=teacher_of)
+
+    def step(table: str, rows: int, started: float) -> None:
+        school.rows[table] = school.rows.get(table, 0) + rows
+        log(f"{table:<24}{rows:>12,} rows {time.perf_counter() - started:>8.1f} s")
+
+    t0 = time.perf_counter()
+    people = ([(a, "admin") for a in admins] + [(t, "teacher") for t in teachers] + [(s, "student") for s in students])
+    step("users", _write(eng, "INSERT INTO users (user_id, email, password_hash, full_name, role) "
+                              "VALUES (:id, :email, :pw, :name, :role)",
+                         ({"id": u, "email": generated_email(role, u), "pw": pw, "name": f"{role.title()} {u}", "role": role}
+                          for u, role in people), batch), t0)
+    t0 = time.perf_counter()
+    step("teachers", _write(eng, "INSERT INTO teachers (teacher_id, full_name, email, role, subject, department, employee_code) "
+                                 "VALUES (:id, :name, :email, 'teacher', :subject, :dept, :code)",
+                            ({"id": t, "name": f"Teacher {t}", "email": generated_email("teacher", t),
+                              "subject": SUBJECTS[t % len(SUBJECTS)], "dept": f"Faculty {t % 4 + 1}", "code": f"G{t}"}
+                             for t in teachers), batch), t0)
+    t0 = time.perf_counter()
+    step("students", _write(eng, "INSERT INTO students (student_id, full_name, email, role, grade, class) "
+                                 "VALUES (:id, :name, :email, 'student', :grade, :cls)",
+                            ({"id": s, "name": f"Student {s}", "email": generated_email("student", s),
+                              "grade": grade_of(s), "cls": "ABCD"[s % 4]} for s in students), batch), t0)
+    t0 = time.perf_counter()
+    step("classes", _write(eng, "INSERT INTO classes (class_id, class_name, description) VALUES (:id, :name, :d)",
+                           ({"id": k, "name": f"{SUBJECTS[k % len(SUBJECTS)]} {k}", "d": f"Year {7 + (k - first_class) // GROUP % 6}"}
+                            for k in classes), batch), t0)
+    t0 = time.perf_counter()
+    step("class_students", _write(eng, "INSERT INTO class_students (student_id, class_id) VALUES (:s, :k)",
+                                  ({"s": s, "k": k} for k in classes for s in members[k]), batch), t0)
+    t0 = time.perf_counter()
+    step("timetables", _write(eng, "INSERT INTO timetables (student_id, teacher_id, class_id, day_of_week, start_time, end_time) "
+                                   "VALUES (:s, :t, :k, :d, :a, :b)",
+                              ({"s": s, "t": teacher_of[k], "k": k, "d": d, "a": a, "b": b}
+                               for k in classes for j in range(SESSIONS) for d, a, b in [_slot(k, first_class, j)]
+                               for s in members[k]), batch), t0)
+
+    t0 = time.perf_counter()
+    sent, marks = _notifications(eng, school, members, by_grade, scale.notifications, first_body, first_receipt, rng, batch)
+    step("notification_bodies", school.rows.pop("notification_bodies", 0), t0)
+    step("notifications", sent, t0)
+    step("notification_read_marks", _write(eng, "INSERT INTO notification_read_marks (user_id, last_read_id, last_read_at) "
+                                                "VALUES (:u, :id, :at)",
+                                           ({"u": u, "id": rid, "at": at} for u, (rid, at) in marks.items()), batch), t0)
+
+    t0 = time.perf_counter()
+    if inspect(eng).has_table("messages"):
+        step("messages", _write(eng, "INSERT INTO messages (sender_id, receiver_id, content, ts) VALUES (:a, :b, :m, :ts)",
+                                _messages(school, members, scale.messages, rng), batch), t0)
+    elif scale.messages:
+        log("messages: no such table (only in Database/LearnLoop_Schema.sql); skipped")
+
+    t0 = time.perf_counter()
+    db: Session = SessionLocal() if eng is engine else Session(eng)
+    try:
+        data_versions.bump(db, data_versions.USERS, data_versions.TEACHERS)
+        db.commit()
+        for i in range(0, len(students), batch):
+            timetable_snapshots.rebuild(db, students[i:i + batch])
+    finally:
+        db.close()
+    step("timetable_snapshots", len(students), t0)
+    return school
+
+
+def _notifications(eng, school: School, members: Dict[int, array], by_grade: Dict[str, array], total: int,
+                   first_body: int, first_receipt: int, rng: random.Random,
+                   batch: int) -> Tuple[int, Dict[int, Tuple[int, datetime]]]:
+    """
+    Broadcasts in date order until `total` receipts exist. Bodies and their
+    receipts are flushed together, bodies first. Returns the receipts written
+    and the read watermark of each student who marked all read at READ_UNTIL.
+    """
+    sizes = [len(m) for m in members.values()]
+    mean = max(1.0, sum(sizes) / max(1, len(sizes)))
+    step = TERM / max(1, total / mean)                # spreads the expected number of bodies over the term
+    read_until = TERM_START + TERM * READ_UNTIL
+    readers = {s for s in school.students if rng.random() < READERS}
+    marks: Dict[int, Tuple[int, datetime]] = {}
+    bodies: List[dict] = []
+    receipts: List[dict] = []
+    body_id, receipt_id, sent = first_body, first_receipt, 0
+    body_sql = text("INSERT INTO notification_bodies (body_id, sent_by, message, date_sent) VALUES (:id, :by, :m, :d)")
+    receipt_sql = text("INSERT INTO notifications (notification_id, sent_to, body_id, date_sent, is_read) "
+                       "VALUES (:id, :to, :b, :d, :r)")
+
+    def flush():
+        with eng.begin() as c:
+            if bodies:
+                c.execute(body_sql, bodies)
+            if receipts:
+                c.execute(receipt_sql, receipts)
+        school.rows["notification_bodies"] = school.rows.get("notification_bodies", 0) + len(bodies)
+        bodies.clear()
+        receipts.clear()
+
+    n = 0
+    while sent < total and school.classes:
+        when = TERM_START + step * n
+        if n % GRADE_BROADCAST_EVERY == GRADE_BROADCAST_EVERY - 1 and school.admins:
+            grade = rng.choice(sorted(by_grade))
+            sender, audience, msg = rng.choice(school.admins), by_grade[grade], f"Year {grade} notice {n}: assembly schedule changes"
+        else:
+            k = rng.choice(school.classes)
+            sender, audience, msg = school.teacher_of[k], members[k], f"Class {k}: homework {n} is due next lesson"
+        n += 1
+        if not audience:
+            continue
+        bodies.append({"id": body_id, "by": sender, "m": msg, "d": when})
+        for s in audience[: total - sent]:
+            if s in readers and when < read_until:
+                marks[s] = (receipt_id, when)
+                is_read = 0                           # covered by the watermark
+            else:
+                is_read = int(rng.random() < (0.25 if s in readers else 0.5))
+            receipts.append({"id": receipt_id, "to": s, "b": body_id, "d": when, "r": is_read})
+            receipt_id += 1
+            sent += 1
+            if len(receipts) >= batch:
+                flush()
+        body_id += 1
+    flush()
+    return sent, marks
+
+
+def _messages(school: School, members: Dict[int, array], total: int, rng: random.Random) -> Iterator[dict]:
+    """Teacher <-> student conversations within a class, in time order."""
+    taught = [k for k in school.classes if members[k]]
+    step = TERM / max(1, total)
+    for i in range(total if taught else 0):
+        k = rng.choice(taught)
+        teacher, student = school.teacher_of[k], rng.choice(members[k])
+        if rng.random() < 0.6:
+            yield {"a": teacher, "b": student, "m": f"Feedback on your class {k} work ({i})", "ts": TERM_START + step * i}
+        else:
+            yield {"a": student, "b": teacher, "m": f"Question about class {k} ({i})", "ts": TERM_START + step * i}
+
+
 if __name__ == "__main__":
-    seed()
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--generate", action="store_true", help="append a synthetic school instead of the demo logins")
+    ap.add_argument("--scale", choices=sorted(SCALES), default="small")
+    for name in ("students", "teachers", "classes", "notifications", "messages", "admins"):
+        ap.add_argument(f"--{name}", type=int, help="overrides --scale")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--batch", type=int, default=BATCH, help="rows per INSERT transaction")
+    args = ap.parse_args()
+
+    if args.generate:
+        overrides = {k: getattr(args, k) for k in Scale.__dataclass_fields__ if getattr(args, k) is not None}
+        generate(engine, replace(SCALES[args.scale], **overrides), seed=args.seed, batch=args.batch)
+    else:
+        seed()
@@ -1,26 +1,91 @@
 import os
 from pathlib import Path
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
+from fastapi import Depends, Request
 
 from ..db.base import Base
+from . import pool, replicas
 
 
-# Always load backend/.env explicitly
-ENV_PATH = Path(__file__).resolve().parents[2] / ".env"  # <-- changed
-load_dotenv(ENV_PATH, override=True)
+# Always load backend/.env explicitly; variables already set in the environment win
+ENV_PATH = Path(__file__).resolve().parents[2] / ".env"
+load_dotenv(ENV_PATH)
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError(f"DATABASE_URL is not set. Expected it in backend/.env (looked in {ENV_PATH})")
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True, future=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Async driver for each sync one; ASYNC_DATABASE_URL overrides the derived URL
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
 
-def get_db():
+
+def async_url(url: str) -> str:
+    u = make_url(url)
+    if u.drivername not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver known for {u.drivername}; set ASYNC_DATABASE_URL")
+    return u.set(drivername=ASYNC_DRIVERS[u.drivername]).render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_url(DATABASE_URL)
+
+# Pool sizing, pre-ping policy and checkout statistics: see db/pool.py
+engine_stats = pool.PoolStats("sync")
+engine = create_engine(DATABASE_URL, future=True, **pool.engine_options(DATABASE_URL, engine_stats))
+pool.instrument(engine, engine_stats)
+SessionLocal = sessionmaker(class_=replicas.RoutingSession, autocommit=False, autoflush=False, bind=engine)
+
+# For async routes: queries await the driver instead of blocking the event loop
+async_engine_stats = pool.PoolStats("async")
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, **pool.engine_options(ASYNC_DATABASE_URL, async_engine_stats, is_async=True)
+)
+pool.instrument(async_engine.sync_engine, async_engine_stats)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, sync_session_class=replicas.AsyncRoutingSession, autoflush=False, expire_on_commit=False
+)
+
+# Read replicas (comma-separated sync URLs); reads opt in via get_read_db: see db/replicas.py
+DATABASE_REPLICA_URLS = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+replica_stats = []
+for _i, _url in enumerate(DATABASE_REPLICA_URLS, 1):
+    _stats = pool.PoolStats(f"replica{_i}")
+    _async_stats = pool.PoolStats(f"replica{_i}-async")
+    _engine = create_engine(_url, future=True, **pool.engine_options(_url, _stats))
+    _async_engine = create_async_engine(async_url(_url), **pool.engine_options(_url, _async_stats, is_async=True))
+    pool.instrument(_engine, _stats)
+    pool.instrument(_async_engine.sync_engine, _async_stats)
+    replicas.replica_set.add(f"replica{_i}", _engine, _async_engine.sync_engine)
+    replica_stats.append((_engine, _stats, _async_engine, _async_stats))
+
+def get_db(request: Request = None):
     db = SessionLocal()
+    # Remember who wrote, so their next reads skip the replicas for a while
+    db.info["client_key"] = replicas.client_key(request)
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db(request: Request = None):
+    async with AsyncSessionLocal() as db:
+        db.sync_session.info["client_key"] = replicas.client_key(request)
+        yield db
+
+def get_read_db(request: Request = None, db=Depends(get_db)):
+    """get_db for routes that only read: served by a replica when one is healthy."""
+    # Same session as the auth dependencies, so a request holds one connection
+    replicas.read_intent(db, request)
+    return db
+
+async def get_async_read_db(request: Request = None, db=Depends(get_async_db)):
+    replicas.read_intent(db.sync_session, request)
+    return db
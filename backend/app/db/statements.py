@@ -0,0 +1,35 @@
+# backend/app/db/statements.py
+"""
+Named hand-written SQL, for the plan checks in benchmarks/query_plans.py.
+
+Raw text() statements on request paths register here with example
+parameters. The checker runs EXPLAIN on each one against a generated school
+and compares the plan with the stored snapshot:
+
+    _feed = statements.register("students.notifications", text("..."), sid=28, wm=0)
+
+register() returns the statement unchanged, so it costs nothing per query.
+Example ids should exist in the small school generated by db/seed.py on an
+empty database: admins 1-2, teachers 3-27, students 28-527, classes 1-44.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict
+
+from sqlalchemy.sql.elements import TextClause
+
+
+@dataclass(frozen=True)
+class Registered:
+    name: str
+    statement: TextClause
+    example: Dict[str, Any]
+
+
+registry: Dict[str, Registered] = {}
+
+
+def register(name: str, statement: TextClause, **example: Any) -> TextClause:
+    if name in registry and registry[name].statement.text != statement.text:
+        raise ValueError(f"Statement {name!r} is already registered with different SQL")
+    registry[name] = Registered(name, statement, example)
+    return statement
@@ -1,9 +1,17 @@
+import asyncio
+import gc
 import os
-from fastapi import FastAPI, Depends, HTTPException
+from contextlib import asynccontextmanager
+from typing import Literal, Optional
+from fastapi import FastAPI, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
 
-from .db.session import engine, get_db
+from .db.session import async_engine, async_engine_stats, engine, engine_stats, get_async_db, replica_stats
+from .db.replicas import replica_set
 from .db.base import Base
 from .db.models.user import User
 # 👇 Ensure Student model is imported before create_all
@@ -11,18 +19,56 @@ from .db.models import student as _student_models  # noqa: F401
 
 from .schemas.auth import LoginRequest, LoginResponse
 from .schemas.user import UserOut
-from .core.security import verify_password, create_access_token
-from .api.deps import get_current_user
+from .core.security import create_access_token
+from .core import etag, logs, metrics, sqlstats
+from .core.compression import CompressionMiddleware
+from .core.hashing import HashingBusy, hasher
+from .core.ratelimit import client_address, login_limiter
+from .api.deps import enforce_roles, get_current_user, get_current_user_async
 
 # Routers
 from .api.routers import timetable, students, teacher
 from .api.routers import user as users_router 
 from .db.models import teacher as _teacher_models
+from .db.models import notification as _notification_models  # noqa: F401
+from .db.models import classroom as _classroom_models  # noqa: F401
+from .db.models import notification_job as _notification_job_models  # noqa: F401
+from .db.models import timetable as _timetable_models  # noqa: F401
+from .db.models import data_version as _data_version_models  # noqa: F401
+from .services import jobs
+from .services.broker import broker
+
+logs.setup()
 
 # Create tables (Student included)
 Base.metadata.create_all(bind=engine)
+sqlstats.install(engine)
+sqlstats.install(async_engine.sync_engine)
+for _replica, _, _async_replica, _ in replica_stats:
+    sqlstats.install(_replica)
+    sqlstats.install(_async_replica.sync_engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logs.setup()    # again after a previous shutdown (tests reuse the app)
+    broker.bind(asyncio.get_running_loop())
+    # Pick up broadcasts interrupted by the previous shutdown, and any whose owner dies later
+    jobs.runner.start()
+    replica_set.start()
+    # Move startup objects out of the collector's reach: full collections then
+    # only scan request garbage, instead of pausing the event loop ~100 ms
+    gc.collect()
+    gc.freeze()
+    yield
+    jobs.runner.shutdown()
+    hasher.shutdown()
+    replica_set.stop()
+    logs.shutdown()
+    await async_engine.dispose()
+    for _, _, async_replica, _ in replica_stats:
+        await async_replica.dispose()
 
-app = FastAPI(title="LearnLoop API")
+app = FastAPI(title="LearnLoop API", lifespan=lifespan)
 
 origins_env = os.getenv("CORS_ORIGINS", "")
 origins = [o.strip() for o in origins_env.split(",") if o.strip()] or [
@@ -35,18 +81,55 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Request-ID"],
 )
+app.add_middleware(CompressionMiddleware)
+# Outside compression, so its byte counts are what goes on the wire
+etag.install(app)
+# Outermost: request latency includes every other middleware
+metrics.install(app)
+# Outermost of all: everything below, including metrics, runs with the request id bound
+app.add_middleware(logs.RequestIdMiddleware)
+
+@app.exception_handler(HashingBusy)
+async def hashing_busy_handler(request: Request, exc: HashingBusy):
+    return JSONResponse(status_code=503, content={"detail": "Server busy, please retry"}, headers={"Retry-After": "1"})
 
 @app.get("/health")
 def health():
     return {"ok": True}
 
 @app.post("/api/auth/login", response_model=LoginResponse)
-def login(data: LoginRequest, db: Session = Depends(get_db)):
-    user_row = db.query(User).filter(User.email == data.email).first()
-    if not user_row or not verify_password(data.password, user_row.password_hash):
+async def login(data: LoginRequest, request: Request, db: AsyncSession = Depends(get_async_db)):
+    # Cheap rejections first: per-client and per-account token buckets
+    address = client_address(request)
+    if login_limiter.backend.blocking:
+        await run_in_threadpool(login_limiter.check, address, data.email)
+    else:
+        login_limiter.check(address, data.email)
+
+    # bcrypt runs on the hashing process pool; DB calls are awaited on the async engine
+    user_row = (await db.execute(select(User).where(User.email == data.email))).scalars().first()
+    if not user_row:
         raise HTTPException(status_code=401, detail="Invalid email or password")
-    token = create_access_token(sub=str(user_row.user_id))
+    login_limiter.acquire_verify_slot()
+    try:
+        ok, needs_rehash = await hasher.averify(data.password, user_row.password_hash)
+    finally:
+        login_limiter.release_verify_slot()
+    if not ok:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    if needs_rehash:
+        # Upgrade hashes made with deprecated settings; never fail the login over it
+        try:
+            user_row.password_hash = await hasher.ahash(data.password)
+            await db.commit()
+        except HashingBusy:
+            pass
+    token = create_access_token(
+        sub=str(user_row.user_id),
+        claims={"role": user_row.role, "email": user_row.email, "name": user_row.full_name},
+    )
     return {
         "user": {"id": user_row.user_id, "email": user_row.email, "name": user_row.full_name, "role": user_row.role},
         "access_token": token,
@@ -54,7 +137,9 @@ def login(data: LoginRequest, db: Session = Depends(get_db)):
     }
 
 @app.get("/api/auth/me", response_model=UserOut)
-def me(current = Depends(get_current_user)):
+async def me(request: Request, current = Depends(get_current_user_async)):
+    # The principal is the whole response; no query needed to answer a revalidation
+    etag.conditional(request, "me", current.user_id, current.email, current.full_name, current.role)
     return {"id": current.user_id, "email": current.email, "name": current.full_name, "role": current.role}
 
 
@@ -68,6 +153,81 @@ def debug_user(current: User = Depends(get_current_user)):
     }
 
 
+@app.get("/debug/hashing")
+def debug_hashing(_admin=Depends(enforce_roles(["admin"]))):
+    return hasher.metrics()
+
+
+@app.get("/debug/pool")
+def debug_pool(_admin=Depends(enforce_roles(["admin"]))):
+    return {
+        "sync": engine_stats.snapshot(engine.pool),
+        "async": async_engine_stats.snapshot(async_engine.sync_engine.pool),
+        "replicas": [
+            {
+                **status,
+                "sync": stats.snapshot(replica.pool),
+                "async": async_stats.snapshot(async_replica.sync_engine.pool),
+            }
+            for status, (replica, stats, async_replica, async_stats) in zip(replica_set.status(), replica_stats)
+        ],
+    }
+
+
+def _pools():
+    yield "sync", engine_stats, engine.pool
+    yield "async", async_engine_stats, async_engine.sync_engine.pool
+    for replica, stats, async_replica, async_stats in replica_stats:
+        yield stats.name, stats, replica.pool
+        yield async_stats.name, async_stats, async_replica.sync_engine.pool
+
+
+metrics.register(metrics.pool_collector(_pools))
+
+
+def _log_lines():
+    counts = logs.counters.snapshot()
+    for key, help in (("dropped", "Log records dropped because the queue was full."),
+                      ("sampled_out", "Log records skipped by LOG_SAMPLE.")):
+        yield f"# HELP log_records_{key}_total {help}"
+        yield f"# TYPE log_records_{key}_total counter"
+        yield f"log_records_{key}_total {counts[key]}"
+
+
+metrics.register(_log_lines)
+
+
+@app.get("/debug/log-level")
+def debug_log_level(_admin=Depends(enforce_roles(["admin"]))):
+    return logs.levels()
+
+
+@app.put("/debug/log-level")
+def set_log_level(
+    level: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+    logger: str = logs.ROOT,
+    sample: Optional[float] = Query(default=None, ge=0, le=1, description="Fraction of sub-WARNING records to keep"),
+    _admin=Depends(enforce_roles(["admin"])),
+):
+    if logger != logs.ROOT and not logger.startswith(logs.ROOT + "."):
+        raise HTTPException(status_code=400, detail=f"Only {logs.ROOT}.* loggers can be changed")
+    logs.set_level(logger, level)
+    if sample is not None:
+        logs.set_sample_rate(logger, sample)
+    return logs.levels()
+
+
+@app.get("/debug/slow-queries")
+def debug_slow_queries(_admin=Depends(enforce_roles(["admin"]))):
+    return {"threshold_ms": sqlstats.SLOW_QUERY_MS, "total": sqlstats.slow_queries.total,
+            "recent": sqlstats.slow_queries.entries()}
+
+
+@app.get("/debug/etag")
+def debug_etag(_admin=Depends(enforce_roles(["admin"]))):
+    return etag.stats.snapshot()
+
+
 # Include routers with prefixes
 app.include_router(users_router.router, prefix="/api/users", tags=["users"])
 app.include_router(students.router,  prefix="/api/student",  tags=["students"])
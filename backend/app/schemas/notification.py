@@ -0,0 +1,19 @@
+from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+
+
+class NotificationCreate(BaseModel):
+    content: str = Field(min_length=1)
+    # Optional audience; with none of these set the whole school is notified
+    class_id: Optional[int] = None
+    grade: Optional[str] = None
+    student_ids: Optional[List[int]] = None
+
+    @model_validator(mode="after")
+    def one_audience(self):
+        chosen = [f for f in ("class_id", "grade", "student_ids") if getattr(self, f) is not None]
+        if len(chosen) > 1:
+            raise ValueError(f"Choose at most one of class_id, grade, student_ids (got {', '.join(chosen)})")
+        if self.student_ids is not None and not self.student_ids:
+            raise ValueError("student_ids must not be empty")
+        return self
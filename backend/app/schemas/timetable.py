@@ -0,0 +1,116 @@
+from datetime import time
+from typing import List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from ..services.scheduler import CLASS_MAX_PER_DAY, DEFAULT_DAYS
+
+Day = Literal["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+class TimetableBase(BaseModel):
+    student_id: int
+    teacher_id: int
+    class_id: int
+    day_of_week: Day
+    start_time: time
+    end_time: time
+
+    @model_validator(mode="after")
+    def time_order(self):
+        # Same rule as the chk_time_order constraint
+        if self.start_time >= self.end_time:
+            raise ValueError("start_time must be before end_time")
+        return self
+
+
+class TimetableCreate(TimetableBase):
+    pass
+
+
+class TimetableUpdate(BaseModel):
+    student_id: Optional[int] = None
+    teacher_id: Optional[int] = None
+    class_id: Optional[int] = None
+    day_of_week: Optional[Day] = None
+    start_time: Optional[time] = None
+    end_time: Optional[time] = None
+
+
+class TimetableOut(TimetableBase):
+    timetable_id: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class TimetableBulk(BaseModel):
+    entries: List[TimetableCreate] = Field(min_length=1)
+    # Replace the existing timetables of every student present in `entries`
+    replace: bool = False
+    # Only validate and return the conflict report
+    dry_run: bool = False
+
+
+class PeriodIn(BaseModel):
+    day_of_week: Day
+    start_time: time
+    end_time: time
+
+
+class ClassAssignment(BaseModel):
+    class_id: int
+    teacher_id: int
+    sessions_per_week: int = Field(ge=1, le=20)
+
+
+class ScheduleRequest(BaseModel):
+    classes: List[ClassAssignment] = Field(min_length=1)
+    # Defaults to the standard school week (Mon-Fri, 7 periods)
+    periods: Optional[List[PeriodIn]] = None
+    max_periods_per_day: Optional[int] = Field(default=None, ge=1, le=24)
+    time_budget_ms: Optional[int] = Field(default=None, ge=10, le=60000)
+    # Off: every other class keeps its sessions and only `classes` are (re)placed.
+    # On: the whole timetable is deleted and rebuilt from `classes` alone.
+    replace_all: bool = False
+    dry_run: bool = False
+
+    @model_validator(mode="after")
+    def valid_periods(self):
+        ids = [c.class_id for c in self.classes]
+        if len(ids) != len(set(ids)):
+            raise ValueError("Each class may only be listed once")
+        if self.periods:
+            spans = sorted((p.day_of_week, p.start_time, p.end_time) for p in self.periods)
+            if any(start >= end for _, start, end in spans):
+                raise ValueError("start_time must be before end_time")
+            for (d1, s1, e1), (d2, s2, e2) in zip(spans, spans[1:]):
+                if d1 == d2 and s2 < e1:
+                    raise ValueError(f"Periods must not overlap ({d1} {s1}-{e1} / {s2}-{e2})")
+        # A class meets at most CLASS_MAX_PER_DAY times a day, so more sessions can never be placed
+        days = len({p.day_of_week for p in self.periods}) if self.periods else len(DEFAULT_DAYS)
+        too_many = [c.class_id for c in self.classes if c.sessions_per_week > days * CLASS_MAX_PER_DAY]
+        if too_many:
+            raise ValueError(
+                f"sessions_per_week can be at most {days * CLASS_MAX_PER_DAY} with periods on {days} day(s) "
+                f"(a class meets at most {CLASS_MAX_PER_DAY} time(s) a day); too many for class(es) {too_many}"
+            )
+        return self
+
+
+class AvailabilityQuery(BaseModel):
+    teacher_ids: List[int] = Field(default_factory=list)
+    student_ids: List[int] = Field(default_factory=list)
+    # Adds every member of these classes to student_ids
+    class_ids: List[int] = Field(default_factory=list)
+    days: List[Day] = Field(default_factory=lambda: ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"])
+    earliest: time = time(8, 0)
+    latest: time = time(18, 0)
+    duration_minutes: int = Field(default=30, ge=5, le=600)
+    limit: int = Field(default=50, ge=1, le=500)
+
+    @model_validator(mode="after")
+    def has_people(self):
+        if not (self.teacher_ids or self.student_ids or self.class_ids):
+            raise ValueError("Give at least one of teacher_ids, student_ids, class_ids")
+        if self.earliest >= self.latest:
+            raise ValueError("earliest must be before latest")
+        return self
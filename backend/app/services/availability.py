@@ -0,0 +1,81 @@
+# backend/app/services/availability.py
+"""
+Common free time for a group of teachers and students.
+
+Each person's week is a bitmap of SLOT_MINUTES slots (bit = day * SLOTS_PER_DAY
++ slot), held in a Python int: 7 days of 5-minute slots is 2,016 bits, and
+OR/AND/NOT on ints run word-at-a-time in C, so combining hundreds of people
+is a handful of big-int operations. The bitmaps come from two set-based
+queries on `timetables` (teachers, students), not one query per person.
+"""
+import os
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from ..db.models.timetable import DAYS
+from .timetables import ID_CHUNK, fmt_minutes, to_minutes
+
+SLOT_MINUTES = int(os.getenv("AVAILABILITY_SLOT_MINUTES", "5"))
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DAY_INDEX = {d: i for i, d in enumerate(DAYS)}
+
+
+@lru_cache(maxsize=4096)
+def span_mask(day: int, start: int, end: int) -> int:
+    """Bits of every slot that [start, end) minutes touches on `day`."""
+    first = start // SLOT_MINUTES
+    last = -(-end // SLOT_MINUTES)   # ceil: a lesson ending 09:02 blocks the 09:00 slot
+    return ((1 << (last - first)) - 1) << (day * SLOTS_PER_DAY + first)
+
+
+def _busy(db: Session, column: str, ids: List[int]) -> Dict[int, int]:
+    maps = {i: 0 for i in ids}
+    q = text(
+        f"SELECT DISTINCT {column}, day_of_week, start_time, end_time FROM timetables WHERE {column} IN :ids"
+    ).bindparams(bindparam("ids", expanding=True))
+    for i in range(0, len(ids), ID_CHUNK):
+        for owner, day, start, end in db.execute(q, {"ids": ids[i:i + ID_CHUNK]}):
+            maps[owner] |= span_mask(DAY_INDEX[day], to_minutes(start), to_minutes(end))
+    return maps
+
+
+def busy_maps(db: Session, *, teacher_ids: Iterable[int] = (), student_ids: Iterable[int] = ()) -> Dict[str, Dict[int, int]]:
+    return {
+        "teachers": _busy(db, "teacher_id", sorted(set(teacher_ids))),
+        "students": _busy(db, "student_id", sorted(set(student_ids))),
+    }
+
+
+def window_mask(days: Iterable[str], earliest: int, latest: int) -> int:
+    return sum(span_mask(DAY_INDEX[d], earliest, latest) for d in set(days))
+
+
+def free_slots(busy: Iterable[int], window: int, *, duration: int, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Runs of at least `duration` minutes inside `window` where no bitmap is busy."""
+    taken = 0
+    for m in busy:
+        taken |= m
+    free = window & ~taken
+    need = -(-duration // SLOT_MINUTES)
+    day_bits = (1 << SLOTS_PER_DAY) - 1
+
+    slots: List[Dict[str, Any]] = []
+    for d, day in enumerate(DAYS):
+        x = (free >> (d * SLOTS_PER_DAY)) & day_bits
+        pos = 0
+        while x:
+            skip = (x & -x).bit_length() - 1          # zeros before the next free slot
+            x >>= skip
+            pos += skip
+            run = (x ^ (x + 1)).bit_length() - 1     # consecutive free slots
+            if run >= need:
+                slots.append({"day": day, "start": fmt_minutes(pos * SLOT_MINUTES),
+                              "end": fmt_minutes((pos + run) * SLOT_MINUTES)})
+                if limit is not None and len(slots) >= limit:
+                    return slots
+            x >>= run
+            pos += run
+    return slots
@@ -0,0 +1,96 @@
+# backend/app/services/broker.py
+"""
+In-process pub/sub for unread-notification counts.
+
+Each connected client is a `Subscriber` holding a pending delta rather than a
+queue of messages: publishers add to the delta and wake the stream, and the
+stream sends whatever has accumulated. A slow client therefore never grows
+memory, and a burst of broadcasts collapses into a single event.
+
+Publishers run in sync route threads and job workers, so all mutations of
+subscriber state are marshalled onto the event loop that owns the streams.
+"""
+import asyncio
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+
+class Subscriber:
+    __slots__ = ("user_id", "delta", "reset", "wakeup")
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.delta = 0
+        self.reset = False           # True => client must be told its count is 0
+        self.wakeup = asyncio.Event()
+
+    def take(self) -> Dict[str, int]:
+        event = {"count": self.delta} if self.reset else {"delta": self.delta}
+        self.delta, self.reset = 0, False
+        self.wakeup.clear()
+        return event
+
+
+class UnreadBroker:
+    def __init__(self):
+        self._subs: Dict[int, Set[Subscriber]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+
+    # ---------- stream side (event loop) ----------
+    def subscribe(self, user_id: int) -> Subscriber:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        sub = Subscriber(user_id)
+        with self._lock:
+            self._subs.setdefault(user_id, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        with self._lock:
+            subs = self._subs.get(sub.user_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.user_id]
+
+    def connected(self) -> List[int]:
+        """User ids with at least one open stream."""
+        with self._lock:
+            return list(self._subs)
+
+    def connection_count(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._subs.values())
+
+    # ---------- publisher side (any thread) ----------
+    def publish_delta(self, user_ids: Iterable[int], delta: int = 1) -> None:
+        self._dispatch(list(user_ids), delta, reset=False)
+
+    def publish_reset(self, user_id: int) -> None:
+        self._dispatch([user_id], 0, reset=True)
+
+    def _dispatch(self, user_ids: List[int], delta: int, reset: bool) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed() or not user_ids:
+            return
+        with self._lock:
+            if not any(uid in self._subs for uid in user_ids):
+                return
+        loop.call_soon_threadsafe(self._apply, user_ids, delta, reset)
+
+    def _apply(self, user_ids: List[int], delta: int, reset: bool) -> None:
+        with self._lock:
+            targets = [s for uid in user_ids for s in self._subs.get(uid, ())]
+        for sub in targets:
+            if reset:
+                sub.delta, sub.reset = 0, True
+            else:
+                sub.delta += delta
+            sub.wakeup.set()
+
+
+broker = UnreadBroker()
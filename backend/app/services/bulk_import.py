@@ -0,0 +1,219 @@
+# backend/app/services/bulk_import.py
+"""
+Streaming bulk import of users, teachers and students from CSV or JSONL.
+
+Rows are read lazily and handled in batches of IMPORT_BATCH:
+  1. validate each row with the same schema the single-create endpoint uses
+  2. look up existing emails (and employee codes) with one query per batch
+  3. hash all passwords of the batch in parallel on the hashing pool
+  4. insert users, then teacher/student profiles, with executemany; commit
+
+Bad rows never abort the import; they are collected in a per-row report.
+
+CLI:
+    python -m backend.app.services.bulk_import teachers.csv --kind teacher --errors report.csv
+"""
+import argparse
+import csv
+import io
+import json
+import os
+from typing import Any, Dict, IO, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from ..core.hashing import hasher
+from ..schemas.student import StudentCreate
+from ..schemas.teacher import TeacherCreate
+from ..schemas.user import UserCreate
+from . import data_versions
+
+IMPORT_BATCH = int(os.getenv("IMPORT_BATCH", "500"))
+
+SCHEMAS = {"user": UserCreate, "teacher": TeacherCreate, "student": StudentCreate}
+
+_existing_emails = text("SELECT email FROM users WHERE email IN :emails").bindparams(
+    bindparam("emails", expanding=True)
+)
+_existing_codes = text("SELECT employee_code FROM teachers WHERE employee_code IN :codes").bindparams(
+    bindparam("codes", expanding=True)
+)
+_new_ids = text("SELECT user_id, email FROM users WHERE email IN :emails").bindparams(
+    bindparam("emails", expanding=True)
+)
+
+
+def iter_rows(stream: IO[bytes], fmt: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (row_number, raw_dict) without loading the file into memory."""
+    textio = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if fmt == "csv":
+        # Row 1 is the header; empty cells mean "not given"
+        for n, row in enumerate(csv.DictReader(textio), start=2):
+            yield n, {k.strip(): (v.strip() or None if isinstance(v, str) else v) for k, v in row.items() if k}
+    elif fmt == "jsonl":
+        for n, line in enumerate(textio, start=1):
+            if line.strip():
+                try:
+                    yield n, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield n, {"__error__": f"invalid JSON: {e.msg}"}
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def detect_format(filename: str) -> str:
+    return "jsonl" if filename.lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def _error_text(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}" for err in e.errors())
+
+
+class ImportReport:
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.total = 0
+        self.created = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def fail(self, row: int, email: Any, error: str) -> None:
+        self.errors.append({"row": row, "email": email, "error": error})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "total": self.total,
+            "created": self.created,
+            "failed": len(self.errors),
+            "errors": sorted(self.errors, key=lambda e: e["row"]),
+        }
+
+
+def run_import(db: Session, stream: IO[bytes], *, kind: str, fmt: str, batch_size: int = IMPORT_BATCH) -> ImportReport:
+    if kind not in SCHEMAS:
+        raise ValueError(f"kind must be one of {', '.join(SCHEMAS)}")
+    report = ImportReport(kind)
+    batch: List[Tuple[int, Any]] = []
+    for n, raw in iter_rows(stream, fmt):
+        report.total += 1
+        if "__error__" in raw:
+            report.fail(n, None, raw["__error__"])
+            continue
+        try:
+            batch.append((n, SCHEMAS[kind].model_validate(raw)))
+        except ValidationError as e:
+            report.fail(n, raw.get("email"), _error_text(e))
+            continue
+        if len(batch) >= batch_size:
+            _flush(db, kind, batch, report)
+            batch = []
+    if batch:
+        _flush(db, kind, batch, report)
+    return report
+
+
+def _flush(db: Session, kind: str, batch: List[Tuple[int, Any]], report: ImportReport) -> None:
+    # ---- duplicates: inside the batch, then against the DB in one query ----
+    seen, unique = set(), []
+    for n, item in batch:
+        key = item.email.lower()
+        if key in seen:
+            report.fail(n, item.email, "Duplicate email in file")
+            continue
+        seen.add(key)
+        unique.append((n, item))
+    if not unique:
+        return
+    taken = {e.lower() for (e,) in db.execute(_existing_emails, {"emails": [i.email for _, i in unique]})}
+    if kind == "teacher":
+        codes = [i.employee_code for _, i in unique if i.employee_code]
+        taken_codes = set(c for (c,) in db.execute(_existing_codes, {"codes": codes})) if codes else set()
+    rows = []
+    for n, item in unique:
+        if item.email.lower() in taken:
+            report.fail(n, item.email, "Email already in use")
+        elif kind == "teacher" and item.employee_code and item.employee_code in taken_codes:
+            report.fail(n, item.email, "Employee code already in use")
+        else:
+            if kind == "teacher" and item.employee_code:
+                taken_codes.add(item.employee_code)
+            rows.append((n, item))
+    if not rows:
+        return
+
+    # ---- bcrypt for the whole batch, spread across the hashing processes ----
+    hashes = hasher.hash_many([item.password for _, item in rows])
+
+    try:
+        db.execute(
+            text("INSERT INTO users (email, password_hash, full_name, role) VALUES (:email, :ph, :name, :role)"),
+            [
+                {"email": item.email, "ph": h, "name": item.full_name, "role": getattr(item, "role", kind)}
+                for (_, item), h in zip(rows, hashes)
+            ],
+        )
+        ids = {e.lower(): uid for uid, e in db.execute(_new_ids, {"emails": [i.email for _, i in rows]})}
+        if kind == "teacher":
+            db.execute(
+                text("""
+                    INSERT INTO teachers (teacher_id, full_name, email, role, subject, department, employee_code, phone)
+                    VALUES (:id, :name, :email, 'teacher', :subject, :department, :code, :phone)
+                """),
+                [
+                    {"id": ids[i.email.lower()], "name": i.full_name, "email": i.email, "subject": i.subject,
+                     "department": i.department, "code": i.employee_code, "phone": i.phone}
+                    for _, i in rows
+                ],
+            )
+        elif kind == "student":
+            db.execute(
+                text("""
+                    INSERT INTO students (student_id, full_name, email, role, grade, class)
+                    VALUES (:id, :name, :email, 'student', :grade, :cls)
+                """),
+                [
+                    {"id": ids[i.email.lower()], "name": i.full_name, "email": i.email, "grade": i.grade, "cls": i.class_}
+                    for _, i in rows
+                ],
+            )
+        data_versions.bump(db, data_versions.USERS, *([data_versions.TEACHERS] if kind == "teacher" else []))
+        db.commit()
+        report.created += len(rows)
+    except Exception as e:
+        db.rollback()
+        for n, item in rows:
+            report.fail(n, item.email, f"Batch insert failed: {e.__class__.__name__}")
+
+
+def write_error_csv(report: ImportReport, path: str) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=["row", "email", "error"])
+        w.writeheader()
+        w.writerows(report.errors)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Bulk import users/teachers/students")
+    ap.add_argument("file")
+    ap.add_argument("--kind", choices=sorted(SCHEMAS), required=True)
+    ap.add_argument("--format", choices=["csv", "jsonl"], default=None)
+    ap.add_argument("--batch", type=int, default=IMPORT_BATCH)
+    ap.add_argument("--errors", help="write the per-row error report to this CSV")
+    args = ap.parse_args()
+
+    from ..db.session import SessionLocal
+
+    with open(args.file, "rb") as f, SessionLocal() as db:
+        report = run_import(db, f, kind=args.kind, fmt=args.format or detect_format(args.file), batch_size=args.batch)
+    summary = report.as_dict()
+    print(f"{summary['created']} created, {summary['failed']} failed, {summary['total']} rows")
+    if args.errors:
+        write_error_csv(report, args.errors)
+        print(f"Error report written to {args.errors}")
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# backend/app/services/data_versions.py
+"""
+Change counters for whole collections.
+
+List endpoints (all users, all teachers) have no single row whose version
+could stand for the response, so every write to the collection bumps a
+counter in `data_versions` inside its own transaction. Reading the counter
+is one primary-key lookup, which is what conditional GETs compare against
+instead of re-running the list query.
+"""
+from typing import Dict
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+USERS = "users"
+TEACHERS = "teachers"
+
+_get = text("SELECT name, version FROM data_versions WHERE name IN :names").bindparams(
+    bindparam("names", expanding=True)
+)
+
+
+def get(db: Session, *names: str) -> Dict[str, int]:
+    """Current version of each name (0 if never written)."""
+    found = {n: 0 for n in names}
+    found.update(db.execute(_get, {"names": list(names)}).all())
+    return found
+
+
+def bump(db: Session, *names: str) -> None:
+    """Bump the given counters. Does not commit, so it lands with the caller's write."""
+    for name in names:
+        updated = db.execute(
+            text("UPDATE data_versions SET version = version + 1 WHERE name = :name"), {"name": name}
+        ).rowcount
+        if updated:
+            continue
+        try:
+            with db.begin_nested():
+                db.execute(text("INSERT INTO data_versions (name, version) VALUES (:name, 1)"), {"name": name})
+        except IntegrityError:
+            # Created concurrently; still count this write
+            db.execute(text("UPDATE data_versions SET version = version + 1 WHERE name = :name"), {"name": name})
@@ -0,0 +1,250 @@
+# backend/app/services/jobs.py
+"""
+In-process background queue for large notification broadcasts.
+
+Jobs are persisted in `notification_jobs` before they are queued, run on a
+small dedicated thread pool (not Starlette's request threadpool), and commit
+recipients in keyset-ordered chunks. Each chunk's rows and the job's progress
+cursor are committed together, so a job interrupted by a restart resumes
+from `last_recipient` without duplicating notifications.
+
+Several processes may share the table (uvicorn workers, overlapping
+restarts), so a job only runs after a conditional UPDATE claims its lease.
+Progress commits renew the lease and are fenced on the owner: a process
+that lost its lease stops at its next chunk. Leases not renewed within
+NOTIFY_JOB_LEASE_SEC are reclaimed by any process's sweep.
+"""
+import json
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Set
+
+from sqlalchemy import or_, text
+from sqlalchemy.orm import Session
+
+from ..core import logs
+from ..db.session import SessionLocal
+from ..db.models.notification_job import NotificationJob
+from .notifications import audience_sql, create_body, fan_out, next_bound, push_to_connected, restrict
+
+JOB_WORKERS = int(os.getenv("NOTIFY_JOB_WORKERS", "2"))
+JOB_QUEUE_MAX = int(os.getenv("NOTIFY_JOB_QUEUE_MAX", "100"))
+JOB_CHUNK = int(os.getenv("NOTIFY_JOB_CHUNK", "2000"))
+# Audiences larger than this are sent in the background instead of inline
+INLINE_MAX = int(os.getenv("NOTIFY_INLINE_MAX", "1000"))
+# A running job whose heartbeat is older than this is assumed orphaned; must exceed one chunk's time
+JOB_LEASE_SEC = float(os.getenv("NOTIFY_JOB_LEASE_SEC", "300"))
+
+log = logs.get_logger("jobs")
+
+_claim = text("""
+    UPDATE notification_jobs
+    SET status = 'running', owner = :me, heartbeat_at = :now, started_at = COALESCE(started_at, :now)
+    WHERE job_id = :id
+      AND (status = 'queued' OR (status = 'running' AND (heartbeat_at IS NULL OR heartbeat_at < :stale)))
+""")
+
+_progress = text("""
+    UPDATE notification_jobs
+    SET sent = sent + :sent, last_recipient = :upto, heartbeat_at = :now
+    WHERE job_id = :id AND owner = :me AND status = 'running'
+""")
+
+_finish = text("""
+    UPDATE notification_jobs
+    SET status = :status, error = :error, finished_at = :now
+    WHERE job_id = :id AND owner = :me AND status = 'running'
+""")
+
+
+class QueueFull(Exception):
+    pass
+
+
+class JobRunner:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        *,
+        workers: int = JOB_WORKERS,
+        queue_max: int = JOB_QUEUE_MAX,
+        chunk: int = JOB_CHUNK,
+        lease_sec: float = JOB_LEASE_SEC,
+    ):
+        self._session_factory = session_factory
+        self._workers = workers
+        self._chunk = chunk
+        self._lease = timedelta(seconds=lease_sec)
+        self._slots = threading.BoundedSemaphore(queue_max)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # Lease owner name; unique per runner, so a restarted process is a new owner
+        self.owner = f"{socket.gethostname()[:40]}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._inflight: Set[int] = set()
+        self._stop = threading.Event()
+        self._sweeper: Optional[threading.Thread] = None
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="notify-job")
+            return self._pool
+
+    # ---------- producer side ----------
+    def enqueue(self, db: Session, *, sender_id: int, message: str, audience: Dict[str, Any], total: int) -> NotificationJob:
+        """Persist a job and hand it to the pool. Commits `db`."""
+        if not self._slots.acquire(blocking=False):
+            raise QueueFull("Too many notification jobs queued")
+        try:
+            job = NotificationJob(
+                sent_by=sender_id,
+                message=message,
+                body_id=create_body(db, sender_id=sender_id, message=message),
+                audience=json.dumps(audience),
+                status="queued",
+                total=total,
+            )
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+        except Exception:
+            self._slots.release()
+            raise
+        self._submit(job.job_id)
+        return job
+
+    def resume_pending(self) -> int:
+        """Queue jobs that are waiting, or running under an expired lease (a dead process)."""
+        stale = datetime.now() - self._lease
+        with self._session_factory() as db:
+            ids = [
+                j for (j,) in db.query(NotificationJob.job_id)
+                .filter(or_(
+                    NotificationJob.status == "queued",
+                    (NotificationJob.status == "running")
+                    & (NotificationJob.heartbeat_at.is_(None) | (NotificationJob.heartbeat_at < stale)),
+                ))
+                .order_by(NotificationJob.job_id.asc())
+            ]
+        resumed = 0
+        for job_id in ids:
+            with self._lock:
+                if job_id in self._inflight:
+                    continue
+            # Anything beyond the queue bound waits for a later sweep
+            if not self._slots.acquire(blocking=False):
+                break
+            self._submit(job_id)
+            resumed += 1
+        return resumed
+
+    def start(self) -> None:
+        """Resume leftover jobs, then keep reclaiming expired leases in the background."""
+        self.resume_pending()
+        if self._sweeper and self._sweeper.is_alive():
+            return
+        self._stop.clear()
+        self._sweeper = threading.Thread(target=self._sweep, name="notify-job-sweep", daemon=True)
+        self._sweeper.start()
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._stop.set()
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=not wait)
+
+    def _sweep(self) -> None:
+        while not self._stop.wait(self._lease.total_seconds() / 2):
+            try:
+                self.resume_pending()
+            except Exception:
+                log.exception("notification job sweep failed")
+
+    def _submit(self, job_id: int) -> None:
+        with self._lock:
+            self._inflight.add(job_id)
+        try:
+            self._executor().submit(self._run_guarded, job_id)
+        except Exception:
+            with self._lock:
+                self._inflight.discard(job_id)
+            raise
+
+    # ---------- worker side ----------
+    def _run_guarded(self, job_id: int) -> None:
+        try:
+            self.run(job_id)
+        finally:
+            with self._lock:
+                self._inflight.discard(job_id)
+            self._slots.release()
+
+    def claim(self, db: Session, job_id: int) -> bool:
+        """Take the job's lease if it is queued or its lease expired. Commits `db`."""
+        now = datetime.now()
+        claimed = db.execute(_claim, {"id": job_id, "me": self.owner, "now": now, "stale": now - self._lease}).rowcount
+        db.commit()
+        return claimed == 1
+
+    def run(self, job_id: int) -> None:
+        db = self._session_factory()
+        try:
+            # Another process may hold it (or have finished it); only the claimant runs
+            if not self.claim(db, job_id):
+                return
+            job = db.get(NotificationJob, job_id)
+            audience = audience_sql(**json.loads(job.audience))
+            cursor = job.last_recipient
+            while True:
+                upto = next_bound(db, audience, cursor, self._chunk)
+                if upto is None:
+                    break
+                chunk = restrict(audience, cursor, upto)
+                sent = fan_out(db, body_id=job.body_id, audience=chunk)
+                kept = db.execute(_progress, {"id": job_id, "me": self.owner, "sent": sent, "upto": upto,
+                                              "now": datetime.now()}).rowcount
+                if not kept:
+                    # Lease reclaimed by another process: drop this chunk, it resumes from the cursor
+                    db.rollback()
+                    log.warning("notification job lease lost", extra={"fields": {"job_id": job_id, "owner": self.owner}})
+                    return
+                db.commit()
+                cursor = upto
+                push_to_connected(db, chunk)
+
+            db.execute(_finish, {"id": job_id, "me": self.owner, "status": "done", "error": None, "now": datetime.now()})
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            log.exception("notification job failed", extra={"fields": {"job_id": job_id}})
+            db.execute(_finish, {"id": job_id, "me": self.owner, "status": "failed", "error": str(e)[:2000],
+                                 "now": datetime.now()})
+            db.commit()
+        finally:
+            db.close()
+
+
+def job_status(job: NotificationJob) -> Dict[str, Any]:
+    started = job.started_at
+    ended = job.finished_at or (datetime.now() if started else None)
+    elapsed = (ended - started).total_seconds() if started and ended else 0.0
+    return {
+        "job_id": job.job_id,
+        "status": job.status,
+        "total": job.total,
+        "sent": job.sent,
+        "progress": round(job.sent / job.total, 4) if job.total else (1.0 if job.status == "done" else 0.0),
+        "rows_per_sec": round(job.sent / elapsed, 1) if elapsed > 0 else None,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+
+
+runner = JobRunner(SessionLocal)
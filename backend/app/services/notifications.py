@@ -0,0 +1,178 @@
+# backend/app/services/notifications.py
+"""
+Set-based notification fan-out.
+
+A broadcast stores its text once in `notification_bodies`; each recipient
+gets a small receipt row in `notifications` pointing at it.
+
+Every audience is expressed as a single SELECT that yields a `recipient_id`
+column, so a broadcast is one `INSERT ... SELECT` executed inside the
+database instead of one INSERT per student. The number of round trips is
+constant for class/grade/whole-school audiences; explicit id lists are
+shipped in chunks of ID_CHUNK ids per statement.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from ..db import statements
+from ..db.models.notification import NotificationBody
+from .broker import broker
+
+ID_CHUNK = 5000
+
+Audience = Tuple[str, Dict[str, Any]]
+
+
+def audience_sql(
+    *,
+    class_id: Optional[int] = None,
+    grade: Optional[str] = None,
+    student_ids: Optional[List[int]] = None,
+) -> Audience:
+    """Return (SELECT recipient_id ..., params) for the requested audience."""
+    if class_id is not None:
+        # class_students.student_id holds the student's user id
+        return (
+            "SELECT cs.student_id AS recipient_id FROM class_students cs "
+            "WHERE cs.class_id = :class_id",
+            {"class_id": class_id},
+        )
+    if grade is not None:
+        return (
+            "SELECT s.student_id AS recipient_id FROM students s "
+            "WHERE s.grade = :grade",
+            {"grade": grade},
+        )
+    if student_ids is not None:
+        return (
+            "SELECT u.user_id AS recipient_id FROM users u "
+            "WHERE u.role = 'student' AND u.user_id IN :ids",
+            {"ids": sorted(set(student_ids))},
+        )
+    return (
+        "SELECT u.user_id AS recipient_id FROM users u WHERE u.role = 'student'",
+        {},
+    )
+
+
+def _expand(stmt, params: Dict[str, Any]):
+    if "ids" in params:
+        stmt = stmt.bindparams(bindparam("ids", expanding=True))
+    return stmt
+
+
+# The audience counts send_notification runs, for the plan checks
+for _kind, _target in (("class", {"class_id": 1}), ("grade", {"grade": "7"}), ("students", {"student_ids": [28, 29]}),
+                       ("school", {})):
+    _sql, _params = audience_sql(**_target)
+    statements.register(f"notifications.audience_{_kind}",
+                        _expand(text(f"SELECT COUNT(*) FROM ({_sql}) r"), _params), **_params)
+
+
+def count_audience(db: Session, audience: Audience) -> int:
+    select_sql, params = audience
+    if "ids" in params:
+        # Validate explicit lists the same way fan_out will (students only)
+        return sum(
+            db.execute(
+                _expand(text(f"SELECT COUNT(*) FROM ({select_sql}) r"), params),
+                {"ids": params["ids"][i:i + ID_CHUNK]},
+            ).scalar_one()
+            for i in range(0, len(params["ids"]), ID_CHUNK)
+        )
+    return db.execute(text(f"SELECT COUNT(*) FROM ({select_sql}) r"), params).scalar_one()
+
+
+def next_bound(db: Session, audience: Audience, after: int, size: int) -> Optional[int]:
+    """
+    Highest recipient id among the next `size` recipients above `after`, or
+    None when the audience is exhausted. Used for keyset-chunked sends.
+    """
+    select_sql, params = audience
+    if "ids" in params:
+        rest = [i for i in params["ids"] if i > after]
+        return rest[min(size, len(rest)) - 1] if rest else None
+    return db.execute(
+        text(f"""
+            SELECT MAX(c.recipient_id) FROM (
+                SELECT r.recipient_id FROM ({select_sql}) r
+                WHERE r.recipient_id > :after
+                ORDER BY r.recipient_id
+                LIMIT :size
+            ) c
+        """),
+        {**params, "after": after, "size": size},
+    ).scalar()
+
+
+def restrict(audience: Audience, after: int, upto: int) -> Audience:
+    """Narrow `audience` to recipient ids in (after, upto]."""
+    select_sql, params = audience
+    if "ids" in params:
+        return audience_sql(student_ids=[i for i in params["ids"] if after < i <= upto])
+    return (
+        f"SELECT r.recipient_id FROM ({select_sql}) r "
+        "WHERE r.recipient_id > :after AND r.recipient_id <= :upto",
+        {**params, "after": after, "upto": upto},
+    )
+
+
+def _insert_stmt(select_sql: str, params: Dict[str, Any]):
+    return _expand(text(f"""
+        INSERT INTO notifications (sent_to, body_id)
+        SELECT r.recipient_id, :bid
+        FROM ({select_sql}) r
+    """), params)
+
+
+def create_body(db: Session, *, sender_id: int, message: str) -> int:
+    """Store the broadcast text once and return its body_id. Does not commit."""
+    body = NotificationBody(sent_by=sender_id, message=message)
+    db.add(body)
+    db.flush()
+    return body.body_id
+
+
+def fan_out(db: Session, *, body_id: int, audience: Audience) -> int:
+    """
+    Insert one receipt for `body_id` per recipient of `audience` and return
+    how many rows were written. Does not commit; the caller owns the
+    transaction.
+    """
+    select_sql, params = audience
+    base = {"bid": body_id}
+
+    if "ids" not in params:
+        result = db.execute(_insert_stmt(select_sql, params), {**base, **params})
+        return result.rowcount
+
+    stmt = _insert_stmt(select_sql, params)
+    ids = params["ids"]
+    sent = 0
+    for i in range(0, len(ids), ID_CHUNK):
+        result = db.execute(stmt, {**base, "ids": ids[i:i + ID_CHUNK]})
+        sent += result.rowcount
+    return sent
+
+
+def push_to_connected(db: Session, audience: Audience, delta: int = 1) -> None:
+    """
+    Publish an unread-count delta to recipients in `audience` that currently
+    hold an open stream. Costs nothing when nobody is connected.
+    """
+    connected = broker.connected()
+    if not connected:
+        return
+    select_sql, params = audience
+    if "ids" in params:
+        wanted = set(params["ids"])
+        broker.publish_delta([uid for uid in connected if uid in wanted], delta)
+        return
+    stmt = text(
+        f"SELECT r.recipient_id FROM ({select_sql}) r WHERE r.recipient_id IN :connected"
+    ).bindparams(bindparam("connected", expanding=True))
+    for i in range(0, len(connected), ID_CHUNK):
+        rows = db.execute(stmt, {**params, "connected": connected[i:i + ID_CHUNK]})
+        broker.publish_delta([r[0] for r in rows], delta)
@@ -0,0 +1,114 @@
+# backend/app/services/read_marks.py
+"""
+Read state for notifications as a per-user watermark.
+
+A notification is read when its id is at or below the recipient's
+`notification_read_marks.last_read_id`, or when its own `is_read` flag is
+set. The flag is only written for exceptions (a single message opened
+above the watermark), so "mark all read" is one row write and the unread
+count only visits rows newer than the watermark.
+"""
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..db import statements
+from ..db.models.notification import Notification, NotificationReadMark
+
+# date_sent comes from each INSERT's start time, so a slow broadcast can commit
+# rows with a higher id but a slightly older timestamp than the watermark row.
+# The range scan starts this far before the watermark to still see them.
+WATERMARK_SLACK = timedelta(minutes=5)
+
+_unread_all = statements.register("read_marks.unread_all", text(
+    "SELECT COUNT(*) FROM notifications WHERE sent_to = :sid AND is_read = 0"
+), sid=28)
+
+_unread_since = statements.register("read_marks.unread_since", text("""
+    SELECT COUNT(*) FROM notifications
+    WHERE sent_to = :sid
+      AND date_sent >= :since
+      AND notification_id > :wm
+      AND is_read = 0
+"""), sid=28, since="2026-03-20 00:00:00", wm=0)
+
+_mark_one = statements.register("read_marks.mark_one_read", text("""
+    UPDATE notifications SET is_read = 1
+    WHERE notification_id = :nid AND sent_to = :sid
+      AND is_read = 0 AND notification_id > :wm
+"""), nid=1, sid=28, wm=0)
+
+# Only ever moves forward, so concurrent "mark all read" calls keep the greater watermark
+_raise_mark = statements.register("read_marks.raise_mark", text("""
+    UPDATE notification_read_marks SET last_read_id = :wm, last_read_at = :at
+    WHERE user_id = :sid AND last_read_id < :wm
+"""), sid=28, wm=1, at="2026-03-20 00:00:00")
+
+_insert_mark = text(
+    "INSERT INTO notification_read_marks (user_id, last_read_id, last_read_at) VALUES (:sid, :wm, :at)"
+)
+
+
+def get_mark(db: Session, user_id: int) -> Optional[NotificationReadMark]:
+    return db.get(NotificationReadMark, user_id)
+
+
+def unread_count(db: Session, user_id: int) -> int:
+    mark = get_mark(db, user_id)
+    if mark is None or mark.last_read_at is None:
+        row = db.execute(_unread_all, {"sid": user_id}).scalar_one()
+    else:
+        row = db.execute(
+            _unread_since,
+            {"sid": user_id, "since": mark.last_read_at - WATERMARK_SLACK, "wm": mark.last_read_id},
+        ).scalar_one()
+    return int(row or 0)
+
+
+async def aget_mark(db: AsyncSession, user_id: int) -> Optional[NotificationReadMark]:
+    return await db.get(NotificationReadMark, user_id)
+
+
+async def aunread_count(db: AsyncSession, user_id: int) -> int:
+    return await db.run_sync(unread_count, user_id)
+
+
+def mark_all_read(db: Session, user_id: int) -> None:
+    """Move the watermark past every notification the user has. Does not commit."""
+    # Highest id and latest date separately: the row with the highest id may be
+    # older (see WATERMARK_SLACK), and ids decide what is read
+    last_id, last_at = db.execute(
+        select(func.max(Notification.notification_id), func.max(Notification.date_sent))
+        .where(Notification.sent_to == user_id)
+    ).one()
+    if last_id is None:
+        return
+    params = {"sid": user_id, "wm": last_id, "at": last_at}
+    mark = get_mark(db, user_id)
+    if mark is not None:
+        if last_id > mark.last_read_id:
+            db.execute(_raise_mark, params)
+        return
+    try:
+        with db.begin_nested():
+            db.execute(_insert_mark, params)
+    except IntegrityError:
+        # First mark created concurrently (two tabs, a retry)
+        db.execute(_raise_mark, params)
+
+
+def mark_one_read(db: Session, user_id: int, notification_id: int) -> bool:
+    """
+    Flag a single notification as read. Returns True if that changed its
+    state (it was above the watermark and unflagged). Does not commit.
+    """
+    mark = get_mark(db, user_id)
+    result = db.execute(
+        _mark_one,
+        {"nid": notification_id, "sid": user_id, "wm": mark.last_read_id if mark else 0},
+    )
+    return result.rowcount > 0
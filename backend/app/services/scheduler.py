@@ -0,0 +1,353 @@
+# backend/app/services/scheduler.py
+"""
+Weekly timetable generator.
+
+Input: classes with their teacher and sessions per week, class membership
+(`class_students`) and the school's periods. Output: a period for every
+session such that no teacher or student is in two places at once, a class
+meets at most CLASS_MAX_PER_DAY times a day and a teacher teaches at most
+`max_periods_per_day` periods a day.
+
+Two classes conflict when they share the teacher or any student. Periods
+are bits of an int, so the periods a class cannot use are the OR of its
+neighbours' masks. Sessions are placed most-constrained first. If a session
+has no free period, it takes the period that displaces the fewest
+neighbouring sessions, and those go back on the queue; a short tabu list
+stops the same move from repeating. The best assignment seen is kept and
+returned when the queue empties or the time budget runs out.
+
+Incremental re-solve: classes that are not being scheduled are passed as
+`pinned` sessions. They only block periods for the classes being placed
+and are never moved.
+"""
+import heapq
+import os
+import random
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from .timetables import ID_CHUNK, fmt_minutes, to_minutes
+
+TIME_BUDGET_MS = int(os.getenv("SCHEDULER_TIME_BUDGET_MS", "5000"))
+MAX_PERIODS_PER_DAY = int(os.getenv("SCHEDULER_MAX_PERIODS_PER_DAY", "6"))
+CLASS_MAX_PER_DAY = 1
+TABU_TENURE = 10
+
+DEFAULT_DAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday")
+DEFAULT_TIMES = (
+    ("08:30", "09:20"), ("09:25", "10:15"), ("10:35", "11:25"), ("11:30", "12:20"),
+    ("13:10", "14:00"), ("14:05", "14:55"), ("15:00", "15:50"),
+)
+
+
+@dataclass(frozen=True)
+class Period:
+    day: str
+    start: int   # minutes after midnight
+    end: int
+
+
+@dataclass
+class ClassLoad:
+    class_id: int
+    teacher_id: int
+    sessions: int
+    students: Set[int] = field(default_factory=set)
+
+
+@dataclass(frozen=True)
+class PinnedSession:
+    class_id: int
+    teacher_id: int
+    day: str
+    start: int
+    end: int
+    students: Tuple[int, ...]
+
+
+@dataclass
+class Schedule:
+    placements: Dict[int, List[int]]           # class_id -> period indexes
+    unplaced: Dict[int, int]                   # class_id -> sessions left without a period
+    periods: List[Period]
+    elapsed_ms: float
+    iterations: int
+
+    @property
+    def ok(self) -> bool:
+        return not self.unplaced
+
+
+def default_periods() -> List[Period]:
+    return [Period(d, to_minutes(s), to_minutes(e)) for d in DEFAULT_DAYS for s, e in DEFAULT_TIMES]
+
+
+def solve(
+    periods: List[Period],
+    loads: List[ClassLoad],
+    *,
+    pinned: Iterable[PinnedSession] = (),
+    max_periods_per_day: int = MAX_PERIODS_PER_DAY,
+    time_budget_ms: int = TIME_BUDGET_MS,
+    seed: int = 0,
+) -> Schedule:
+    started = time.perf_counter()
+    deadline = started + time_budget_ms / 1000
+    rng = random.Random(seed)
+
+    n_periods = len(periods)
+    full = (1 << n_periods) - 1
+    days = sorted({p.day for p in periods}, key=lambda d: min(i for i, p in enumerate(periods) if p.day == d))
+    day_of = [days.index(p.day) for p in periods]
+    day_mask = [sum(1 << i for i in range(n_periods) if day_of[i] == d) for d in range(len(days))]
+
+    by_id = {c.class_id: c for c in loads}
+    ids = list(by_id)
+
+    # ---- conflict graph among the classes being placed ----
+    nb: Dict[int, Set[int]] = {c: set() for c in ids}
+    by_teacher: Dict[int, List[int]] = defaultdict(list)
+    by_student: Dict[int, List[int]] = defaultdict(list)
+    for c in loads:
+        by_teacher[c.teacher_id].append(c.class_id)
+        for s in c.students:
+            by_student[s].append(c.class_id)
+    for group in list(by_teacher.values()) + list(by_student.values()):
+        for a in group:
+            nb[a].update(group)
+    for c in ids:
+        nb[c].discard(c)
+
+    # ---- periods blocked by pinned sessions ----
+    def overlapping(day: str, start: int, end: int) -> int:
+        return sum(1 << i for i, p in enumerate(periods) if p.day == day and p.start < end and start < p.end)
+
+    blocked: Dict[int, int] = {c: 0 for c in ids}
+    teacher_day: Dict[Tuple[int, int], int] = defaultdict(int)
+    student_block: Dict[int, int] = defaultdict(int)
+    teacher_block: Dict[int, int] = defaultdict(int)
+    for ps in pinned:
+        m = overlapping(ps.day, ps.start, ps.end)
+        teacher_block[ps.teacher_id] |= m
+        for s in ps.students:
+            student_block[s] |= m
+        if ps.day in days:
+            teacher_day[(ps.teacher_id, days.index(ps.day))] += 1
+    for c in loads:
+        m = teacher_block.get(c.teacher_id, 0)
+        for s in c.students:
+            m |= student_block.get(s, 0)
+        blocked[c.class_id] = m
+
+    # ---- search state ----
+    mask: Dict[int, int] = {c: 0 for c in ids}
+    occ: List[Set[int]] = [set() for _ in range(n_periods)]
+    class_day: Dict[Tuple[int, int], int] = defaultdict(int)
+    tabu: Dict[Tuple[int, int], int] = {}
+
+    def place(c: int, p: int) -> None:
+        mask[c] |= 1 << p
+        occ[p].add(c)
+        class_day[(c, day_of[p])] += 1
+        teacher_day[(by_id[c].teacher_id, day_of[p])] += 1
+
+    def evict(c: int, p: int) -> None:
+        mask[c] &= ~(1 << p)
+        occ[p].discard(c)
+        class_day[(c, day_of[p])] -= 1
+        teacher_day[(by_id[c].teacher_id, day_of[p])] -= 1
+
+    def open_days(c: int, *, teacher_cap: bool = True) -> int:
+        """Periods on days where the class (and, optionally, its teacher) is under the daily cap."""
+        t = by_id[c].teacher_id
+        ok = 0
+        for d, dm in enumerate(day_mask):
+            if class_day[(c, d)] < CLASS_MAX_PER_DAY and (
+                not teacher_cap or teacher_day[(t, d)] < max_periods_per_day
+            ):
+                ok |= dm
+        return ok
+
+    def requeue(n: int, p: int) -> None:
+        nonlocal counter
+        evict(n, p)
+        tabu[(n, p)] = iterations + TABU_TENURE
+        counter += 1
+        heapq.heappush(queue, (priority[n], counter, n))
+
+    # Most constrained first: many neighbours and many sessions
+    priority = {c: -(len(nb[c]) + 1) * by_id[c].sessions - bin(blocked[c]).count("1") for c in ids}
+    queue: List[Tuple[int, int, int]] = []
+    counter = 0
+    for c in ids:
+        for _ in range(by_id[c].sessions):
+            counter += 1
+            heapq.heappush(queue, (priority[c], counter, c))
+
+    best_left = len(queue) + 1
+    best: Dict[int, int] = {}
+    iterations = stuck = 0
+    while queue and time.perf_counter() < deadline:
+        iterations += 1
+        _, _, c = heapq.heappop(queue)
+        busy = blocked[c] | mask[c]
+        for n in nb[c]:
+            busy |= mask[n]
+        allowed = ~busy & full & open_days(c)
+
+        if allowed:
+            # Prefer the busiest free period: packing compatible classes
+            # together leaves whole periods free for the dense ones
+            choices = [p for p in range(n_periods) if allowed >> p & 1]
+            p = max(choices, key=lambda i: (len(occ[i]), rng.random()))
+            place(c, p)
+        else:
+            # Displacement may also free a teacher's day by moving one of
+            # their other sessions, so only the class's own cap is hard here
+            candidates = ~(blocked[c] | mask[c]) & full & open_days(c, teacher_cap=False)
+            if not candidates:
+                # Pinned sessions leave nothing to displace
+                stuck += 1
+                continue
+            t = by_id[c].teacher_id
+            best_p, best_cost = -1, None
+            for p in range(n_periods):
+                if not candidates >> p & 1:
+                    continue
+                cost = len(occ[p] & nb[c]) + (teacher_day[(t, day_of[p])] >= max_periods_per_day)
+                cost += (100 if tabu.get((c, p), -1) > iterations else 0) + rng.random()
+                if best_cost is None or cost < best_cost:
+                    best_p, best_cost = p, cost
+            for n in list(occ[best_p] & nb[c]):
+                requeue(n, best_p)
+            d = day_of[best_p]
+            if teacher_day[(t, d)] >= max_periods_per_day:
+                same_day = [(n, q) for q in range(n_periods) if day_of[q] == d
+                            for n in occ[q] if n != c and by_id[n].teacher_id == t]
+                if same_day:
+                    requeue(*rng.choice(same_day))
+            place(c, best_p)
+
+        if len(queue) + stuck < best_left:
+            best_left = len(queue) + stuck
+            best = dict(mask)
+
+    if not best:
+        best = dict(mask)
+    placements = {c: [p for p in range(n_periods) if best.get(c, 0) >> p & 1] for c in ids}
+    unplaced = {c: by_id[c].sessions - len(placements[c]) for c in ids if len(placements[c]) < by_id[c].sessions}
+    return Schedule(
+        placements=placements,
+        unplaced=unplaced,
+        periods=periods,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 1),
+        iterations=iterations,
+    )
+
+
+# ---------- DB side ----------
+def load_students(db: Session, class_ids: Iterable[int]) -> Dict[int, Set[int]]:
+    ids = sorted(set(class_ids))
+    members: Dict[int, Set[int]] = {c: set() for c in ids}
+    q = text("SELECT class_id, student_id FROM class_students WHERE class_id IN :ids").bindparams(
+        bindparam("ids", expanding=True)
+    )
+    for i in range(0, len(ids), ID_CHUNK):
+        for class_id, student_id in db.execute(q, {"ids": ids[i:i + ID_CHUNK]}):
+            members[class_id].add(student_id)
+    return members
+
+
+def load_pinned(db: Session, exclude_class_ids: Iterable[int]) -> List[PinnedSession]:
+    """Existing sessions of every class not being re-solved."""
+    skip = set(exclude_class_ids)
+    sessions: Dict[Tuple[int, int, str, int, int], List[int]] = defaultdict(list)
+    rows = db.execute(text(
+        "SELECT class_id, teacher_id, day_of_week, start_time, end_time, student_id FROM timetables"
+    ))
+    for class_id, teacher_id, day, start, end, student_id in rows:
+        if class_id not in skip:
+            sessions[(class_id, teacher_id, day, to_minutes(start), to_minutes(end))].append(student_id)
+    return [PinnedSession(c, t, d, s, e, tuple(st)) for (c, t, d, s, e), st in sessions.items()]
+
+
+def timetable_rows(schedule: Schedule, loads: List[ClassLoad]) -> Iterable[Dict[str, Any]]:
+    """One timetables row per student per placed session."""
+    for c in loads:
+        for p in schedule.placements.get(c.class_id, ()):
+            period = schedule.periods[p]
+            for s in sorted(c.students):
+                yield {
+                    "student_id": s, "teacher_id": c.teacher_id, "class_id": c.class_id,
+                    "day_of_week": period.day,
+                    "start_time": fmt_minutes(period.start) + ":00", "end_time": fmt_minutes(period.end) + ":00",
+                }
+
+
+def write(db: Session, schedule: Schedule, loads: List[ClassLoad], *, replace_all: bool,
+          batch: int = 5000) -> Tuple[int, Set[int], Set[int]]:
+    """
+    Replace the timetable rows of the scheduled classes (or of every class
+    when `replace_all`) with the schedule. Returns (rows written, students
+    and teachers whose timetables changed). Commits.
+    """
+    class_ids = sorted(c.class_id for c in loads)
+    students: Set[int] = set()
+    teachers: Set[int] = {c.teacher_id for c in loads}
+    try:
+        if replace_all:
+            for s, t in db.execute(text("SELECT DISTINCT student_id, teacher_id FROM timetables")):
+                students.add(s)
+                teachers.add(t)
+            db.execute(text("DELETE FROM timetables"))
+        else:
+            q_owners = text("SELECT DISTINCT student_id, teacher_id FROM timetables WHERE class_id IN :ids").bindparams(
+                bindparam("ids", expanding=True)
+            )
+            q_delete = text("DELETE FROM timetables WHERE class_id IN :ids").bindparams(bindparam("ids", expanding=True))
+            for i in range(0, len(class_ids), ID_CHUNK):
+                chunk = class_ids[i:i + ID_CHUNK]
+                for s, t in db.execute(q_owners, {"ids": chunk}):
+                    students.add(s)
+                    teachers.add(t)
+                db.execute(q_delete, {"ids": chunk})
+
+        insert = text("""
+            INSERT INTO timetables (student_id, teacher_id, class_id, day_of_week, start_time, end_time)
+            VALUES (:student_id, :teacher_id, :class_id, :day_of_week, :start_time, :end_time)
+        """)
+        written, pending = 0, []
+        for row in timetable_rows(schedule, loads):
+            students.add(row["student_id"])
+            pending.append(row)
+            if len(pending) >= batch:
+                db.execute(insert, pending)
+                written, pending = written + len(pending), []
+        if pending:
+            db.execute(insert, pending)
+            written += len(pending)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return written, students, teachers
+
+
+def summary(schedule: Schedule) -> Dict[str, Any]:
+    return {
+        "ok": schedule.ok,
+        "sessions_placed": sum(len(v) for v in schedule.placements.values()),
+        "unplaced": [{"class_id": c, "sessions": n} for c, n in sorted(schedule.unplaced.items())],
+        "elapsed_ms": schedule.elapsed_ms,
+        "iterations": schedule.iterations,
+        "placements": {
+            c: [{"day": schedule.periods[p].day, "start": fmt_minutes(schedule.periods[p].start),
+                 "end": fmt_minutes(schedule.periods[p].end)} for p in ps]
+            for c, ps in schedule.placements.items()
+        },
+    }
@@ -0,0 +1,179 @@
+# backend/app/services/teacher_schedule.py
+"""
+Teacher schedules over a date range.
+
+Timetables repeat weekly, so a teacher's schedule is one weekly pattern
+(lessons per weekday) projected onto the dates asked for. Patterns come from
+one grouped query over idx_timetables_teacher_day_start: a lesson given to
+30 students is one row with students=30, not 30 rows. Patterns are cached
+per teacher and keyed by `teacher_schedule_versions`, which timetable writes
+bump. A request costs one primary-key lookup of versions, plus a grouped
+query for the teachers whose cached pattern is out of date. The TTL bounds
+staleness from edits that do not bump the version, such as a student's
+grade changing.
+
+Times are returned as ISO strings ("09:00:00"); the client formats them.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from ..db import statements
+from ..db.models.timetable import DAYS
+from .timetables import ID_CHUNK, fmt_minutes, to_minutes
+
+SCHEDULE_CACHE_TTL_SEC = float(os.getenv("TEACHER_SCHEDULE_CACHE_TTL_SEC", "300"))
+SCHEDULE_CACHE_MAX = int(os.getenv("TEACHER_SCHEDULE_CACHE_MAX", "2000"))
+MAX_RANGE_DAYS = 366
+
+Pattern = Dict[str, List[Dict[str, Any]]]   # weekday -> lessons ordered by start
+
+_versions = statements.register("teacher_schedule.versions", text(
+    "SELECT teacher_id, version FROM teacher_schedule_versions WHERE teacher_id IN :ids"
+).bindparams(bindparam("ids", expanding=True)), ids=[3, 4])
+
+_lessons = statements.register("teacher_schedule.lessons", text("""
+    SELECT t.teacher_id, t.day_of_week, t.start_time, t.end_time, t.class_id,
+           c.class_name, c.description,
+           s.grade, COUNT(*) AS students
+    FROM timetables t
+    JOIN classes c ON c.class_id = t.class_id
+    LEFT JOIN students s ON s.student_id = t.student_id
+    WHERE t.teacher_id IN :ids
+    GROUP BY t.teacher_id, t.day_of_week, t.start_time, t.end_time, t.class_id, c.class_name, c.description, s.grade
+""").bindparams(bindparam("ids", expanding=True)), ids=[3, 4])
+
+
+class PatternCache:
+    """LRU of (version, weekly pattern) per teacher with a TTL."""
+
+    def __init__(self, ttl: float = SCHEDULE_CACHE_TTL_SEC, maxsize: int = SCHEDULE_CACHE_MAX):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[int, Tuple[float, int, Pattern]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, teacher_id: int, version: int):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(teacher_id)
+            if entry is None or entry[0] <= now or entry[1] != version:
+                self.misses += 1
+                return None
+            self._data.move_to_end(teacher_id)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, teacher_id: int, version: int, pattern: Pattern) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._data[teacher_id] = (time.monotonic() + self.ttl, version, pattern)
+            self._data.move_to_end(teacher_id)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+pattern_cache = PatternCache()
+
+
+def versions(db: Session, teacher_ids: List[int]) -> Dict[int, int]:
+    """Current schedule version per teacher (0 if never written)."""
+    found = {t: 0 for t in teacher_ids}
+    for i in range(0, len(teacher_ids), ID_CHUNK):
+        found.update(db.execute(_versions, {"ids": teacher_ids[i:i + ID_CHUNK]}).all())
+    return found
+
+
+def _grade_key(grade: str) -> Tuple[int, int, str]:
+    # grade is a string column: numeric grades order as numbers ("9" < "10"), others after them
+    return (0, int(grade), "") if grade.isdigit() else (1, 0, grade)
+
+
+def _load_patterns(db: Session, teacher_ids: List[int]) -> Dict[int, Pattern]:
+    patterns: Dict[int, Pattern] = {t: defaultdict(list) for t in teacher_ids}
+    for i in range(0, len(teacher_ids), ID_CHUNK):
+        # One row per lesson and grade; folded into one lesson with its grade range
+        merged: Dict[Tuple, Dict[str, Any]] = {}
+        for r in db.execute(_lessons, {"ids": teacher_ids[i:i + ID_CHUNK]}).mappings():
+            key = (r["teacher_id"], r["day_of_week"], r["start_time"], r["end_time"], r["class_id"])
+            lesson = merged.get(key)
+            if lesson is None:
+                lesson = merged[key] = {
+                    "class_id": r["class_id"],
+                    "subject": r["class_name"],
+                    "description": r["description"],
+                    "start": fmt_minutes(to_minutes(r["start_time"])) + ":00",
+                    "end": fmt_minutes(to_minutes(r["end_time"])) + ":00",
+                    "students": 0,
+                    "grade_min": None,
+                    "grade_max": None,
+                }
+                patterns[r["teacher_id"]][r["day_of_week"]].append(lesson)
+            lesson["students"] += r["students"]
+            grade = r["grade"]
+            if grade:
+                if lesson["grade_min"] is None or _grade_key(grade) < _grade_key(lesson["grade_min"]):
+                    lesson["grade_min"] = grade
+                if lesson["grade_max"] is None or _grade_key(grade) > _grade_key(lesson["grade_max"]):
+                    lesson["grade_max"] = grade
+    for pattern in patterns.values():
+        for lessons in pattern.values():
+            lessons.sort(key=lambda lesson: (lesson["start"], lesson["end"], lesson["class_id"]))
+    return {t: dict(p) for t, p in patterns.items()}
+
+
+def weekly_patterns(
+    db: Session, teacher_ids: Iterable[int], current: Optional[Dict[int, int]] = None
+) -> Dict[int, Tuple[int, Pattern]]:
+    """`current` takes versions the caller already read (e.g. for an ETag)."""
+    ids = sorted(set(teacher_ids))
+    if current is None:
+        current = versions(db, ids)
+    out: Dict[int, Tuple[int, Pattern]] = {}
+    stale = []
+    for t in ids:
+        cached = pattern_cache.get(t, current[t])
+        if cached is None:
+            stale.append(t)
+        else:
+            out[t] = (current[t], cached)
+    if stale:
+        for t, pattern in _load_patterns(db, stale).items():
+            pattern_cache.put(t, current[t], pattern)
+            out[t] = (current[t], pattern)
+    return out
+
+
+def staleness_epoch() -> int:
+    """
+    Changes once per cache TTL. Grade or class-name edits do not bump
+    versions, so anything keyed by version alone (like an ETag) includes
+    this too to get the same staleness bound as the cache.
+    """
+    return int(time.time() // SCHEDULE_CACHE_TTL_SEC) if SCHEDULE_CACHE_TTL_SEC > 0 else time.time_ns()
+
+
+def week_of(day: date) -> Tuple[date, date]:
+    monday = day - timedelta(days=day.weekday())
+    return monday, monday + timedelta(days=6)
+
+
+def expand(pattern: Pattern, start: date, end: date) -> List[Dict[str, Any]]:
+    """Dated lessons between start and end inclusive; days without lessons are omitted."""
+    days = []
+    d = start
+    while d <= end:
+        lessons = pattern.get(DAYS[d.weekday()])
+        if lessons:
+            days.append({"date": d.isoformat(), "day": DAYS[d.weekday()], "lessons": lessons})
+        d += timedelta(days=1)
+    return days
@@ -0,0 +1,208 @@
+# backend/app/services/timetable_snapshots.py
+"""
+Materialized weekly timetables.
+
+Timetables change a few times a term but are read on every dashboard load,
+so each student's week is built once into `timetable_snapshots` as ready-
+to-send JSON. Reads are a single primary-key lookup; timetable writes call
+`rebuild()` for just the students they touched, which bumps the snapshot's
+`version`.
+
+Rebuild everything (e.g. after loading timetables with raw SQL):
+    python -m backend.app.services.timetable_snapshots
+"""
+import json
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..db import statements
+from ..db.models.timetable import DAYS
+from ..db.replicas import use_primary
+
+ID_CHUNK = 1000
+DAY_INDEX = {d: i for i, d in enumerate(DAYS)}
+
+_rows_for = statements.register("timetable_snapshots.rows_for", text("""
+    SELECT tt.student_id, tt.day_of_week AS day, tt.start_time AS start, tt.end_time AS end,
+           c.class_name AS subject, u.full_name AS teacher
+    FROM timetables tt
+    JOIN classes c ON c.class_id = tt.class_id
+    LEFT JOIN users u ON u.user_id = tt.teacher_id
+    WHERE tt.student_id IN :ids
+""").bindparams(bindparam("ids", expanding=True)), ids=[28, 29])
+
+_versions_for = statements.register("timetable_snapshots.versions_for", text(
+    "SELECT student_id, version FROM timetable_snapshots WHERE student_id IN :ids"
+).bindparams(bindparam("ids", expanding=True)), ids=[28, 29])
+_taught_by = statements.register("timetable_snapshots.taught_by", text(
+    "SELECT DISTINCT student_id FROM timetables WHERE teacher_id = :tid"
+), tid=3)
+_version_of = statements.register("timetable_snapshots.version_of", text(
+    "SELECT version FROM timetable_snapshots WHERE student_id = :sid"
+), sid=28)
+_snapshot_of = statements.register("timetable_snapshots.snapshot_of", text(
+    "SELECT version, week FROM timetable_snapshots WHERE student_id = :sid"
+), sid=28)
+
+
+def fmt_time(value: Any) -> str:
+    """TIME columns arrive as timedelta (MySQL), time, or 'HH:MM:SS' text (SQLite)."""
+    if isinstance(value, timedelta):
+        minutes = int(value.total_seconds()) // 60
+        return f"{minutes // 60:02d}:{minutes % 60:02d}"
+    if isinstance(value, time):
+        return value.strftime("%H:%M")
+    return str(value)[:5]
+
+
+def _chunks(ids: List[int]) -> Iterable[List[int]]:
+    for i in range(0, len(ids), ID_CHUNK):
+        yield ids[i:i + ID_CHUNK]
+
+
+def build_weeks(db: Session, student_ids: Iterable[int]) -> Dict[int, List[Dict[str, Any]]]:
+    """Compute the week structure for each student (empty list if none)."""
+    ids = sorted(set(student_ids))
+    lessons: Dict[int, set] = {sid: set() for sid in ids}
+    for chunk in _chunks(ids):
+        for r in db.execute(_rows_for, {"ids": chunk}).mappings():
+            # A set drops duplicate rows, as the old SELECT DISTINCT did
+            lessons[r["student_id"]].add(
+                (DAY_INDEX[r["day"]], fmt_time(r["start"]), fmt_time(r["end"]), r["subject"], r["teacher"])
+            )
+
+    weeks: Dict[int, List[Dict[str, Any]]] = {}
+    for sid, items in lessons.items():
+        week: List[Dict[str, Any]] = []
+        for day, start, end, subject, teacher in sorted(items, key=lambda x: (x[0], x[1], x[2], x[3], x[4] or "")):
+            if not week or week[-1]["day"] != DAYS[day]:
+                week.append({"day": DAYS[day], "items": []})
+            week[-1]["items"].append({"subject": subject, "teacher": teacher, "start": start, "end": end})
+        weeks[sid] = week
+    return weeks
+
+
+def rebuild(db: Session, student_ids: Iterable[int]) -> int:
+    """Rebuild snapshots of the given students and bump their versions. Commits."""
+    # Build from, and compare versions against, what is about to be overwritten
+    use_primary(db)
+    weeks = build_weeks(db, student_ids)
+    if not weeks:
+        return 0
+    now = datetime.now()
+    payload = {sid: json.dumps(week, separators=(",", ":")) for sid, week in weeks.items()}
+
+    existing = set()
+    for chunk in _chunks(list(payload)):
+        existing.update(sid for sid, _ in db.execute(_versions_for, {"ids": chunk}))
+
+    missing = [sid for sid in payload if sid not in existing]
+    if missing:
+        try:
+            with db.begin_nested():
+                db.execute(
+                    text("INSERT INTO timetable_snapshots (student_id, version, week, built_at) VALUES (:sid, 1, :week, :now)"),
+                    [{"sid": sid, "week": payload[sid], "now": now} for sid in missing],
+                )
+        except IntegrityError:
+            # A concurrent rebuild created some of them first; update those instead
+            existing.update(missing)
+    if existing:
+        db.execute(
+            text("UPDATE timetable_snapshots SET version = version + 1, week = :week, built_at = :now WHERE student_id = :sid"),
+            [{"sid": sid, "week": payload[sid], "now": now} for sid in existing],
+        )
+    db.commit()
+    return len(payload)
+
+
+def touch_teachers(db: Session, teacher_ids: Iterable[int]) -> None:
+    """Bump the schedule version of each teacher whose rows changed. Commits."""
+    ids = sorted(set(teacher_ids))
+    if not ids:
+        return
+    db.execute(
+        text("UPDATE teacher_schedule_versions SET version = version + 1 WHERE teacher_id = :tid"),
+        [{"tid": t} for t in ids],
+    )
+    known = set()
+    q = text("SELECT teacher_id FROM teacher_schedule_versions WHERE teacher_id IN :ids").bindparams(
+        bindparam("ids", expanding=True)
+    )
+    for chunk in _chunks(ids):
+        known.update(t for (t,) in db.execute(q, {"ids": chunk}))
+    missing = [t for t in ids if t not in known]
+    if missing:
+        try:
+            with db.begin_nested():
+                db.execute(
+                    text("INSERT INTO teacher_schedule_versions (teacher_id, version) VALUES (:tid, 1)"),
+                    [{"tid": t} for t in missing],
+                )
+        except IntegrityError:
+            pass   # created concurrently, and that writer bumped it
+    db.commit()
+
+
+def rebuild_all(db: Session) -> int:
+    ids = [sid for (sid,) in db.execute(text("SELECT DISTINCT student_id FROM timetables"))]
+    ids += [sid for (sid,) in db.execute(text("SELECT student_id FROM timetable_snapshots"))]
+    return rebuild(db, ids)
+
+
+def drop(db: Session, student_ids: Iterable[int]) -> None:
+    """Forget snapshots of deleted students. Does not commit."""
+    ids = list(student_ids)
+    for chunk in _chunks(ids):
+        db.execute(
+            text("DELETE FROM timetable_snapshots WHERE student_id IN :ids").bindparams(bindparam("ids", expanding=True)),
+            {"ids": chunk},
+        )
+
+
+def students_taught_by(db: Session, teacher_id: int) -> List[int]:
+    """Students whose snapshots embed this teacher's name."""
+    return [sid for (sid,) in db.execute(_taught_by, {"tid": teacher_id})]
+
+
+def version_of(db: Session, student_id: int) -> Optional[int]:
+    """Snapshot version without reading the week; None if not built yet."""
+    return db.execute(_version_of, {"sid": student_id}).scalar()
+
+
+def get_snapshot(db: Session, student_id: int) -> Tuple[int, str]:
+    """(version, week JSON) for one student, building the snapshot on first use."""
+    row = db.execute(_snapshot_of, {"sid": student_id}).first()
+    if row is None:
+        rebuild(db, [student_id])
+        row = db.execute(_snapshot_of, {"sid": student_id}).first()
+    return int(row[0]), row[1]
+
+
+async def aversion_of(db: AsyncSession, student_id: int) -> Optional[int]:
+    return await db.scalar(_version_of, {"sid": student_id})
+
+
+async def aget_snapshot(db: AsyncSession, student_id: int) -> Tuple[int, str]:
+    """get_snapshot for async routes; a missing snapshot is built with the sync code on the same connection."""
+    row = (await db.execute(_snapshot_of, {"sid": student_id})).first()
+    if row is None:
+        await db.run_sync(rebuild, [student_id])
+        row = (await db.execute(_snapshot_of, {"sid": student_id})).first()
+    return int(row[0]), row[1]
+
+
+def main() -> None:
+    from ..db.session import SessionLocal
+
+    with SessionLocal() as db:
+        print(f"Rebuilt {rebuild_all(db)} timetable snapshots")
+
+
+if __name__ == "__main__":
+    main()
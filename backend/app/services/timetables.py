@@ -0,0 +1,207 @@
+# backend/app/services/timetables.py
+"""
+Timetable conflict detection.
+
+Entries are indexed per (teacher, day) and per (student, day), each bucket
+sorted by start time, and every bucket is swept once: an entry conflicts
+with the entry that, among those before it, ends latest if it starts before
+that end. Validating n entries therefore costs O(n log n) plus one set-based
+load of the existing rows of the teachers and students involved, rather
+than an overlap query per row.
+
+Timetables hold one row per student, so a lesson taught to a class appears
+once per student. Teacher buckets collapse rows with the same class and
+times into one session before sweeping; only different sessions that
+overlap count as a double booking.
+"""
+from datetime import time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+ID_CHUNK = 1000
+
+
+def to_minutes(value: Any) -> int:
+    """Minutes after midnight for TIME values (timedelta, time, 'HH:MM[:SS]' or minutes)."""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, timedelta):
+        return int(value.total_seconds()) // 60
+    if isinstance(value, time):
+        return value.hour * 60 + value.minute
+    h, m = str(value).split(":")[:2]
+    return int(h) * 60 + int(m)
+
+
+def fmt_minutes(m: int) -> str:
+    return f"{m // 60:02d}:{m % 60:02d}"
+
+
+class Entry:
+    """A timetable row reduced to what conflict checks need."""
+    __slots__ = ("student_id", "teacher_id", "class_id", "day", "start", "end", "timetable_id", "index")
+
+    def __init__(self, *, student_id: int, teacher_id: int, class_id: int, day: str, start: Any, end: Any,
+                 timetable_id: Optional[int] = None, index: Optional[int] = None):
+        self.student_id = student_id
+        self.teacher_id = teacher_id
+        self.class_id = class_id
+        self.day = day
+        self.start = to_minutes(start)
+        self.end = to_minutes(end)
+        self.timetable_id = timetable_id   # set for rows already in the DB
+        self.index = index                 # position in the submitted payload
+
+    @property
+    def is_new(self) -> bool:
+        return self.timetable_id is None
+
+    def ref(self) -> Dict[str, Any]:
+        return {
+            "timetable_id": self.timetable_id,
+            "index": self.index,
+            "student_id": self.student_id,
+            "teacher_id": self.teacher_id,
+            "class_id": self.class_id,
+            "start": fmt_minutes(self.start),
+            "end": fmt_minutes(self.end),
+        }
+
+
+class IntervalIndex:
+    """Entries bucketed by (owner, day); each bucket is sorted once by start."""
+
+    def __init__(self):
+        self._buckets: Dict[Tuple[int, str], List[Entry]] = {}
+
+    def add(self, owner: int, entry: Entry) -> None:
+        self._buckets.setdefault((owner, entry.day), []).append(entry)
+
+    def buckets(self) -> Iterable[Tuple[Tuple[int, str], List[Entry]]]:
+        for key, items in self._buckets.items():
+            items.sort(key=lambda e: (e.start, e.end))
+            yield key, items
+
+
+def _sweep(entries: List[Entry]) -> Iterable[Tuple[Entry, Entry]]:
+    """Yield (entry, earlier overlapping entry) for a bucket sorted by start."""
+    latest: Optional[Entry] = None
+    for e in entries:
+        if latest is not None and e.start < latest.end:
+            yield e, latest
+        if latest is None or e.end > latest.end:
+            latest = e
+
+
+def find_conflicts(entries: Iterable[Entry]) -> List[Dict[str, Any]]:
+    """
+    Structured conflicts among `entries`. Pairs where both sides are existing
+    rows are skipped: only conflicts a write would introduce are reported.
+    """
+    by_student = IntervalIndex()
+    # (teacher, day, class, start, end) -> [representative entry, session contains a new entry]
+    sessions: Dict[Tuple[int, str, int, int, int], List[Any]] = {}
+    for e in entries:
+        by_student.add(e.student_id, e)
+        session = sessions.setdefault((e.teacher_id, e.day, e.class_id, e.start, e.end), [e, False])
+        session[1] = session[1] or e.is_new
+
+    by_teacher = IntervalIndex()
+    touched: Set[int] = set()
+    for rep, has_new in sessions.values():
+        by_teacher.add(rep.teacher_id, rep)
+        if has_new:
+            touched.add(id(rep))
+
+    conflicts: List[Dict[str, Any]] = []
+    for (teacher_id, day), bucket in by_teacher.buckets():
+        for a, b in _sweep(bucket):
+            if id(a) in touched or id(b) in touched:
+                conflicts.append({"type": "teacher_double_booking", "teacher_id": teacher_id, "day": day,
+                                  "entry": a.ref(), "conflicts_with": b.ref()})
+    for (student_id, day), bucket in by_student.buckets():
+        for a, b in _sweep(bucket):
+            if a.is_new or b.is_new:
+                same = (a.class_id, a.start, a.end) == (b.class_id, b.start, b.end)
+                conflicts.append({"type": "duplicate_entry" if same else "student_overlap",
+                                  "student_id": student_id, "day": day,
+                                  "entry": a.ref(), "conflicts_with": b.ref()})
+    return conflicts
+
+
+# ---------- loading existing rows ----------
+_COLUMNS = "timetable_id, student_id, teacher_id, class_id, day_of_week, start_time, end_time"
+
+
+def _from_row(r) -> Entry:
+    return Entry(student_id=r.student_id, teacher_id=r.teacher_id, class_id=r.class_id, day=r.day_of_week,
+                 start=r.start_time, end=r.end_time, timetable_id=r.timetable_id)
+
+
+def load_related(db: Session, *, teacher_ids: Iterable[int], student_ids: Iterable[int],
+                 days: Optional[Iterable[str]] = None) -> List[Entry]:
+    """Existing rows of any of these teachers or students (optionally only on `days`)."""
+    day_list = sorted(set(days)) if days is not None else None
+    day_sql = " AND day_of_week IN :days" if day_list is not None else ""
+    seen: Dict[int, Entry] = {}
+    for column, ids in (("teacher_id", sorted(set(teacher_ids))), ("student_id", sorted(set(student_ids)))):
+        for i in range(0, len(ids), ID_CHUNK):
+            q = text(f"SELECT {_COLUMNS} FROM timetables WHERE {column} IN :ids{day_sql}").bindparams(
+                bindparam("ids", expanding=True)
+            )
+            params: Dict[str, Any] = {"ids": ids[i:i + ID_CHUNK]}
+            if day_list is not None:
+                q = q.bindparams(bindparam("days", expanding=True))
+                params["days"] = day_list
+            for r in db.execute(q, params):
+                seen.setdefault(r.timetable_id, _from_row(r))
+    return list(seen.values())
+
+
+def check(db: Session, new: List[Entry], *, ignore_ids: Iterable[int] = (),
+          ignore_students: Iterable[int] = (), ignore_teacher: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Conflicts the `new` entries would introduce. Existing rows listed in
+    `ignore_ids`, or belonging to `ignore_students`, are treated as already
+    gone (the row being edited, timetables being replaced). With
+    `ignore_teacher`, only that teacher's rows of `ignore_students` are.
+    """
+    skip_ids, skip_students = set(ignore_ids), set(ignore_students)
+    existing = [
+        e for e in load_related(
+            db,
+            teacher_ids=(e.teacher_id for e in new),
+            student_ids=(e.student_id for e in new),
+            days=(e.day for e in new),
+        )
+        if e.timetable_id not in skip_ids
+        and not (e.student_id in skip_students and ignore_teacher in (None, e.teacher_id))
+    ]
+    return find_conflicts(existing + new)
+
+
+def missing_references(db: Session, new: List[Entry]) -> List[Dict[str, Any]]:
+    """Students, teachers or classes referenced by `new` that do not exist."""
+    wanted = {
+        "student_id": ("SELECT student_id FROM students WHERE student_id IN :ids", {e.student_id for e in new}),
+        "teacher_id": ("SELECT user_id FROM users WHERE role = 'teacher' AND user_id IN :ids", {e.teacher_id for e in new}),
+        "class_id": ("SELECT class_id FROM classes WHERE class_id IN :ids", {e.class_id for e in new}),
+    }
+    found: Dict[str, Set[int]] = {}
+    for field, (sql, ids) in wanted.items():
+        ordered, found[field] = sorted(ids), set()
+        q = text(sql).bindparams(bindparam("ids", expanding=True))
+        for i in range(0, len(ordered), ID_CHUNK):
+            found[field].update(x for (x,) in db.execute(q, {"ids": ordered[i:i + ID_CHUNK]}))
+    errors = []
+    for e in new:
+        for field in wanted:
+            if getattr(e, field) not in found[field]:
+                errors.append({"type": f"unknown_{field[:-3]}", field: getattr(e, field), "entry": e.ref()})
+    return errors
+
+
+def report(new: List[Entry], conflicts: List[Dict[str, Any]], errors: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"ok": not conflicts and not errors, "checked": len(new), "errors": errors, "conflicts": conflicts}
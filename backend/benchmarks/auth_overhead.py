@@ -0,0 +1,54 @@
+# backend/benchmarks/auth_overhead.py
+"""
+Micro-benchmark: per-request bearer-token verification cost with and
+without the verified-token cache in core/security.py.
+
+    python -m backend.benchmarks.auth_overhead --requests 20000 --sessions 50
+"""
+import argparse
+import random
+import statistics
+import time
+
+from backend.app.core import security
+
+
+def run(tokens, requests: int) -> list:
+    rng = random.Random(7)
+    samples = []
+    for _ in range(requests):
+        tok = tokens[rng.randrange(len(tokens))]
+        t0 = time.perf_counter_ns()
+        security.decode_access_token(tok)
+        samples.append(time.perf_counter_ns() - t0)
+    return samples
+
+
+def report(name: str, samples: list) -> None:
+    samples = sorted(samples)
+    pct = lambda p: samples[min(len(samples) - 1, int(p * len(samples)))] / 1000
+    print(f"{name:<12}{statistics.fmean(samples) / 1000:>10.2f}{pct(0.5):>10.2f}{pct(0.99):>10.2f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=20_000)
+    ap.add_argument("--sessions", type=int, default=50, help="distinct tokens in rotation")
+    args = ap.parse_args()
+
+    tokens = [
+        security.create_access_token(sub=str(i), claims={"role": "student", "email": f"s{i}@x", "name": f"S{i}"})
+        for i in range(1, args.sessions + 1)
+    ]
+
+    print(f"{'variant':<12}{'mean us':>10}{'p50 us':>10}{'p99 us':>10}")
+    maxsize = security.token_cache.maxsize
+    security.token_cache.maxsize = 0
+    report("uncached", run(tokens, args.requests))
+    security.token_cache.maxsize = maxsize or 10_000
+    security.token_cache.clear()
+    report("cached", run(tokens, args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# backend/benchmarks/conditional_get.py
+"""
+Benchmark: what a revalidation (If-None-Match) costs compared to a full GET.
+
+Each endpoint is requested --requests times without a validator, then the
+same number of times with the ETag from the first response. Reports bytes
+and SQL statements per request (from the ETag middleware's counters) and
+mean latency. Runs in-process against the database in backend/.env. It only
+reads, apart from building missing timetable snapshots, and needs an admin,
+a teacher and a student to exist; tokens are minted directly, so no
+passwords are needed.
+
+    python -m backend.benchmarks.conditional_get --requests 200
+"""
+import argparse
+import time
+
+from sqlalchemy import text
+
+
+def pick_users(engine):
+    with engine.connect() as c:
+        admin = c.execute(text("SELECT user_id, email, full_name FROM users WHERE role = 'admin' ORDER BY user_id LIMIT 1")).first()
+        teacher = c.execute(text("""
+            SELECT u.user_id, u.email, u.full_name FROM users u
+            JOIN timetables t ON t.teacher_id = u.user_id
+            GROUP BY u.user_id, u.email, u.full_name ORDER BY COUNT(*) DESC LIMIT 1
+        """)).first()
+        student = c.execute(text("""
+            SELECT u.user_id, u.email, u.full_name FROM users u
+            JOIN timetables t ON t.student_id = u.user_id
+            GROUP BY u.user_id, u.email, u.full_name ORDER BY COUNT(*) DESC LIMIT 1
+        """)).first()
+    if not (admin and teacher and student):
+        raise SystemExit("Needs an admin plus a teacher and a student with timetable rows")
+    return admin, teacher, student
+
+
+def bearer(row, role):
+    from backend.app.core.security import create_access_token
+
+    token = create_access_token(sub=str(row.user_id), claims={"role": role, "email": row.email, "name": row.full_name})
+    return {"Authorization": f"Bearer {token}"}
+
+
+def timed(client, url, headers, n):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        r = client.get(url, headers=headers)
+    return (time.perf_counter() - t0) * 1000 / n, r
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=200)
+    args = ap.parse_args()
+
+    from fastapi.testclient import TestClient
+    from backend.app.core import etag
+    from backend.app.db.session import engine
+    from backend.app.main import app
+
+    admin, teacher, student = pick_users(engine)
+    A, T, S = bearer(admin, "admin"), bearer(teacher, "teacher"), bearer(student, "student")
+    endpoints = [
+        ("/api/auth/me", S),
+        (f"/api/student/timetable/{student.user_id}", S),
+        ("/api/teacher/schedule/me", T),
+        ("/api/teacher/schedule/range?start=2025-01-06&end=2025-06-29", T),
+        ("/api/users/?limit=500", A),
+        ("/api/teacher/?limit=200", A),
+    ]
+
+    print(f"{'endpoint':<58}{'bytes 200':>10}{'304':>6}{'sql 200':>9}{'304':>6}{'ms 200':>9}{'304':>8}")
+    with TestClient(app) as client:
+        for url, headers in endpoints:
+            etag.stats.reset()
+            full_ms, r = timed(client, url, headers, args.requests)
+            tag = r.headers.get("etag")
+            if r.status_code != 200 or not tag:
+                print(f"{url:<58}  skipped (status {r.status_code})")
+                continue
+            nm_ms, r = timed(client, url, {**headers, "If-None-Match": tag}, args.requests)
+            assert r.status_code == 304, r.status_code
+            (s,) = etag.stats.snapshot().values()
+            print(f"{url[:57]:<58}{s['bytes_full'] / s['full']:>10.0f}{s['bytes_not_modified'] / s['not_modified']:>6.0f}"
+                  f"{s['queries_full'] / s['full']:>9.2f}{s['queries_not_modified'] / s['not_modified']:>6.2f}"
+                  f"{full_ms:>9.2f}{nm_ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+# backend/benchmarks/event_loop_stalls.py
+"""
+Concurrency check: the async read routes must not stall the event loop.
+
+Seeds a throwaway SQLite database and gives every statement an artificial
+--query-latency-ms, spent in whichever thread runs the statement (as a
+network round trip to MySQL would be). Then --concurrency requests go out at
+once to the async routes (student timetables, notification lists and counts,
+/api/auth/me) through the ASGI app in-process.
+
+Every event-loop callback is timed. A route that ran a synchronous query on
+the loop would hold it for the whole query latency in one callback. Async
+routes only hold it for their own CPU work. A control run then sends
+requests to a route built the old way (`async def` calling the sync
+Session), to show what a stall looks like.
+
+The script exits with status 1 if any of these hold:
+  - the worst callback on the async routes exceeds --max-step-ms;
+  - any request fails.
+
+    python -m backend.benchmarks.event_loop_stalls --concurrency 500
+"""
+import argparse
+import asyncio
+import gc
+import os
+import sys
+import tempfile
+import time
+
+
+def seed(engine, students: int) -> None:
+    from sqlalchemy import text
+    from sqlalchemy.orm import Session
+    from backend.app.services import timetable_snapshots
+
+    with engine.begin() as c:
+        c.execute(text("INSERT INTO users (user_id, email, password_hash, full_name, role) VALUES (1, 't@x.io', '-', 'Teacher', 'teacher')"))
+        c.execute(text("INSERT INTO classes (class_id, class_name) VALUES (1, 'Maths'), (2, 'Physics')"))
+        c.execute(
+            text("INSERT INTO users (user_id, email, password_hash, full_name, role) VALUES (:id, :email, '-', :name, 'student')"),
+            [{"id": i, "email": f"s{i}@x.io", "name": f"Student {i}"} for i in range(2, students + 2)],
+        )
+        c.execute(
+            text("""
+                INSERT INTO timetables (student_id, teacher_id, class_id, day_of_week, start_time, end_time)
+                VALUES (:sid, 1, :cid, :day, :start, :end)
+            """),
+            [
+                {"sid": i, "cid": 1 + d % 2, "day": day, "start": f"{9 + d:02d}:00:00", "end": f"{10 + d:02d}:00:00"}
+                for i in range(2, students + 2)
+                for d, day in enumerate(("Monday", "Tuesday", "Wednesday", "Thursday", "Friday"))
+            ],
+        )
+        c.execute(text("INSERT INTO notification_bodies (body_id, sent_by, message) VALUES (1, 1, 'Welcome back')"))
+        c.execute(
+            text("INSERT INTO notifications (sent_to, body_id, is_read) VALUES (:sid, 1, 0)"),
+            [{"sid": i} for i in range(2, students + 2)],
+        )
+    # As timetable writes would have; SQLite cannot take hundreds of concurrent lazy builds
+    with Session(engine) as db:
+        timetable_snapshots.rebuild_all(db)
+
+
+def add_latency(engine, seconds: float) -> None:
+    """Sleep in the thread that executes each statement (aiosqlite: its worker thread)."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "connect")
+    def _slow(dbapi_conn, _record):
+        raw = getattr(dbapi_conn, "driver_connection", dbapi_conn)
+        raw = getattr(raw, "_conn", raw)      # aiosqlite.Connection -> sqlite3.Connection
+        raw.set_trace_callback(lambda _sql: time.sleep(seconds))
+
+
+def add_control_route(app) -> None:
+    """The pre-async pattern: an async endpoint using the blocking Session."""
+    from backend.app.db.session import SessionLocal
+    from backend.app.services import timetable_snapshots
+
+    @app.get("/bench/blocking/{student_id}")
+    async def blocking_timetable(student_id: int):
+        with SessionLocal() as db:
+            version, week = timetable_snapshots.get_snapshot(db, student_id)
+        return {"version": version}
+
+
+class StepTimer:
+    """Times every callback the event loop runs."""
+
+    def __init__(self):
+        self.steps = []
+        self._orig = asyncio.events.Handle._run
+
+    def __enter__(self):
+        orig, steps = self._orig, self.steps
+
+        def _run(handle):
+            t0 = time.perf_counter()
+            orig(handle)
+            steps.append(time.perf_counter() - t0)
+
+        asyncio.events.Handle._run = _run
+        return self
+
+    def __exit__(self, *exc):
+        asyncio.events.Handle._run = self._orig
+
+
+async def fire(app, tokens, urls):
+    import httpx
+
+    sids = list(tokens)
+    latencies, failures = [], []
+
+    async def one(client, i):
+        sid = sids[i % len(sids)]
+        url = urls[i % len(urls)](sid)
+        t0 = time.perf_counter()
+        r = await client.get(url, headers={"Authorization": f"Bearer {tokens[sid]}"})
+        latencies.append(time.perf_counter() - t0)
+        if r.status_code != 200:
+            failures.append((url, r.status_code))
+
+    return one, latencies, failures
+
+
+async def run(app, tokens, urls, n: int):
+    import httpx
+    from backend.app.db.session import async_engine
+
+    one, latencies, failures = await fire(app, tokens, urls)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        # Warm up: per-route setup, and open the pooled connections (each starts an aiosqlite thread)
+        await asyncio.gather(*(one(client, i) for i in range(min(n, 50))))
+        latencies.clear()
+        with StepTimer() as timer:
+            t0 = time.perf_counter()
+            await asyncio.gather(*(one(client, i) for i in range(n)))
+            elapsed = time.perf_counter() - t0
+    # Pooled aiosqlite connections belong to this loop (and keep their threads alive)
+    await async_engine.dispose()
+    return elapsed, sorted(latencies), sorted(timer.steps), failures
+
+
+def report(name: str, n: int, result) -> float:
+    elapsed, latencies, steps, failures = result
+    pct = lambda xs, p: xs[min(len(xs) - 1, int(p * len(xs)))] * 1000
+    worst = steps[-1] * 1000
+    print(f"{name}: {n} concurrent requests in {elapsed * 1000:.0f} ms ({n / elapsed:,.0f} req/s), "
+          f"latency p50 {pct(latencies, 0.5):.1f} ms p99 {pct(latencies, 0.99):.1f} ms")
+    print(f"{'':<4}loop busy {sum(steps) * 1000:.0f} ms; callbacks: {len(steps):,}, p99 {pct(steps, 0.99):.2f} ms, "
+          f"worst {worst:.2f} ms"
+          + (f", {len(failures)} failed e.g. {failures[:2]}" if failures else ""))
+    return worst
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--concurrency", type=int, default=500)
+    ap.add_argument("--students", type=int, default=200)
+    ap.add_argument("--query-latency-ms", type=float, default=5.0)
+    ap.add_argument("--max-step-ms", type=float, default=50.0)
+    ap.add_argument("--control", type=int, default=50, help="requests to the blocking control route (0 to skip)")
+    args = ap.parse_args()
+
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "stalls.db")
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    from backend.app.core.security import create_access_token
+    from backend.app.db.session import async_engine, engine
+    from backend.app.main import app
+
+    seed(engine, args.students)
+    engine.dispose()     # so the seeding connections are replaced by slow ones
+    add_latency(engine, args.query_latency_ms / 1000)
+    add_latency(async_engine.sync_engine, args.query_latency_ms / 1000)
+    add_control_route(app)
+    # What the app's lifespan does at startup (httpx's ASGITransport does not run it)
+    gc.collect()
+    gc.freeze()
+    tokens = {
+        sid: create_access_token(sub=str(sid), claims={"role": "student", "email": f"s{sid}@x.io", "name": f"Student {sid}"})
+        for sid in range(2, args.students + 2)
+    }
+
+    print(f"query latency {args.query_latency_ms} ms per statement")
+    routes = [
+        lambda sid: f"/api/student/timetable/{sid}",
+        lambda sid: f"/api/timetable/{sid}",
+        lambda sid: "/api/student/notifications",
+        lambda sid: "/api/student/notifications/unread",
+        lambda sid: "/api/auth/me",
+    ]
+    result = asyncio.run(run(app, tokens, routes, args.concurrency))
+    worst = report("async routes", args.concurrency, result)
+    if args.control:
+        report("control (sync Session in async def)", args.control,
+               asyncio.run(run(app, tokens, [lambda sid: f"/bench/blocking/{sid}"], args.control)))
+
+    if result[3]:
+        print("FAIL: requests failed")
+        sys.exit(1)
+    if worst > args.max_step_ms:
+        print(f"FAIL: the event loop was held for {worst:.1f} ms in one callback (limit {args.max_step_ms} ms)")
+        sys.exit(1)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# backend/benchmarks/hash_throughput.py
+"""
+Benchmark: bcrypt verifications/sec on request threads vs the hashing
+process pool (core/hashing.py).
+
+    python -m backend.benchmarks.hash_throughput --verifies 64 --threads 16
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.app.core.hashing import HashingService
+from backend.app.core.security import hash_password, verify_password
+
+
+def timed(label: str, n: int, fn) -> None:
+    t0 = time.perf_counter()
+    fn()
+    dt = time.perf_counter() - t0
+    print(f"{label:<28}{n / dt:>10.1f} verifies/s")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--verifies", type=int, default=64)
+    ap.add_argument("--threads", type=int, default=16, help="simulated request threads")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+
+    hashed = hash_password("benchmark-password")
+    with ThreadPoolExecutor(args.threads) as threads:
+        timed("inline (request threads)", args.verifies, lambda: list(
+            threads.map(lambda _: verify_password("benchmark-password", hashed), range(args.verifies))
+        ))
+
+        svc = HashingService(workers=args.workers, max_pending=args.verifies)
+        svc.verify("warm-up", hashed)  # start the worker processes outside the timing
+        timed(f"process pool ({args.workers} workers)", args.verifies, lambda: list(
+            threads.map(lambda _: svc.verify("benchmark-password", hashed), range(args.verifies))
+        ))
+        print(svc.metrics())
+        svc.shutdown()
+
+
+if __name__ == "__main__":
+    main()
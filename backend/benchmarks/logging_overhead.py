@@ -0,0 +1,88 @@
+# backend/benchmarks/logging_overhead.py
+"""
+Cost of logging on the role-check hot path (`_check_role` in api/deps.py),
+which every request runs.
+
+Variants:
+  - the old print() of every grant, to a pipe;
+  - logging with the grant logger disabled (LOG_LEVEL above INFO);
+  - enabled and sampled at 1%, the default;
+  - enabled and unsampled, so every grant is queued and written by the
+    listener thread.
+
+Each variant runs in one thread and in --threads threads at once. The
+threadpool runs sync dependencies that way, so any lock held across a
+write shows up there. Output goes to /dev/null, so the numbers are the
+caller's cost, not the terminal's.
+
+    python -m backend.benchmarks.logging_overhead --calls 200000 --threads 8
+"""
+import argparse
+import contextlib
+import logging
+import os
+import sys
+import threading
+import time
+
+
+def per_call(fn, calls: int, threads: int) -> float:
+    """Wall time per call in ns, with `calls` split across `threads`."""
+    each = calls // threads
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        barrier.wait()
+        for _ in range(each):
+            fn()
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    barrier.wait()
+    t0 = time.perf_counter()
+    for t in pool:
+        t.join()
+    return (time.perf_counter() - t0) / (each * threads) * 1e9
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--calls", type=int, default=200_000)
+    ap.add_argument("--threads", type=int, default=8)
+    args = ap.parse_args()
+
+    os.environ.setdefault("DATABASE_URL", "sqlite://")
+    from backend.app.api.deps import _check_role
+    from backend.app.core import logs
+    from backend.app.core.principal import Principal
+
+    devnull = open(os.devnull, "w")
+    logs.setup(stream=devnull)
+    user = Principal(user_id=1, email="a@x.io", full_name="Admin", role="admin")
+    allowed = ["admin"]
+
+    def old_print():
+        print(f"[OK] User {user.user_id} with role '{user.role}' access granted for {allowed}")
+
+    variants = [
+        ("print (before)", old_print, None, None),
+        ("logging off", lambda: _check_role(user, allowed), "WARNING", 0.01),
+        ("sampled 1%", lambda: _check_role(user, allowed), "INFO", 0.01),
+        ("every record", lambda: _check_role(user, allowed), "INFO", 1.0),
+    ]
+    print(f"{'variant':<16}{'1 thread ns':>14}{f'{args.threads} threads ns':>16}")
+    for name, fn, level, sample in variants:
+        if level:
+            logs.set_level(f"{logs.ROOT}.auth.granted", level)
+            logs.set_sample_rate(f"{logs.ROOT}.auth.granted", sample)
+        with contextlib.redirect_stdout(devnull):
+            single = per_call(fn, args.calls, 1)
+            multi = per_call(fn, args.calls, args.threads)
+        print(f"{name:<16}{single:>14.0f}{multi:>16.0f}")
+    logs.shutdown()    # drains the queue
+    print(f"dropped {logs.counters.dropped} of {logs.counters.enqueued + logs.counters.dropped} queued records")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# backend/benchmarks/metrics_overhead.py
+"""
+Overhead of the /metrics instrumentation (core/metrics.py, core/sqlstats.py)
+on the hot authenticated path.
+
+Seeds a throwaway SQLite database, then calls the ASGI app directly, with
+no HTTP client in the way that would hide the cost. Routes called:
+/api/auth/me, which is authentication only, and /api/users/?limit=20,
+which adds auth plus a few queries. Rounds alternate between metrics on and
+off, and the median of each is compared. The per-statement timing hooks
+stay installed in both arms, so the "off" arm still pays for them.
+
+On a shared machine that end-to-end difference is within noise, so the
+check uses a direct measure instead. It times the middleware around an
+empty app, plus the statement hooks times the route's statements, and
+compares that with the route's own time. The script exits 1 if that
+exceeds --max-overhead-pct on any route.
+
+    python -m backend.benchmarks.metrics_overhead --requests 300 --rounds 31
+"""
+import argparse
+import asyncio
+import gc
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+
+def seed(engine) -> None:
+    from sqlalchemy import text
+
+    with engine.begin() as c:
+        c.execute(
+            text("INSERT INTO users (user_id, email, password_hash, full_name, role) VALUES (:id, :email, '-', :name, :role)"),
+            [{"id": 1, "email": "a@x.io", "name": "Admin", "role": "admin"}]
+            + [{"id": i, "email": f"s{i}@x.io", "name": f"Student {i}", "role": "student"} for i in range(2, 102)],
+        )
+
+
+async def call(app, path: str, headers) -> int:
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "headers": headers, "client": ("127.0.0.1", 5000), "server": ("bench", 80),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def timed(app, path: str, headers, n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        status = await call(app, path, headers)
+        if status != 200:
+            raise SystemExit(f"{path} returned {status}")
+    return (time.perf_counter() - t0) / n
+
+
+async def run(app, routes, headers, requests: int, rounds: int):
+    from backend.app.core import metrics, sqlstats
+    from backend.app.db.session import async_engine
+
+    results = {}
+    for path in routes:
+        await timed(app, path, headers, 200)      # warm up caches and pools
+        on, off = [], []
+        for _ in range(rounds):
+            metrics.METRICS_ENABLED = False
+            off.append(await timed(app, path, headers, requests))
+            metrics.METRICS_ENABLED = True
+            on.append(await timed(app, path, headers, requests))
+        token = sqlstats.start()
+        await call(app, path, headers)
+        statements = sqlstats.count()
+        sqlstats.stop(token)
+        results[path] = (statistics.median(off), statistics.median(on), statements)
+    await async_engine.dispose()
+    return results
+
+
+async def middleware_cost(n: int = 20_000) -> float:
+    """Seconds the metrics middleware adds to one request, around an app that does nothing."""
+    from backend.app.core.metrics import MetricsMiddleware, request_duration, request_db_time, request_queries
+
+    async def empty(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def best(app) -> float:
+        times = []
+        for _ in range(5):
+            t0 = time.perf_counter()
+            for _ in range(n):
+                await call(app, "/bench", [])
+            times.append((time.perf_counter() - t0) / n)
+        return min(times)
+
+    cost = await best(MetricsMiddleware(empty)) - await best(empty)
+    for h in (request_duration, request_queries, request_db_time):
+        h.reset()
+    return max(cost, 0.0)
+
+
+def hook_cost(n: int = 100_000) -> float:
+    """Seconds the before/after_cursor_execute hooks add to one statement."""
+    from backend.app.core import sqlstats
+
+    class Context:
+        pass
+
+    ctx = Context()
+    token = sqlstats.start()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        sqlstats._before(None, None, "SELECT 1", None, ctx, False)
+        sqlstats._after(None, None, "SELECT 1", None, ctx, False)
+    elapsed = (time.perf_counter() - t0) / n
+    sqlstats.stop(token)
+    return elapsed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--requests", type=int, default=300, help="requests per round")
+    ap.add_argument("--rounds", type=int, default=31)
+    ap.add_argument("--max-overhead-pct", type=float, default=5.0)
+    args = ap.parse_args()
+
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "metrics.db")
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    from backend.app.core.security import create_access_token
+    from backend.app.db.session import engine
+    from backend.app.main import app
+
+    seed(engine)
+    gc.collect()
+    gc.freeze()
+    token = create_access_token(sub="1", claims={"role": "admin", "email": "a@x.io", "name": "Admin"})
+    headers = [(b"authorization", f"Bearer {token}".encode())]
+
+    routes = ["/api/auth/me", "/api/users/?limit=20"]
+    results = asyncio.run(run(app, routes, headers, args.requests, args.rounds))
+    per_request = asyncio.run(middleware_cost())
+    per_statement = hook_cost()
+
+    print(f"middleware {per_request * 1e6:.2f} us per request, hooks {per_statement * 1e6:.2f} us per statement")
+    print(f"{'route':<24}{'off us':>10}{'on us':>10}{'A/B':>8}{'stmts':>7}{'added us':>10}{'overhead':>10}")
+    failed = False
+    for path, (off, on, statements) in results.items():
+        added = per_request + per_statement * statements
+        pct = added / off * 100
+        failed |= pct > args.max_overhead_pct
+        print(f"{path:<24}{off * 1e6:>10.1f}{on * 1e6:>10.1f}{(on - off) / off * 100:>7.1f}%"
+              f"{statements:>7}{added * 1e6:>10.2f}{pct:>9.2f}%")
+    if failed:
+        print(f"FAIL: overhead above {args.max_overhead_pct}%")
+        sys.exit(1)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# backend/benchmarks/notification_fanout.py
+"""
+Benchmark: per-row notification loop vs set-based fan-out.
+
+Runs against a throwaway SQLite file so it needs no MySQL server:
+
+    python -m backend.benchmarks.notification_fanout --recipients 50000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from backend.app.db.base import Base
+from backend.app.db.models import user as _user_models  # noqa: F401
+from backend.app.db.models import student as _student_models  # noqa: F401
+from backend.app.db.models import notification as _notification_models  # noqa: F401
+from backend.app.db.models import classroom as _classroom_models  # noqa: F401
+from backend.app.services.notifications import audience_sql, create_body, fan_out
+
+
+def _count_statements(engine):
+    counter = {"n": 0}
+
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        counter["n"] += 1
+
+    event.listen(engine, "before_cursor_execute", _before)
+    return counter
+
+
+def seed(engine, recipients: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO users (user_id, email, password_hash, full_name, role) "
+                 "VALUES (:id, :email, 'x', :name, :role)"),
+            [{"id": 1, "email": "t@bench", "name": "Teacher", "role": "teacher"}]
+            + [{"id": i, "email": f"s{i}@bench", "name": f"S{i}", "role": "student"}
+               for i in range(2, recipients + 2)],
+        )
+        conn.execute(
+            text("INSERT INTO students (student_id, full_name, email, role, grade, class) "
+                 "VALUES (:id, :name, :email, 'student', :grade, 'A')"),
+            [{"id": i, "name": f"S{i}", "email": f"s{i}@bench", "grade": str(7 + i % 6)}
+             for i in range(2, recipients + 2)],
+        )
+        conn.execute(
+            text("INSERT INTO class_students (student_id, class_id) VALUES (:id, :cid)"),
+            [{"id": i, "cid": 1 + i % 40} for i in range(2, recipients + 2)],
+        )
+
+
+def legacy(db) -> int:
+    """The original implementation: load every student, one INSERT each."""
+    bid = create_body(db, sender_id=1, message="bench")
+    ids = [r[0] for r in db.execute(text("SELECT user_id FROM users WHERE role = 'student'"))]
+    for sid in ids:
+        db.execute(
+            text("INSERT INTO notifications (sent_to, body_id) VALUES (:sid, :bid)"),
+            {"sid": sid, "bid": bid},
+        )
+    return len(ids)
+
+
+def set_based(db, **target) -> int:
+    bid = create_body(db, sender_id=1, message="bench")
+    return fan_out(db, body_id=bid, audience=audience_sql(**target))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--recipients", type=int, default=50_000)
+    args = ap.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "fanout.db")
+    engine = create_engine(f"sqlite:///{path}", future=True)
+    seed(engine, args.recipients)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    stmts = _count_statements(engine)
+
+    runs = [
+        ("legacy per-row", lambda db: legacy(db)),
+        ("set-based (all)", lambda db: set_based(db)),
+        ("set-based (grade)", lambda db: set_based(db, grade="9")),
+        ("set-based (class)", lambda db: set_based(db, class_id=3)),
+        ("set-based (ids)", lambda db: set_based(db, student_ids=list(range(2, args.recipients + 2)))),
+    ]
+    print(f"{'variant':<20}{'rows':>10}{'stmts':>8}{'seconds':>10}{'rows/s':>12}")
+    for name, fn in runs:
+        with Session() as db:
+            stmts["n"] = 0
+            t0 = time.perf_counter()
+            n = fn(db)
+            db.commit()
+            dt = time.perf_counter() - t0
+        print(f"{name:<20}{n:>10}{stmts['n']:>8}{dt:>10.3f}{n / dt:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# backend/benchmarks/query_plans.py
+"""
+Query-plan regression check for the hand-written SQL registered in
+backend/app/db/statements.py: the routers' text() queries and the service
+statements they run.
+
+Seeds a throwaway database with the small school from db/seed.py
+(--database-url for an empty MySQL schema; --students and --notifications
+for more volume), EXPLAINs every registered statement and compares each plan with
+the snapshot in plans/<dialect>.json. Flagged:
+
+    full scan       every row of a table (MySQL type ALL; SQLite SCAN without an index)
+    index scan      every entry of an index (MySQL type index; SQLite SCAN ... USING INDEX)
+    filesort        rows sorted after reading (Using filesort; TEMP B-TREE FOR ORDER BY)
+    temporary       a temporary table for GROUP BY / DISTINCT
+
+It exits 1 when a statement gains a flag its snapshot does not have.
+Accepted flags, such as the per-body sort under the teacher's LIMIT 50
+feed, live in the snapshot; --update rewrites it. --time N runs each
+statement N times and reports the median. --drop removes an index first,
+so timings can be taken before and after a migration:
+
+    python -m backend.benchmarks.query_plans                      # compare with the snapshot
+    python -m backend.benchmarks.query_plans --update             # record plans
+    python -m backend.benchmarks.query_plans --students 50000 --time 50 \\
+        --drop idx_students_grade                                  # "before" timings
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+PLAN_DIR = Path(__file__).resolve().parent / "plans"
+
+
+def flags_of(dialect: str, plan: List[str]) -> List[str]:
+    found = []
+    for line in plan:
+        if dialect == "sqlite":
+            scan = re.match(r"\s*SCAN (\S+)( USING (COVERING )?INDEX (\S+))?", line)
+            if scan:
+                found.append(f"{'index scan' if scan.group(2) else 'full scan'}: {scan.group(1)}")
+            if "TEMP B-TREE FOR" in line and "ORDER BY" in line:
+                found.append("filesort")
+            elif "TEMP B-TREE FOR" in line:
+                found.append("temporary")
+        else:
+            table, access, extra = line.split(" | ")[:3]
+            if access == "ALL":
+                found.append(f"full scan: {table}")
+            elif access == "index":
+                found.append(f"index scan: {table}")
+            if "Using filesort" in extra:
+                found.append("filesort")
+            if "Using temporary" in extra:
+                found.append("temporary")
+    return sorted(set(found))
+
+
+def explain(conn, dialect: str, sql: str) -> List[str]:
+    if dialect == "sqlite":
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql).all()
+        depth = {0: -1}
+        plan = []
+        for node, parent, _, detail in rows:
+            depth[node] = depth.get(parent, -1) + 1
+            plan.append("  " * depth[node] + detail)
+        return plan
+    rows = conn.exec_driver_sql("EXPLAIN " + sql).mappings().all()
+    return [f"{r['table']} | {r['type']} | {r.get('Extra') or ''} | key={r['key']}" for r in rows]
+
+
+def render(statement, example, dialect) -> str:
+    """The statement with its example values inlined, as EXPLAIN needs it."""
+    bound = statement.bindparams(**{k: v for k, v in example.items() if not isinstance(v, list)})
+    params = {k: v for k, v in example.items() if isinstance(v, list)}
+    compiled = bound.compile(dialect=dialect, compile_kwargs={"literal_binds": True, "render_postcompile": True})
+    sql = str(compiled)
+    for name, values in params.items():
+        sql = sql.replace(f"__[POSTCOMPILE_{name}]", "(" + ", ".join(map(repr, values)) + ")")
+    return sql
+
+
+def timed(conn, sql: str, runs: int) -> float:
+    times = []
+    conn.rollback()             # close the transaction EXPLAIN autobegan
+    for _ in range(runs):
+        trans = conn.begin()
+        t0 = time.perf_counter()
+        result = conn.exec_driver_sql(sql)
+        if result.returns_rows:
+            result.all()
+        times.append(time.perf_counter() - t0)
+        trans.rollback()        # UPDATEs are timed, not kept
+    return statistics.median(times) * 1000
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--database-url", help="empty MySQL schema to seed (default: a temporary SQLite file)")
+    ap.add_argument("--students", type=int, help="students to generate (default: the small scale's)")
+    ap.add_argument("--notifications", type=int, help="notification rows to generate (default: the small scale's)")
+    ap.add_argument("--only", help="statements whose name contains this")
+    ap.add_argument("--update", action="store_true", help="rewrite the snapshot with the current plans")
+    ap.add_argument("--snapshot", type=Path, help="default: plans/<dialect>.json")
+    ap.add_argument("--time", type=int, default=0, metavar="N", help="also time each statement N times")
+    ap.add_argument("--drop", nargs="*", default=[], metavar="INDEX", help="drop these indexes after seeding")
+    args = ap.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "plans.db")
+    os.environ.pop("DATABASE_REPLICA_URLS", None)
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    from dataclasses import replace
+    from sqlalchemy import text
+    from backend.app import main as _app  # noqa: F401  (registers every router's statements)
+    from backend.app.db import seed as generator
+    from backend.app.db.session import engine
+    from backend.app.db.statements import registry
+
+    dialect = engine.dialect.name
+    with engine.connect() as c:
+        if c.execute(text("SELECT COUNT(*) FROM users")).scalar():
+            raise SystemExit("The database already has users; point --database-url at an empty schema")
+    # Only volumes change: admins and teachers keep their ids, so the registered examples stay valid
+    scale = generator.SCALES["small"]
+    scale = replace(scale, **{k: getattr(args, k) for k in ("students", "notifications") if getattr(args, k) is not None})
+    t0 = time.perf_counter()
+    generator.generate(engine, scale, log=lambda line: None)
+    print(f"seeded {scale.students:,} students, {scale.notifications:,} notifications on {dialect} in {time.perf_counter() - t0:.1f} s")
+
+    with engine.begin() as c:
+        for index in args.drop:
+            table = c.execute(text("SELECT tbl_name FROM sqlite_master WHERE name = :n"), {"n": index}).scalar() \
+                if dialect == "sqlite" else None
+            c.exec_driver_sql(f"DROP INDEX {index}" if dialect == "sqlite" else
+                              f"DROP INDEX {index} ON {_mysql_table(c, index)}")
+            print(f"dropped {index}" + (f" on {table}" if table else ""))
+        if dialect == "sqlite":
+            c.exec_driver_sql("ANALYZE")
+
+    path = args.snapshot or PLAN_DIR / f"{dialect}.json"
+    snapshot: Dict[str, Dict] = json.loads(path.read_text())["plans"] if path.exists() else {}
+    current: Dict[str, Dict] = {}
+    problems: List[str] = []
+    timings: List[Tuple[str, float]] = []
+
+    with engine.connect() as c:
+        for name in sorted(registry):
+            if args.only and args.only not in name:
+                continue
+            reg = registry[name]
+            sql = render(reg.statement, reg.example, engine.dialect)
+            plan = explain(c, dialect, sql)
+            flags = flags_of(dialect, plan)
+            current[name] = {"plan": plan, "flags": flags}
+            before = snapshot.get(name)
+            new = [f for f in flags if before is None or f not in before["flags"]]
+            mark = "NEW FLAGS" if new else ("changed" if before and before["plan"] != plan else "")
+            print(f"{name:<40} {', '.join(flags) or '-':<40} {mark}")
+            if mark:
+                for line in plan:
+                    print(f"    {line}")
+            if new:
+                problems.append(f"{name}: {', '.join(new)}")
+            if args.time:
+                timings.append((name, timed(c, sql, args.time)))
+
+    if timings:
+        print(f"\n{'statement':<40}{'median ms':>12}")
+        for name, ms in timings:
+            print(f"{name:<40}{ms:>12.3f}")
+
+    if args.update:
+        if args.drop:
+            raise SystemExit("Not recording a snapshot with indexes dropped")
+        merged = {**snapshot, **current}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({"dialect": dialect, "plans": merged}, indent=1, sort_keys=True) + "\n")
+        print(f"snapshot written to {path}")
+        return
+    if problems:
+        print("FAIL: new full scans / sorts:\n  " + "\n  ".join(problems))
+        sys.exit(1)
+    print("ok")
+
+
+def _mysql_table(conn, index: str) -> str:
+    from sqlalchemy import text
+
+    table = conn.execute(text(
+        "SELECT table_name FROM information_schema.statistics WHERE table_schema = DATABASE() AND index_name = :n LIMIT 1"
+    ), {"n": index}).scalar()
+    if table is None:
+        raise SystemExit(f"No index named {index}")
+    return table
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+# backend/benchmarks/routes.py
+"""
+Load test of every endpoint against a seeded synthetic school, checked
+against stored baselines.
+
+Seeds a throwaway database (SQLite by default; --database-url points at an
+empty local MySQL schema instead) with the deterministic synthetic school of
+backend/app/db/seed.py at the chosen --scale, plus spare rows for the write
+routes. Then every route in main.py and the routers is called
+in-process through the ASGI app:
+
+  - read routes one at a time for latency, then with --concurrency
+    requests in flight for throughput;
+  - writes one at a time, each on rows of its own.
+
+For each route it reports latency percentiles, throughput and SQL
+statements per request.
+
+With --check (the default when a baseline exists), it exits 1 if any route
+does either of these against the baseline:
+  - runs more statements per request (median), which catches N+1 queries;
+  - has a p50 latency more than --tolerance above the baseline and at least
+    --min-delta-ms slower, which ignores jitter on sub-millisecond routes.
+
+A shared machine speeds up and slows down as a whole. So each route's
+baseline is first scaled by the run's drift: the median over all routes of
+p50 / baseline p50. One route regressing still stands out. A slowdown of
+every route fails only past --max-drift.
+
+Latency baselines are only comparable on similar hardware. Statement
+counts are comparable anywhere.
+
+    python -m backend.benchmarks.routes                        # small scale, compare
+    python -m backend.benchmarks.routes --scale medium         # 1M notifications
+    python -m backend.benchmarks.routes --update-baseline      # record a new baseline
+    python -m backend.benchmarks.routes --only teacher --requests 500
+
+Not covered: /api/student/notifications/stream (a server-sent event stream
+that stays open; see benchmarks/notification_fanout.py).
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+SCALES = ("small", "medium", "large")    # backend/app/db/seed.py SCALES; imported only once DATABASE_URL is set
+SPARE = 400              # rows per write route, so no request touches another's
+
+
+@dataclass
+class School:
+    students: List[int]
+    teachers: List[int]
+    classes: List[int]
+    teacher_of: Dict[int, int]
+    admin: int
+    spare_users: List[int] = field(default_factory=list)
+    spare_teachers: List[int] = field(default_factory=list)
+    spare_student: int = 0
+    spare_timetables: List[int] = field(default_factory=list)
+    job_id: int = 0
+
+
+# =====================
+# Seeding
+# =====================
+def seed(engine, scale: str, rng_seed: int = 42) -> School:
+    """The synthetic school from db/seed.py, plus rows of its own for each write route."""
+    from sqlalchemy import text
+    from backend.app.db import seed as generator
+
+    gen = generator.generate(engine, generator.SCALES[scale], seed=rng_seed, log=lambda line: None)
+    with engine.begin() as c:
+        pw = c.execute(text("SELECT password_hash FROM users WHERE user_id = :id"), {"id": gen.admins[0]}).scalar()
+        first = c.execute(text("SELECT MAX(user_id) FROM users")).scalar() + 1
+        spare_users = list(range(first, first + SPARE))
+        spare_teachers = list(range(first + SPARE, first + 2 * SPARE))
+        spare_student = first + 2 * SPARE
+        c.execute(
+            text("INSERT INTO users (user_id, email, password_hash, full_name, role) VALUES (:id, :email, :pw, :name, :role)"),
+            [{"id": u, "email": f"spare{u}@bench.edu", "pw": pw, "name": f"Spare {u}", "role": role}
+             for u, role in [(u, "student") for u in spare_users] + [(t, "teacher") for t in spare_teachers]
+             + [(spare_student, "student")]],
+        )
+        c.execute(text("INSERT INTO teachers (teacher_id, full_name, email, role, employee_code) "
+                       "VALUES (:id, :name, :email, 'teacher', :code)"),
+                  [{"id": t, "name": f"Spare {t}", "email": f"spare{t}@bench.edu", "code": f"S{t}"} for t in spare_teachers])
+        c.execute(text("INSERT INTO students (student_id, full_name, email, role, grade, class) "
+                       "VALUES (:id, 'Spare student', :email, 'student', '7', 'A')"),
+                  {"id": spare_student, "email": f"spare{spare_student}@bench.edu"})
+        # For the timetable write routes: the spare student and teacher, on Sundays
+        first_tt = c.execute(text("SELECT MAX(timetable_id) FROM timetables")).scalar() + 1
+        c.execute(text("INSERT INTO timetables (timetable_id, student_id, teacher_id, class_id, day_of_week, start_time, end_time) "
+                       "VALUES (:id, :s, :t, :k, 'Sunday', :a, :b)"),
+                  [{"id": first_tt + i, "s": spare_student, "t": spare_teachers[0], "k": gen.classes[0],
+                    "a": _clock(i * 3), "b": _clock(i * 3 + 2)} for i in range(SPARE)])
+        job_id = c.execute(text("SELECT COALESCE(MAX(job_id), 0) FROM notification_jobs")).scalar() + 1
+        c.execute(text("INSERT INTO notification_jobs (job_id, sent_by, message, audience, status, total, sent, last_recipient) "
+                       "VALUES (:id, :t, 'Seeded job', '{}', 'done', 0, 0, 0)"), {"id": job_id, "t": gen.teachers[0]})
+
+    return School(students=gen.students, teachers=gen.teachers, classes=gen.classes, teacher_of=gen.teacher_of,
+                  admin=gen.admins[0], spare_users=spare_users, spare_teachers=spare_teachers,
+                  spare_student=spare_student, spare_timetables=list(range(first_tt, first_tt + SPARE)), job_id=job_id)
+
+
+def _clock(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}:00"
+
+
+# =====================
+# Routes
+# =====================
+@dataclass
+class Case:
+    name: str
+    method: str
+    path: Callable[[int], str]
+    role: Optional[str]                       # "admin" | "teacher" | "student" | None
+    body: Optional[Callable[[int], Any]] = None
+    expect: Tuple[int, ...] = (200,)
+    write: bool = False                       # run one request at a time
+    requests: Optional[int] = None            # overrides --requests (e.g. bcrypt-bound routes)
+    multipart: bool = False
+
+
+def cases(s: School) -> List[Case]:
+    from backend.app.db.seed import GENERATED_PASSWORD as PASSWORD, generated_email
+
+    teacher = s.teacher_of[s.classes[0]]
+    spare_teacher = s.spare_teachers[0]
+
+    def entry(i: int, day: str = "Saturday") -> Dict[str, Any]:
+        return {"student_id": s.spare_student, "teacher_id": spare_teacher, "class_id": s.classes[0],
+                "day_of_week": day, "start_time": _clock(i * 3), "end_time": _clock(i * 3 + 2)}
+
+    return [
+        Case("health", "GET", lambda i: "/health", None),
+        Case("auth.login", "POST", lambda i: "/api/auth/login", None,
+             body=lambda i: {"email": generated_email("student", s.students[i]), "password": PASSWORD}, requests=10),
+        Case("auth.me", "GET", lambda i: "/api/auth/me", "student"),
+        Case("debug.current_user", "GET", lambda i: "/debug/current_user", "admin"),
+        Case("debug.hashing", "GET", lambda i: "/debug/hashing", "admin"),
+        Case("debug.pool", "GET", lambda i: "/debug/pool", "admin"),
+        Case("debug.etag", "GET", lambda i: "/debug/etag", "admin"),
+        Case("debug.slow_queries", "GET", lambda i: "/debug/slow-queries", "admin"),
+        Case("debug.log_level", "GET", lambda i: "/debug/log-level", "admin"),
+        Case("debug.set_log_level", "PUT", lambda i: "/debug/log-level?level=WARNING", "admin", write=True),
+        Case("metrics", "GET", lambda i: "/metrics", None),
+
+        Case("users.list", "GET", lambda i: "/api/users/?limit=200", "admin"),
+        Case("users.list_role", "GET", lambda i: "/api/users/?role=teacher&limit=200", "admin"),
+        Case("users.create", "POST", lambda i: "/api/users/", "admin", write=True, expect=(201,), requests=20,
+             body=lambda i: {"email": f"new{i}@bench.edu", "full_name": f"New {i}", "role": "student", "password": PASSWORD}),
+        Case("users.import", "POST", lambda i: "/api/users/import?kind=user", "admin", write=True, requests=3, multipart=True,
+             body=lambda i: "email,full_name,role,password\n" + "".join(
+                 f"imp{i}-{j}@bench.edu,Imported {j},student,{PASSWORD}\n" for j in range(20))),
+        Case("users.update", "PATCH", lambda i: f"/api/users/{s.spare_users[i % SPARE]}", "admin", write=True,
+             body=lambda i: {"full_name": f"Renamed {i}"}),
+        Case("users.delete", "DELETE", lambda i: f"/api/users/{s.spare_users[-1 - i]}", "admin", write=True,
+             expect=(204,), requests=min(100, SPARE // 2)),
+
+        Case("student.schedule_me", "GET", lambda i: "/api/student/schedule/me", "student"),
+        Case("student.timetable", "GET", lambda i: f"/api/student/timetable/{s.students[i % len(s.students)]}", "admin"),
+        Case("student.notifications", "GET", lambda i: "/api/student/notifications", "student"),
+        Case("student.unread", "GET", lambda i: "/api/student/notifications/unread", "student"),
+        Case("student.mark_one_read", "POST", lambda i: f"/api/student/notifications/{i + 1}/read", "student", write=True),
+        Case("student.mark_all_read", "POST", lambda i: "/api/student/notifications/mark-read", "student", write=True),
+
+        Case("teacher.list", "GET", lambda i: "/api/teacher/?limit=50", "admin"),
+        Case("teacher.search", "GET", lambda i: "/api/teacher/?q=Teacher%201&limit=50", "admin"),
+        Case("teacher.get", "GET", lambda i: f"/api/teacher/{s.teachers[i % len(s.teachers)]}", "admin"),
+        Case("teacher.create", "POST", lambda i: "/api/teacher/", "admin", write=True, expect=(201,), requests=20,
+             body=lambda i: {"email": f"newt{i}@bench.edu", "full_name": f"New Teacher {i}", "password": PASSWORD,
+                             "subject": "Maths", "employee_code": f"N{i}"}),
+        Case("teacher.update", "PATCH", lambda i: f"/api/teacher/{s.spare_teachers[1 + i % (SPARE // 2)]}", "admin",
+             write=True, body=lambda i: {"department": f"Dept {i % 7}"}),
+        Case("teacher.delete", "DELETE", lambda i: f"/api/teacher/{s.spare_teachers[-1 - i]}", "admin", write=True,
+             expect=(204,), requests=min(100, SPARE // 2 - 1)),
+        Case("teacher.notifications", "GET", lambda i: "/api/teacher/notifications", "teacher"),
+        Case("teacher.schedule_me", "GET", lambda i: "/api/teacher/schedule/me", "teacher"),
+        Case("teacher.schedule_range", "GET", lambda i: "/api/teacher/schedule/range?start=2026-09-07&end=2026-12-13", "teacher"),
+        Case("teacher.schedule_many", "GET", lambda i: "/api/teacher/schedule/range?"
+             + "&".join(f"teacher_id={t}" for t in s.teachers[:20]), "admin"),
+        Case("teacher.send_notification", "POST", lambda i: "/api/teacher/notifications/send", "teacher", write=True,
+             body=lambda i: {"content": f"Bench notice {i}", "class_id": s.classes[0]}),
+        Case("teacher.job_status", "GET", lambda i: f"/api/teacher/notifications/jobs/{s.job_id}", "admin"),
+
+        Case("timetable.list", "GET", lambda i: f"/api/timetable/?teacher_id={teacher}", "admin"),
+        Case("timetable.week", "GET", lambda i: f"/api/timetable/{s.students[i % len(s.students)]}", "admin"),
+        Case("timetable.create", "POST", lambda i: "/api/timetable/", "admin", write=True, expect=(201,),
+             requests=min(200, 24 * 20), body=lambda i: entry(i)),
+        Case("timetable.bulk_dry_run", "POST", lambda i: "/api/timetable/bulk", "admin", write=True,
+             body=lambda i: {"entries": [entry(400 + j, "Friday") for j in range(10)], "dry_run": True}),
+        Case("timetable.update", "PATCH", lambda i: f"/api/timetable/{s.spare_timetables[i % (SPARE // 2)]}", "admin",
+             write=True, body=lambda i: {"end_time": _clock(((i % (SPARE // 2)) * 3) + 1 + i % 2)}),
+        Case("timetable.delete", "DELETE", lambda i: f"/api/timetable/{s.spare_timetables[-1 - i]}", "admin", write=True,
+             expect=(204,), requests=min(100, SPARE // 2)),
+        Case("timetable.generate_dry_run", "POST", lambda i: "/api/timetable/generate", "admin", write=True, requests=20,
+             body=lambda i: {"classes": [{"class_id": s.classes[0], "teacher_id": teacher, "sessions_per_week": 3}],
+                             "dry_run": True}),
+        Case("timetable.availability", "POST", lambda i: "/api/timetable/availability", "teacher",
+             body=lambda i: {"teacher_ids": [teacher], "class_ids": [s.classes[0]]}),
+    ]
+
+
+# =====================
+# Runner
+# =====================
+async def call(app, method: str, path: str, headers, body: bytes = b"", client: str = "127.0.0.1") -> Tuple[int, bytes]:
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+        "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+        "root_path": "", "headers": headers, "client": (client, 5000), "server": ("bench", 80),
+    }
+    sent, status, out = False, 0, []
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.sleep(3600)       # no disconnect while the response is produced
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            out.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(out)
+
+
+def encode(case: Case, i: int) -> Tuple[List[Tuple[bytes, bytes]], bytes]:
+    if case.body is None:
+        return [], b""
+    if case.multipart:
+        boundary = "benchboundary"
+        body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"rows.csv\"\r\n"
+                f"Content-Type: text/csv\r\n\r\n{case.body(i)}\r\n--{boundary}--\r\n").encode()
+        return [(b"content-type", f"multipart/form-data; boundary={boundary}".encode())], body
+    return [(b"content-type", b"application/json")], json.dumps(case.body(i)).encode()
+
+
+async def run_case(app, case: Case, tokens: Dict[str, str], n: int, concurrency: int) -> Dict[str, Any]:
+    from backend.app.core import sqlstats
+
+    auth = [(b"authorization", f"Bearer {tokens[case.role]}".encode())] if case.role else []
+    latencies: List[float] = []
+    queries: List[int] = []
+    failures: List[Tuple[int, str]] = []
+    counter = iter(range(n))
+
+    async def worker():
+        for i in counter:
+            extra, body = encode(case, i)
+            token = sqlstats.start()
+            t0 = time.perf_counter()
+            # Each request from its own address, so the login limiter sees distinct clients
+            status, out = await call(app, case.method, case.path(i), auth + extra, body,
+                                     client=f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}")
+            latencies.append(time.perf_counter() - t0)
+            queries.append(sqlstats.count())
+            sqlstats.stop(token)
+            if status not in case.expect:
+                failures.append((status, out[:200].decode(errors="replace")))
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000
+    return {
+        "requests": n,
+        "p50_ms": round(pct(0.50), 3),
+        "p95_ms": round(pct(0.95), 3),
+        "p99_ms": round(pct(0.99), 3),
+        "rps": round(n / elapsed, 1),
+        "queries": statistics.median(queries),
+        "queries_max": max(queries),
+        "failures": len(failures),
+        "failure_sample": failures[:2],
+    }
+
+
+async def run_all(app, selected: List[Case], tokens, requests: int, concurrency: int, warmup: int):
+    results = {}
+    async with app.router.lifespan_context(app):
+        for case in selected:
+            n = case.requests or requests
+            if case.write:
+                r = await run_case(app, case, tokens, n, 1)
+            else:
+                if warmup:
+                    await run_case(app, case, tokens, warmup, 1)
+                # Latency one request at a time: under load p50 is mostly time queued for the threadpool
+                r = await run_case(app, case, tokens, n, 1)
+                r["rps"] = (await run_case(app, case, tokens, n, concurrency))["rps"]
+            results[case.name] = r
+            print(f"{case.name:<28}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['rps']:>10.0f}"
+                  f"{r['queries']:>8g}" + (f"   {r['failures']} FAILED {r['failure_sample'][0]}" if r["failures"] else ""))
+    return results
+
+
+def compare(results, baseline, tolerance: float, min_delta_ms: float, max_drift: float) -> List[str]:
+    problems = []
+    shared = [n for n in results if n in baseline and baseline[n]["p50_ms"] > 0]
+    # How much slower this whole run is than the baseline's: the machine, not the code, when it moves every route
+    # (needs enough routes that one regressing cannot move the median)
+    drift = statistics.median(results[n]["p50_ms"] / baseline[n]["p50_ms"] for n in shared) if len(shared) >= 5 else 1.0
+    print(f"run speed vs baseline: {drift:.2f}x (median over routes)")
+    if drift > 1 + max_drift:
+        problems.append(f"every route is slower: median p50 {drift:.2f}x the baseline")
+    for name in shared:
+        r, base = results[name], baseline[name]
+        if r["queries"] > base["queries"]:
+            problems.append(f"{name}: {r['queries']:g} statements per request (baseline {base['queries']:g})")
+        expected = base["p50_ms"] * max(drift, 1.0)
+        slower = r["p50_ms"] - expected
+        if r["p50_ms"] > expected * (1 + tolerance) and slower >= min_delta_ms:
+            problems.append(f"{name}: p50 {r['p50_ms']:.2f} ms (baseline {base['p50_ms']:.2f} ms x {drift:.2f} run drift, "
+                            f"+{slower:.2f} ms)")
+    return problems
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--scale", choices=SCALES, default="small")
+    ap.add_argument("--database-url", help="empty MySQL schema to seed (default: a temporary SQLite file)")
+    ap.add_argument("--requests", type=int, default=200, help="per read route; write routes cap their own")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--warmup", type=int, default=20)
+    ap.add_argument("--only", help="run routes whose name contains this")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--baseline", type=Path, help="default: baselines/routes-<dialect>-<scale>.json")
+    ap.add_argument("--update-baseline", action="store_true")
+    ap.add_argument("--tolerance", type=float, default=0.5, help="allowed p50 slowdown as a fraction")
+    ap.add_argument("--min-delta-ms", type=float, default=2.0)
+    ap.add_argument("--max-drift", type=float, default=1.0, help="allowed slowdown of the whole run as a fraction")
+    ap.add_argument("--no-check", action="store_true")
+    args = ap.parse_args()
+
+    os.environ["DATABASE_URL"] = args.database_url or "sqlite:///" + os.path.join(tempfile.mkdtemp(), "routes.db")
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ.pop("DATABASE_REPLICA_URLS", None)
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # Measure login itself, not the limiter in front of it
+    os.environ["LOGIN_RATE_PER_IP"] = os.environ["LOGIN_RATE_PER_EMAIL"] = "100000/1"
+    os.environ["LOGIN_MAX_CONCURRENT_VERIFY"] = str(max(args.concurrency, 2))
+    from sqlalchemy import text
+    from backend.app.core.security import create_access_token
+    from backend.app.db.session import engine
+    from backend.app.main import app
+
+    with engine.connect() as c:
+        if c.execute(text("SELECT COUNT(*) FROM users")).scalar():
+            raise SystemExit("The database already has users; point --database-url at an empty schema")
+
+    t0 = time.perf_counter()
+    school = seed(engine, args.scale, args.seed)
+    gc.collect()
+    gc.freeze()
+    print(f"seeded {args.scale} school on {engine.dialect.name} in {time.perf_counter() - t0:.1f} s")
+
+    def bearer(uid: int, role: str) -> str:
+        return create_access_token(sub=str(uid), claims={"role": role, "email": f"{role}{uid}@gen.learnloop.edu", "name": f"{role} {uid}"})
+
+    tokens = {
+        "admin": bearer(school.admin, "admin"),
+        "teacher": bearer(school.teacher_of[school.classes[0]], "teacher"),
+        "student": bearer(school.students[0], "student"),
+    }
+    selected = [c for c in cases(school) if not args.only or args.only in c.name]
+
+    print(f"{'route':<28}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>10}{'stmts':>8}")
+    results = asyncio.run(run_all(app, selected, tokens, args.requests, args.concurrency, args.warmup))
+
+    failed = [name for name, r in results.items() if r["failures"]]
+    path = args.baseline or BASELINE_DIR / f"routes-{engine.dialect.name}-{args.scale}.json"
+    if args.update_baseline:
+        if failed:
+            raise SystemExit(f"Not recording a baseline with failing routes: {', '.join(failed)}")
+        previous = json.loads(path.read_text())["routes"] if path.exists() else {}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps({
+            "scale": args.scale, "dialect": engine.dialect.name, "requests": args.requests,
+            "concurrency": args.concurrency,
+            "routes": {**previous, **{n: {k: r[k] for k in ("p50_ms", "p95_ms", "queries")} for n, r in results.items()}},
+        }, indent=1, sort_keys=True) + "\n")
+        print(f"baseline written to {path}")
+        return
+
+    problems = [f"{name}: requests failed" for name in failed]
+    if not args.no_check and path.exists():
+        problems += compare(results, json.loads(path.read_text())["routes"], args.tolerance, args.min_delta_ms,
+                            args.max_drift)
+    elif not args.no_check:
+        print(f"no baseline at {path}; run with --update-baseline to record one")
+    if problems:
+        print("FAIL:\n  " + "\n  ".join(problems))
+        sys.exit(1)
+    print("ok")
+
+
+if __name__ == "__main__":
+    main()
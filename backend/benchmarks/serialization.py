@@ -0,0 +1,81 @@
+# backend/benchmarks/serialization.py
+"""
+Benchmark: rows/sec serialized for a list_users response.
+
+"model path" is what list_users did before: a UserOut per row via _to_out,
+then FastAPI's response_model validation and serialization, then JSONResponse.
+"fast path" is the current one: plain dicts straight into FastJSONResponse.
+Also shows the compressed size and cost at the configured levels. Needs no
+database.
+
+    python -m backend.benchmarks.serialization --rows 500 --repeat 200
+"""
+import argparse
+import time
+from typing import List
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from backend.app.core import compression, responses
+from backend.app.schemas.user import UserOut
+
+
+class Row:
+    __slots__ = ("user_id", "email", "full_name", "role")
+
+    def __init__(self, i: int):
+        self.user_id = i
+        self.email = f"student{i}@school.example.edu.au"
+        self.full_name = f"Student Number {i}"
+        self.role = ("admin", "teacher", "student")[i % 3]
+
+
+def model_path(rows, adapter) -> bytes:
+    outs = [UserOut(id=r.user_id, email=r.email, name=r.full_name, role=r.role) for r in rows]
+    content = adapter.dump_python(adapter.validate_python(outs), mode="json")
+    return JSONResponse(content).body
+
+
+def fast_path(rows) -> bytes:
+    return responses.FastJSONResponse([
+        {"id": r.user_id, "email": r.email, "name": r.full_name, "role": r.role} for r in rows
+    ]).body
+
+
+def measure(name: str, fn, rows: int, repeat: int) -> bytes:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        body = fn()
+    elapsed = time.perf_counter() - t0
+    print(f"{name:<14}{rows * repeat / elapsed:>14,.0f}{elapsed * 1000 / repeat:>10.3f}{len(body):>10,}")
+    return body
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=200)
+    args = ap.parse_args()
+
+    rows = [Row(i) for i in range(1, args.rows + 1)]
+    adapter = TypeAdapter(List[UserOut])
+    print(f"encoder: {'orjson' if responses.orjson is not None else 'stdlib json'}")
+    print(f"{'path':<14}{'rows/sec':>14}{'ms/resp':>10}{'bytes':>10}")
+    slow = measure("model path", lambda: model_path(rows, adapter), args.rows, args.repeat)
+    fast = measure("fast path", lambda: fast_path(rows), args.rows, args.repeat)
+    import json
+    assert json.loads(slow) == json.loads(fast), "paths disagree"
+
+    codings = ["gzip"] + (["br"] if compression.brotli is not None else [])
+    for coding in codings:
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            packed = compression.compress(fast, coding)
+        ms = (time.perf_counter() - t0) * 1000 / args.repeat
+        print(f"{coding:<14}{'':>14}{ms:>10.3f}{len(packed):>10,}  ({len(packed) / len(fast):.0%} of original)")
+
+
+if __name__ == "__main__":
+    main()
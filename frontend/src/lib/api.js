@@ -73,6 +73,12 @@ export async function listUsers({ role, skip = 0, limit = 200 } = {}) {
 }
 
 /* ---------- STUDENTS (CRUD) ---------- */
+export async function importPeople(kind, file) {
+  const body = new FormData();
+  body.append("file", file);
+  return apiFetch(`/api/users/import?kind=${encodeURIComponent(kind)}`, { method: "POST", body });
+}
+
 export async function createStudent(payload) {
   return apiFetch("/api/students/", {
     method: "POST",
@@ -146,6 +152,15 @@ export async function getTodaySchedule() {
   return apiFetch("/api/teacher/schedule/me");
 }
 
+// Dated lessons for a range (default: this week). start/end are YYYY-MM-DD.
+export async function getTeacherSchedule({ start, end, teacherIds = [] } = {}) {
+  const params = new URLSearchParams();
+  if (start) params.set("start", start);
+  if (end) params.set("end", end);
+  teacherIds.forEach((id) => params.append("teacher_id", id));
+  return apiFetch(`/api/teacher/schedule/range?${params.toString()}`);
+}
+
 export async function getMaterials() {
   return apiFetch("/api/teacher/materials");
 }
@@ -164,13 +179,18 @@ export async function sendMessage(content) {
 }
 
 /* ---------- NOTIFICATIONS ---------- */
-export async function sendNotification(content) {
+// audience: optional { class_id } | { grade } | { student_ids: [...] }; omit for whole school
+export async function sendNotification(content, audience = {}) {
   return apiFetch("/api/teacher/notifications/send", {
     method: "POST",
-    body: JSON.stringify({ content }),
+    body: JSON.stringify({ content, ...audience }),
   });
 }
 
+export async function getNotificationJob(jobId) {
+  return apiFetch(`/api/teacher/notifications/jobs/${jobId}`);
+}
+
 export async function listNotifications() {
   return apiFetch("/api/teacher/notifications");
 }
@@ -192,6 +212,20 @@ export async function createTimetable(payload) {
   });
 }
 
+export async function bulkLoadTimetables(entries, { replace = false, dry_run = false } = {}) {
+  return apiFetch("/api/timetable/bulk", {
+    method: "POST",
+    body: JSON.stringify({ entries, replace, dry_run }),
+  });
+}
+
+export async function findFreeSlots(query) {
+  return apiFetch("/api/timetable/availability", {
+    method: "POST",
+    body: JSON.stringify(query),
+  });
+}
+
 export async function updateTimetable(id, patch) {
   return apiFetch(`/api/timetable/${id}`, {
     method: "PATCH",
@@ -207,3 +241,27 @@ export async function deleteTimetable(id) {
 export async function getStudentUnread() {
   return apiFetch("/api/student/notifications/unread");
 }
+
+export async function markNotificationRead(id) {
+  return apiFetch(`/api/student/notifications/${id}/read`, { method: "POST" });
+}
+
+/**
+ * openUnreadStream
+ * - Server-sent unread counts; replaces polling /api/student/notifications/unread
+ * - onEvent receives {count} (absolute) or {delta} (relative)
+ * - Returns a close() function; EventSource reconnects on its own
+ */
+export function openUnreadStream(onEvent) {
+  const token = sessionStorage.getItem("accessToken");
+  const url = `${apiBase}/api/student/notifications/stream?token=${encodeURIComponent(token ?? "")}`;
+  const source = new EventSource(url);
+  source.addEventListener("unread", (e) => {
+    try {
+      onEvent(JSON.parse(e.data));
+    } catch (err) {
+      console.error("Bad unread event:", err);
+    }
+  });
+  return () => source.close();
+}
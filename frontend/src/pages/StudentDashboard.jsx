@@ -1,7 +1,7 @@
 
 import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
-import { apiFetch } from "../lib/api";
+import { apiFetch, openUnreadStream } from "../lib/api";
 
 // Single day card component for timetable
 function DayCard({ day, items }) {
@@ -66,10 +66,6 @@ export default function StudentDashboard() {
 
         const timetable = await apiFetch(`/api/student/timetable/${profile.id}`);
         setWeek(timetable.week ?? []);
-
-        // 🔔 fetch unread notifications count
-        const notifRes = await apiFetch("/api/student/notifications/unread");
-        setUnreadCount(notifRes.unread ?? 0);
       } catch (err) {
         console.error(err);
         navigate("/");
@@ -77,6 +73,13 @@ export default function StudentDashboard() {
         setLoading(false);
       }
     })();
+
+    // 🔔 unread count is pushed by the server (first event carries the full count)
+    const close = openUnreadStream((evt) => {
+      if (typeof evt.count === "number") setUnreadCount(evt.count);
+      else if (typeof evt.delta === "number") setUnreadCount((n) => n + evt.delta);
+    });
+    return close;
   }, [navigate]);
 
   const logout = () => {
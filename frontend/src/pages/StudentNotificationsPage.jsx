@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
-import { apiFetch } from "../lib/api";
+import { apiFetch, openUnreadStream } from "../lib/api";
 
 export default function StudentNotificationsPage() {
   const navigate = useNavigate();
@@ -33,6 +33,18 @@ export default function StudentNotificationsPage() {
         setLoading(false);
       }
     })();
+
+    // Reload the list only when the server says something new arrived
+    const close = openUnreadStream(async (evt) => {
+      if (!evt.delta) return;
+      try {
+        const notifs = await apiFetch("/api/student/notifications");
+        setNotifications(notifs.notifications ?? []);
+      } catch (err) {
+        console.error("Failed to refresh notifications:", err);
+      }
+    });
+    return close;
   }, [navigate]);
 
   const logout = () => {
@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react";
 import { useNavigate } from "react-router-dom";
-import { apiFetch } from "../lib/api"; // Make sure this handles JWT headers
+import { apiFetch, getTeacherSchedule } from "../lib/api"; // Make sure this handles JWT headers
 
 /* small stat card */
 function Stat({ label, value }) {
@@ -13,6 +13,15 @@ function Stat({ label, value }) {
 }
 
 /* one class row */
+// Lessons come with ISO times and raw grades; format them here
+const hhmm = (t) => t.slice(0, 5);
+const localDate = (d) =>
+  `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(2, "0")}-${String(d.getDate()).padStart(2, "0")}`;
+function formatSection({ grade_min, grade_max, description }) {
+  const grade = grade_min === grade_max ? `Grade ${grade_min}` : `Grades ${grade_min}–${grade_max}`;
+  return description ? `${grade} • ${description}` : grade;
+}
+
 function ClassRow({ subject, section, time }) {
   return (
     <div className="tch-row flex items-center justify-between px-3 py-2 border-t first:border-t-0 border-slate-200">
@@ -50,8 +59,16 @@ export default function TeacherDashboard() {
       const profile = await apiFetch("/api/auth/me");
       setMe(profile);
 
-      const sched = await apiFetch("/api/teacher/schedule/me");
-      setToday(sched.schedule ?? []);
+      const week = await getTeacherSchedule();
+      const todayIso = localDate(new Date());
+      const day = week.teachers?.[0]?.days.find((d) => d.date === todayIso);
+      setToday(
+        (day?.lessons ?? []).map((l) => ({
+          subject: l.subject,
+          section: formatSection(l),
+          time: `${hhmm(l.start)} – ${hhmm(l.end)}`,
+        }))
+      );
 
       
     } catch (err) {
@@ -111,16 +128,19 @@ const sendNotification = async () => {
   if (!notification) return;
 
   try {
-    await apiFetch("/api/teacher/notifications/send", {
+    const res = await apiFetch("/api/teacher/notifications/send", {
       method: "POST",
       body: JSON.stringify({ content: notification }),
     });
 
     setNotification('');
 
-  
-
-    alert("Notification sent!");
+    // Large audiences are queued server-side (202 + job_id)
+    if (res?.job_id) {
+      alert(`Notification queued for ${res.sent_to} students (job #${res.job_id}).`);
+    } else {
+      alert("Notification sent!");
+    }
   } catch (err) {
     console.error('Notification send error:', err);
     alert(`Failed to send notification: ${err.message}`);